@@ -1,28 +1,50 @@
-import boto3
 import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
 from io import BytesIO
-from botocore.exceptions import ClientError
-from typing import List
-from datetime import datetime
+from itertools import islice
+from botocore.exceptions import BotoCoreError, ClientError
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 from domain.interfaces.s3_repository import S3Repository
 from domain.entities.s3_bucket import S3Bucket
 from domain.entities.s3_object import S3Object
+from domain.entities.s3_directory_listing import S3DirectoryListing
+from domain.entities.s3_object_stream import STREAM_CHUNK_SIZE, S3ObjectStream
+from adapters.multipart_copy import MultipartCopier
+from adapters.multipart_upload import MultipartUploader, TransferConfig
+from adapters.ranged_download import RangedDownloader
+from adapters.s3_client_factory import (
+    get_scheduled_s3_client,
+    get_transfer_scheduler,
+)
+from adapters.transfer_scheduler import INTERACTIVE, THROTTLING_CODES, TRANSIENT_CODES
+
+DELETE_BATCH_SIZE = 1000
 
 
 class Boto3S3Repository(S3Repository):
-    def __init__(self):
-        self.s3_client = boto3.client(
-            service_name="s3",
-            aws_access_key_id="test",
-            aws_secret_access_key="test",
-            endpoint_url="http://localhost:4566",
-        )
+    def __init__(
+        self,
+        transfer_config: TransferConfig = None,
+        s3_client=None,
+        lane: int = INTERACTIVE,
+    ):
+        """
+        :param transfer_config: Multipart and ranged transfer tuning
+        :param s3_client: botocore S3 client (default: the shared client,
+            with transfers going through the shared transfer scheduler)
+        :param lane: Scheduler lane of the default client's transfers
+        """
+        self.transfer_config = transfer_config or TransferConfig()
+        self.s3_client = s3_client or get_scheduled_s3_client(lane)
 
     def list_buckets(self) -> List[S3Bucket]:
         try:
             response = self.s3_client.list_buckets()
             return [
-                S3Bucket(bucket["Name"], bucket.get("CreationDate", datetime.utcnow()))
+                S3Bucket(bucket["Name"], bucket.get("CreationDate"))
                 for bucket in response.get("Buckets", [])
             ]
         except ClientError as e:
@@ -46,34 +68,296 @@ class Boto3S3Repository(S3Repository):
             return False
 
     def list_objects(self, bucket_name: str) -> List[S3Object]:
+        return list(self.iter_objects(bucket_name))
+
+    def iter_objects(
+        self,
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        start_after: Optional[str] = None,
+        page_size: int = 1000,
+    ) -> Iterator[S3Object]:
+        params = {"Bucket": bucket_name, "PaginationConfig": {"PageSize": page_size}}
+        if prefix:
+            params["Prefix"] = prefix
+        if start_after:
+            params["StartAfter"] = start_after
         try:
-            response = self.s3_client.list_objects_v2(Bucket=bucket_name)
-            return [
-                S3Object(obj["Key"], obj["Size"], obj["LastModified"])
-                for obj in response.get("Contents", [])
-            ]
+            paginator = self.s3_client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(**params):
+                for obj in page.get("Contents", []):
+                    yield S3Object(
+                        obj["Key"], obj["Size"], obj["LastModified"], obj.get("ETag")
+                    )
         except ClientError as e:
+            # Ending quietly would pass a truncated listing off as complete.
             logging.error(f"Error listing objects in {bucket_name}: {e}")
-            return []
+            raise
 
-    def put_object(self, bucket_name: str, file_path: str) -> bool:
+    def list_directory(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        max_keys: Optional[int] = None,
+    ) -> S3DirectoryListing:
+        """
+        One level below prefix. With max_keys only the first page is read,
+        holding at most max_keys objects and prefixes together.
+        """
+        prefixes = []
+        objects = []
+        for page in self.iter_directory(
+            bucket_name, prefix, delimiter, max_keys or 1000
+        ):
+            prefixes.extend(page.prefixes)
+            objects.extend(page.objects)
+            if max_keys:
+                break
+        return S3DirectoryListing(prefix, prefixes, objects)
+
+    def iter_directory(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        page_size: int = 1000,
+    ) -> Iterator[S3DirectoryListing]:
+        params = {
+            "Bucket": bucket_name,
+            "Delimiter": delimiter,
+            "PaginationConfig": {"PageSize": page_size},
+        }
+        if prefix:
+            params["Prefix"] = prefix
+        try:
+            paginator = self.s3_client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(**params):
+                objects = [
+                    S3Object(
+                        obj["Key"], obj["Size"], obj["LastModified"], obj.get("ETag")
+                    )
+                    for obj in page.get("Contents", [])
+                    if obj["Key"] != prefix  # The "folder" marker object itself.
+                ]
+                prefixes = [p["Prefix"] for p in page.get("CommonPrefixes", [])]
+                yield S3DirectoryListing(prefix, prefixes, objects)
+        except ClientError as e:
+            logging.error(f"Error listing {prefix or '/'} in {bucket_name}: {e}")
+            raise
+
+    def put_object(
+        self,
+        bucket_name: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        object_key: Optional[str] = None,
+    ) -> bool:
         try:
-            object_key = file_path.split("/")[-1]
+            object_key = object_key or os.path.basename(file_path)
+            if os.path.getsize(file_path) >= self.transfer_config.multipart_threshold:
+                MultipartUploader(self.s3_client, self.transfer_config).upload_file(
+                    bucket_name, object_key, file_path, progress_callback
+                )
+                return True
             with open(file_path, "rb") as file_data:
                 self.s3_client.put_object(
                     Bucket=bucket_name, Key=object_key, Body=file_data
                 )
+            if progress_callback:
+                progress_callback(os.path.getsize(file_path))
             return True
-        except ClientError as e:
+        except (ClientError, BotoCoreError) as e:
             logging.error(f"Error uploading object {file_path}: {e}")
             return False
 
+    def get_object(self, bucket_name: str, object_key: str) -> Optional[bytes]:
+        try:
+            response = self.s3_client.get_object(Bucket=bucket_name, Key=object_key)
+            return response["Body"].read()
+        except (ClientError, BotoCoreError) as e:
+            logging.error(f"Error reading object {object_key} from {bucket_name}: {e}")
+            return None
+
+    def head_object(self, bucket_name: str, object_key: str) -> Optional[S3Object]:
+        try:
+            response = self.s3_client.head_object(Bucket=bucket_name, Key=object_key)
+        except ClientError as e:
+            if _is_missing(e):
+                logging.error(
+                    f"Error reading object {object_key} from {bucket_name}: {e}"
+                )
+                return None
+            raise
+        return S3Object(
+            object_key,
+            response["ContentLength"],
+            response.get("LastModified"),
+            response.get("ETag"),
+        )
+
+    def open_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        byte_range: Optional[str] = None,
+        if_none_match: Optional[str] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Optional[S3ObjectStream]:
+        """
+        Start a GET and hand back its body unread, as chunk_size chunks.
+
+        byte_range and if_none_match are passed to S3 as the Range and
+        If-None-Match headers, so a matching ETag costs one request and no
+        body, and a range only transfers the bytes asked for. None means
+        the object does not exist; other S3 errors raise.
+        """
+        params = {"Bucket": bucket_name, "Key": object_key}
+        if byte_range:
+            params["Range"] = byte_range
+        if if_none_match:
+            params["IfNoneMatch"] = if_none_match
+        try:
+            response = self.s3_client.get_object(**params)
+        except ClientError as e:
+            status = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+            if status == 304:
+                headers = e.response["ResponseMetadata"].get("HTTPHeaders", {})
+                last_modified = headers.get("last-modified")
+                return S3ObjectStream(
+                    304,
+                    etag=headers.get("etag", if_none_match),
+                    last_modified=last_modified
+                    and parsedate_to_datetime(last_modified),
+                )
+            if status == 416:
+                size = e.response.get("Error", {}).get("ActualObjectSize")
+                return S3ObjectStream(416, size=int(size) if size else None)
+            if _is_missing(e):
+                logging.error(
+                    f"Error reading object {object_key} from {bucket_name}: {e}"
+                )
+                return None
+            raise
+
+        body = response["Body"]
+        content_range = response.get("ContentRange")
+        size = response["ContentLength"]
+        if content_range:
+            size = content_range.rsplit("/", 1)[-1]
+            size = int(size) if size.isdigit() else None
+        return S3ObjectStream(
+            206 if content_range else 200,
+            size=size,
+            content_length=response["ContentLength"],
+            content_range=content_range,
+            etag=response.get("ETag"),
+            last_modified=response.get("LastModified"),
+            content_type=response.get("ContentType"),
+            chunks=body.iter_chunks(chunk_size),
+            close=body.close,
+        )
+
+    def download_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> bool:
+        try:
+            RangedDownloader(self.s3_client, self.transfer_config).download_file(
+                bucket_name, object_key, file_path, progress_callback
+            )
+            return True
+        except (ClientError, BotoCoreError, OSError) as e:
+            logging.error(
+                f"Error downloading object {object_key} from {bucket_name}: {e}"
+            )
+            return False
+
+    def put_object_bytes(self, bucket_name: str, object_key: str, data: bytes) -> bool:
+        try:
+            self.s3_client.put_object(Bucket=bucket_name, Key=object_key, Body=data)
+            return True
+        except (ClientError, BotoCoreError) as e:
+            logging.error(f"Error uploading object {object_key}: {e}")
+            return False
+
+    def create_multipart_upload(
+        self, bucket_name: str, object_key: str
+    ) -> Optional[str]:
+        try:
+            response = self.s3_client.create_multipart_upload(
+                Bucket=bucket_name, Key=object_key
+            )
+            return response["UploadId"]
+        except (ClientError, BotoCoreError) as e:
+            logging.error(f"Error starting multipart upload of {object_key}: {e}")
+            return None
+
+    def upload_part(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_number: int,
+        data: bytes,
+    ) -> Optional[str]:
+        try:
+            response = self.s3_client.upload_part(
+                Bucket=bucket_name,
+                Key=object_key,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=data,
+            )
+            return response["ETag"]
+        except (ClientError, BotoCoreError) as e:
+            logging.error(f"Error uploading part {part_number} of {object_key}: {e}")
+            return None
+
+    def complete_multipart_upload(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        parts: List[Dict],
+    ) -> bool:
+        try:
+            self.s3_client.complete_multipart_upload(
+                Bucket=bucket_name,
+                Key=object_key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
+            )
+            return True
+        except (ClientError, BotoCoreError) as e:
+            logging.error(f"Error completing multipart upload of {object_key}: {e}")
+            return False
+
+    def abort_multipart_upload(
+        self, bucket_name: str, object_key: str, upload_id: str
+    ) -> bool:
+        try:
+            self.s3_client.abort_multipart_upload(
+                Bucket=bucket_name, Key=object_key, UploadId=upload_id
+            )
+            return True
+        except (ClientError, BotoCoreError) as e:
+            logging.error(f"Error aborting multipart upload of {object_key}: {e}")
+            return False
+
     def generate_presigned_url(
-        self, bucket_name: str, file_name: str, expiration=3600
+        self,
+        bucket_name: str,
+        file_name: str,
+        expiration=3600,
+        client_method: str = "put_object",
     ) -> str:
         try:
             url = self.s3_client.generate_presigned_url(
-                "put_object",
+                client_method,
                 Params={"Bucket": bucket_name, "Key": file_name},
                 ExpiresIn=expiration,
             )
@@ -82,6 +366,69 @@ class Boto3S3Repository(S3Repository):
             logging.error(f"Error generating presigned URL {file_name}: {e}")
             return None
 
+    def generate_presigned_urls(
+        self,
+        bucket_name: str,
+        object_keys: Iterable[str],
+        expiration=3600,
+        client_method: str = "put_object",
+    ) -> Dict[str, str]:
+        # Signing is local, so a batch costs no requests, only CPU.
+        urls = {}
+        for object_key in object_keys:
+            url = self.generate_presigned_url(
+                bucket_name, object_key, expiration, client_method
+            )
+            if url is not None:
+                urls[object_key] = url
+        return urls
+
+    def generate_presigned_part_urls(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_numbers: Iterable[int],
+        expiration=3600,
+    ) -> Dict[int, str]:
+        try:
+            return {
+                part_number: self.s3_client.generate_presigned_url(
+                    "upload_part",
+                    Params={
+                        "Bucket": bucket_name,
+                        "Key": object_key,
+                        "UploadId": upload_id,
+                        "PartNumber": part_number,
+                    },
+                    ExpiresIn=expiration,
+                )
+                for part_number in part_numbers
+            }
+        except ClientError as e:
+            logging.error(f"Error generating part URLs for {object_key}: {e}")
+            return {}
+
+    def list_parts(
+        self, bucket_name: str, object_key: str, upload_id: str
+    ) -> Optional[List[Dict]]:
+        try:
+            paginator = self.s3_client.get_paginator("list_parts")
+            return [
+                {
+                    "PartNumber": part["PartNumber"],
+                    "ETag": part["ETag"],
+                    "Size": part["Size"],
+                }
+                for page in paginator.paginate(
+                    Bucket=bucket_name, Key=object_key, UploadId=upload_id
+                )
+                for part in page.get("Parts", [])
+            ]
+        except (ClientError, BotoCoreError) as e:
+            logging.error(f"Error listing parts of {object_key}: {e}")
+            return None
+
     def delete_object(self, bucket_name: str, object_key: str) -> bool:
         try:
             self.s3_client.delete_object(Bucket=bucket_name, Key=object_key)
@@ -89,3 +436,208 @@ class Boto3S3Repository(S3Repository):
         except ClientError as e:
             logging.error(f"Error deleting object {object_key} from {bucket_name}: {e}")
             return False
+
+    def delete_objects(self, bucket_name: str, object_keys: Iterable[str]) -> int:
+        """
+        Delete keys in DeleteObjects batches of 1000, several batches at once.
+
+        Keys are consumed lazily, so a listing generator can be passed in and
+        only the in-flight batches are held in memory. Returns the number of
+        keys deleted.
+        """
+        keys = iter(object_keys)
+        deleted = 0
+        max_in_flight = self.transfer_config.max_concurrency
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            in_flight = set()
+            while batch := list(islice(keys, DELETE_BATCH_SIZE)):
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    deleted += sum(future.result() for future in done)
+                in_flight.add(
+                    executor.submit(self._delete_batch, bucket_name, batch)
+                )
+            deleted += sum(future.result() for future in in_flight)
+        return deleted
+
+    def copy_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        destination_key: str,
+        destination_bucket: Optional[str] = None,
+    ) -> bool:
+        return self._copy(
+            bucket_name, object_key, destination_bucket or bucket_name, destination_key
+        )
+
+    def move_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        destination_key: str,
+        destination_bucket: Optional[str] = None,
+    ) -> bool:
+        destination_bucket = destination_bucket or bucket_name
+        if (destination_bucket, destination_key) == (bucket_name, object_key):
+            return True
+        return self._copy(
+            bucket_name, object_key, destination_bucket, destination_key
+        ) and self.delete_object(bucket_name, object_key)
+
+    def move_prefix(
+        self,
+        bucket_name: str,
+        prefix: str,
+        destination_prefix: str,
+        destination_bucket: Optional[str] = None,
+    ) -> int:
+        """
+        Move every object under prefix to destination_prefix server-side.
+
+        Copies run on a pool of max_concurrency workers while the listing
+        streams in, and the sources of finished copies are deleted in
+        batches of 1000. Returns the number of objects moved.
+
+        Raises ValueError when destination_prefix is inside prefix in the
+        same bucket: a copy could land on a key that is itself a source and
+        be deleted with it.
+        """
+        destination_bucket = destination_bucket or bucket_name
+        if destination_bucket == bucket_name:
+            if destination_prefix == prefix:
+                return 0
+            if destination_prefix.startswith(prefix):
+                raise ValueError(
+                    "The destination must not be inside the source prefix"
+                )
+        objects = self.iter_objects(bucket_name, prefix=prefix or None)
+
+        moved = 0
+        copied = []
+        max_in_flight = self.transfer_config.max_concurrency
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            in_flight = set()
+            try:
+                for obj in objects:
+                    if len(in_flight) >= max_in_flight:
+                        done, in_flight = wait(
+                            in_flight, return_when=FIRST_COMPLETED
+                        )
+                        copied.extend(f.result() for f in done if f.result())
+                        if len(copied) >= DELETE_BATCH_SIZE:
+                            moved += self.delete_objects(bucket_name, copied)
+                            copied = []
+                    in_flight.add(
+                        executor.submit(
+                            self._copy_listed,
+                            bucket_name,
+                            obj,
+                            destination_bucket,
+                            destination_prefix + obj.key[len(prefix) :],
+                        )
+                    )
+            finally:
+                # Also when the listing fails: finished copies are moved, so
+                # no object is left at both places.
+                copied.extend(f.result() for f in in_flight if f.result())
+                moved += self.delete_objects(bucket_name, copied)
+        return moved
+
+    def _copy_listed(
+        self,
+        bucket_name: str,
+        obj: S3Object,
+        destination_bucket: str,
+        destination_key: str,
+    ) -> Optional[str]:
+        copied = self._copy(
+            bucket_name, obj.key, destination_bucket, destination_key, obj.size
+        )
+        return obj.key if copied else None
+
+    def _copy(
+        self,
+        bucket_name: str,
+        object_key: str,
+        destination_bucket: str,
+        destination_key: str,
+        size: Optional[int] = None,
+    ) -> bool:
+        try:
+            MultipartCopier(self.s3_client, self.transfer_config).copy(
+                bucket_name, object_key, destination_bucket, destination_key, size
+            )
+            return True
+        except (ClientError, BotoCoreError) as e:
+            logging.error(
+                f"Error copying {bucket_name}/{object_key} to "
+                f"{destination_bucket}/{destination_key}: {e}"
+            )
+            return False
+
+    def _delete_batch(self, bucket_name: str, object_keys: List[str]) -> int:
+        deleted = 0
+        pending = object_keys
+        for attempt in range(1, self.transfer_config.max_attempts + 1):
+            started = time.monotonic()
+            try:
+                response = self.s3_client.delete_objects(
+                    Bucket=bucket_name,
+                    Delete={
+                        "Objects": [{"Key": key} for key in pending],
+                        "Quiet": True,
+                    },
+                )
+            except (ClientError, BotoCoreError) as e:
+                logging.error(
+                    f"Error deleting {len(pending)} objects from {bucket_name}: {e}"
+                )
+                return deleted
+            errors = response.get("Errors", [])
+            deleted += len(pending) - len(errors)
+            # DeleteObjects answers 200 and throttles or fails keys one by
+            # one; those are sent again as a smaller batch.
+            retried = set()
+            if attempt < self.transfer_config.max_attempts:
+                retried = {
+                    error["Key"]
+                    for error in errors
+                    if error.get("Code") in THROTTLING_CODES
+                    or error.get("Code") in TRANSIENT_CODES
+                }
+            for error in errors:
+                if error["Key"] not in retried:
+                    logging.error(
+                        f"Error deleting object {error['Key']} from {bucket_name}: "
+                        f"{error.get('Code')} {error.get('Message')}"
+                    )
+            if not retried:
+                break
+            pending = [key for key in pending if key in retried]
+            self._retry_later(
+                bucket_name,
+                attempt,
+                started,
+                any(error.get("Code") in THROTTLING_CODES for error in errors),
+            )
+        return deleted
+
+    def _retry_later(
+        self, bucket_name: str, attempt: int, started: float, throttled: bool
+    ) -> None:
+        """
+        Back off before resending the failed part of a request, through the
+        client's scheduler so throttling also lowers the bucket's limit.
+        """
+        scheduler = getattr(self.s3_client, "scheduler", None)
+        if scheduler is None:
+            # A client given without a scheduler still gets its delays.
+            scheduler = get_transfer_scheduler()
+        scheduler.retry_later(bucket_name, attempt, started, throttled)
+
+
+def _is_missing(error: ClientError) -> bool:
+    code = error.response.get("Error", {}).get("Code")
+    status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return code in ("NoSuchKey", "NoSuchBucket", "404") or status == 404
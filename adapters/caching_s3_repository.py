@@ -0,0 +1,393 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from domain.interfaces.s3_repository import S3Repository
+from domain.entities.s3_bucket import S3Bucket
+from domain.entities.s3_object import S3Object
+from domain.entities.s3_directory_listing import S3DirectoryListing
+from adapters.delegating_s3_repository import DelegatingS3Repository
+
+_BUCKETS = ("buckets",)
+
+
+class CachingS3Repository(DelegatingS3Repository):
+    def __init__(
+        self,
+        repository: S3Repository,
+        ttl: float = 30.0,
+        max_cached_objects: int = 200_000,
+    ):
+        """
+        Repository decorator caching bucket and object listings.
+
+        Object listings are cached per (bucket, prefix), and so are
+        single-level directory listings. A cached object listing also
+        answers requests for any longer prefix inside it. Entries
+        expire after ttl seconds, and the least recently used ones are
+        evicted once the cache holds more than max_cached_objects entries
+        in total. Writes that pass through this repository invalidate or
+        patch the affected listings; so does signing put_object URLs, and
+        invalidate is there for writes made elsewhere, like a browser's
+        upload to such a URL completing.
+
+        :param repository: Repository to cache
+        :param ttl: Seconds a listing stays valid
+        :param max_cached_objects: Upper bound on cached objects across listings
+        """
+        super().__init__(repository)
+        self.ttl = ttl
+        self.max_cached_objects = max_cached_objects
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Tuple[float, object, int]]" = (
+            OrderedDict()
+        )
+        self._cached_objects = 0
+        # Writes seen per bucket; a listing that overlapped one is not cached.
+        self._writes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "cached_objects": self._cached_objects,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._cached_objects = 0
+
+    def invalidate(self, bucket_name: str, object_key: Optional[str] = None) -> None:
+        """Drop the listings object_key (or any key of bucket_name) is part of."""
+        self._invalidate_objects(bucket_name, object_key)
+
+    def list_buckets(self) -> List[S3Bucket]:
+        cached = self._get(_BUCKETS)
+        if cached is not None:
+            return list(cached)
+        buckets = self.repository.list_buckets()
+        self._put(_BUCKETS, tuple(buckets))
+        return buckets
+
+    def create_bucket(self, bucket_name: str) -> bool:
+        try:
+            return self.repository.create_bucket(bucket_name)
+        finally:
+            self._invalidate(_BUCKETS)
+
+    def delete_bucket(self, bucket_name: str) -> bool:
+        try:
+            return self.repository.delete_bucket(bucket_name)
+        finally:
+            self._invalidate(_BUCKETS)
+            self._invalidate_objects(bucket_name)
+
+    def list_objects(self, bucket_name: str) -> List[S3Object]:
+        return list(self.iter_objects(bucket_name))
+
+    def iter_objects(
+        self,
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        start_after: Optional[str] = None,
+        page_size: int = 1000,
+    ) -> Iterator[S3Object]:
+        prefix = prefix or ""
+        cached = self._lookup_objects(bucket_name, prefix)
+        if cached is not None:
+            for obj in cached:
+                if obj.key.startswith(prefix) and (
+                    not start_after or obj.key > start_after
+                ):
+                    yield obj
+            return
+
+        writes = self._write_count(bucket_name)
+        objects = self.repository.iter_objects(
+            bucket_name, prefix=prefix, start_after=start_after, page_size=page_size
+        )
+        if start_after:
+            yield from objects
+            return
+
+        collected = []
+        for obj in objects:
+            if collected is not None:
+                collected.append(obj)
+                if len(collected) > self.max_cached_objects:
+                    collected = None
+            yield obj
+        if collected is not None:
+            self._put(("objects", bucket_name, prefix), tuple(collected), writes=writes)
+
+    def list_directory(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        max_keys: Optional[int] = None,
+    ) -> S3DirectoryListing:
+        if max_keys is not None:
+            # A truncated level must not answer later full listings.
+            return self.repository.list_directory(
+                bucket_name, prefix, delimiter, max_keys
+            )
+        key = ("directory", bucket_name, prefix or "", delimiter)
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+        writes = self._write_count(bucket_name)
+        listing = self.repository.list_directory(bucket_name, prefix, delimiter)
+        self._put(
+            key, listing, len(listing.prefixes) + len(listing.objects), writes=writes
+        )
+        return listing
+
+    def iter_directory(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        page_size: int = 1000,
+    ) -> Iterator[S3DirectoryListing]:
+        # Shares the entries of list_directory; a cached level is one page.
+        key = ("directory", bucket_name, prefix or "", delimiter)
+        cached = self._get(key)
+        if cached is not None:
+            yield cached
+            return
+        writes = self._write_count(bucket_name)
+        prefixes: Optional[List[str]] = []
+        objects: List[S3Object] = []
+        for page in self.repository.iter_directory(
+            bucket_name, prefix, delimiter, page_size
+        ):
+            if prefixes is not None:
+                prefixes.extend(page.prefixes)
+                objects.extend(page.objects)
+                if len(prefixes) + len(objects) > self.max_cached_objects:
+                    prefixes = None
+                    objects = []
+            yield page
+        if prefixes is not None:
+            listing = S3DirectoryListing(prefix, prefixes, objects)
+            self._put(key, listing, len(prefixes) + len(objects), writes=writes)
+
+    def put_object(
+        self,
+        bucket_name: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        object_key: Optional[str] = None,
+    ) -> bool:
+        try:
+            return self.repository.put_object(
+                bucket_name, file_path, progress_callback, object_key
+            )
+        finally:
+            self._invalidate_objects(bucket_name, object_key)
+
+    def put_object_bytes(self, bucket_name: str, object_key: str, data: bytes) -> bool:
+        try:
+            return self.repository.put_object_bytes(bucket_name, object_key, data)
+        finally:
+            self._invalidate_objects(bucket_name, object_key)
+
+    def complete_multipart_upload(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        parts: List[Dict],
+    ) -> bool:
+        try:
+            return self.repository.complete_multipart_upload(
+                bucket_name, object_key, upload_id, parts
+            )
+        finally:
+            self._invalidate_objects(bucket_name, object_key)
+
+    def generate_presigned_url(
+        self,
+        bucket_name: str,
+        file_name: str,
+        expiration=3600,
+        client_method: str = "put_object",
+    ) -> str:
+        try:
+            return self.repository.generate_presigned_url(
+                bucket_name, file_name, expiration, client_method
+            )
+        finally:
+            if client_method == "put_object":
+                self._invalidate_objects(bucket_name, file_name)
+
+    def generate_presigned_urls(
+        self,
+        bucket_name: str,
+        object_keys: Iterable[str],
+        expiration=3600,
+        client_method: str = "put_object",
+    ) -> Dict[str, str]:
+        object_keys = list(object_keys)
+        try:
+            return self.repository.generate_presigned_urls(
+                bucket_name, object_keys, expiration, client_method
+            )
+        finally:
+            # The upload itself bypasses this repository; listings cached
+            # from now until it lands are dropped by invalidate.
+            if client_method == "put_object":
+                for object_key in object_keys:
+                    self._invalidate_objects(bucket_name, object_key)
+
+    def delete_object(self, bucket_name: str, object_key: str) -> bool:
+        deleted = self.repository.delete_object(bucket_name, object_key)
+        if deleted:
+            self._patch_deleted(bucket_name, {object_key})
+        else:
+            self._invalidate_objects(bucket_name, object_key)
+        return deleted
+
+    def delete_objects(self, bucket_name: str, object_keys: Iterable[str]) -> int:
+        try:
+            return self.repository.delete_objects(bucket_name, object_keys)
+        finally:
+            self._invalidate_objects(bucket_name)
+
+    def copy_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        destination_key: str,
+        destination_bucket: Optional[str] = None,
+    ) -> bool:
+        try:
+            return self.repository.copy_object(
+                bucket_name, object_key, destination_key, destination_bucket
+            )
+        finally:
+            self._invalidate_objects(destination_bucket or bucket_name, destination_key)
+
+    def move_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        destination_key: str,
+        destination_bucket: Optional[str] = None,
+    ) -> bool:
+        try:
+            return self.repository.move_object(
+                bucket_name, object_key, destination_key, destination_bucket
+            )
+        finally:
+            self._invalidate_objects(bucket_name, object_key)
+            self._invalidate_objects(destination_bucket or bucket_name, destination_key)
+
+    def move_prefix(
+        self,
+        bucket_name: str,
+        prefix: str,
+        destination_prefix: str,
+        destination_bucket: Optional[str] = None,
+    ) -> int:
+        try:
+            return self.repository.move_prefix(
+                bucket_name, prefix, destination_prefix, destination_bucket
+            )
+        finally:
+            self._invalidate_objects(bucket_name)
+            self._invalidate_objects(destination_bucket or bucket_name)
+
+    def _lookup_objects(self, bucket_name: str, prefix: str) -> Optional[tuple]:
+        # The longest cached prefix covering the request is the smallest listing.
+        for length in range(len(prefix), -1, -1):
+            cached = self._get(("objects", bucket_name, prefix[:length]), count=False)
+            if cached is not None:
+                with self._lock:
+                    self.hits += 1
+                return cached
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _get(self, key: Tuple, count: bool = True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                if count:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return entry[1]
+
+    def _write_count(self, bucket_name: str) -> int:
+        with self._lock:
+            return self._writes.get(bucket_name, 0)
+
+    def _put(
+        self,
+        key: Tuple,
+        value,
+        weight: Optional[int] = None,
+        writes: Optional[int] = None,
+    ) -> None:
+        # writes is the bucket's write count when the listing started; if a
+        # write landed since, the listing may predate it and is not stored.
+        weight = len(value) if weight is None else weight
+        with self._lock:
+            if writes is not None and self._writes.get(key[1], 0) != writes:
+                return
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, weight)
+            self._cached_objects += weight
+            while self._cached_objects > self.max_cached_objects and self._entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: Tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._cached_objects -= entry[2]
+
+    def _invalidate(self, key: Tuple) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def _invalidate_objects(
+        self, bucket_name: str, object_key: Optional[str] = None
+    ) -> None:
+        with self._lock:
+            self._writes[bucket_name] = self._writes.get(bucket_name, 0) + 1
+            for key in [
+                key
+                for key in self._entries
+                if key[0] in ("objects", "directory")
+                and key[1] == bucket_name
+                and (object_key is None or object_key.startswith(key[2]))
+            ]:
+                self._remove(key)
+
+    def _patch_deleted(self, bucket_name: str, object_keys: set) -> None:
+        with self._lock:
+            self._writes[bucket_name] = self._writes.get(bucket_name, 0) + 1
+            for key, (expires_at, value, weight) in list(self._entries.items()):
+                if key[1:2] != (bucket_name,):
+                    continue
+                if key[0] == "directory":
+                    if any(object_key.startswith(key[2]) for object_key in object_keys):
+                        self._remove(key)
+                    continue
+                remaining = tuple(obj for obj in value if obj.key not in object_keys)
+                if len(remaining) != len(value):
+                    self._entries[key] = (expires_at, remaining, len(remaining))
+                    self._cached_objects -= weight - len(remaining)
@@ -0,0 +1,235 @@
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from domain.interfaces.s3_repository import S3Repository
+from domain.entities.s3_bucket import S3Bucket
+from domain.entities.s3_object import S3Object
+from domain.entities.s3_directory_listing import S3DirectoryListing
+from domain.entities.s3_object_stream import STREAM_CHUNK_SIZE, S3ObjectStream
+
+
+class DelegatingS3Repository(S3Repository):
+    def __init__(self, repository: S3Repository):
+        """
+        Base for decorators that wrap another repository.
+
+        Every method forwards through _call, so a subclass can hook all
+        operations in one place or override individual methods.
+
+        :param repository: Repository receiving the forwarded calls
+        """
+        self.repository = repository
+
+    def _call(self, method: str, *args, **kwargs):
+        return getattr(self.repository, method)(*args, **kwargs)
+
+    def list_buckets(self) -> List[S3Bucket]:
+        return self._call("list_buckets")
+
+    def create_bucket(self, bucket_name: str) -> bool:
+        return self._call("create_bucket", bucket_name)
+
+    def delete_bucket(self, bucket_name: str) -> bool:
+        return self._call("delete_bucket", bucket_name)
+
+    def list_objects(self, bucket_name: str) -> List[S3Object]:
+        return self._call("list_objects", bucket_name)
+
+    def iter_objects(
+        self,
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        start_after: Optional[str] = None,
+        page_size: int = 1000,
+    ) -> Iterator[S3Object]:
+        return self._call(
+            "iter_objects",
+            bucket_name,
+            prefix=prefix,
+            start_after=start_after,
+            page_size=page_size,
+        )
+
+    def list_directory(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        max_keys: Optional[int] = None,
+    ) -> S3DirectoryListing:
+        return self._call("list_directory", bucket_name, prefix, delimiter, max_keys)
+
+    def iter_directory(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        page_size: int = 1000,
+    ) -> Iterator[S3DirectoryListing]:
+        return self._call("iter_directory", bucket_name, prefix, delimiter, page_size)
+
+    def put_object(
+        self,
+        bucket_name: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        object_key: Optional[str] = None,
+    ) -> bool:
+        return self._call(
+            "put_object", bucket_name, file_path, progress_callback, object_key
+        )
+
+    def get_object(self, bucket_name: str, object_key: str) -> Optional[bytes]:
+        return self._call("get_object", bucket_name, object_key)
+
+    def head_object(self, bucket_name: str, object_key: str) -> Optional[S3Object]:
+        return self._call("head_object", bucket_name, object_key)
+
+    def open_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        byte_range: Optional[str] = None,
+        if_none_match: Optional[str] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Optional[S3ObjectStream]:
+        return self._call(
+            "open_object",
+            bucket_name,
+            object_key,
+            byte_range,
+            if_none_match,
+            chunk_size,
+        )
+
+    def download_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> bool:
+        return self._call(
+            "download_object", bucket_name, object_key, file_path, progress_callback
+        )
+
+    def put_object_bytes(self, bucket_name: str, object_key: str, data: bytes) -> bool:
+        return self._call("put_object_bytes", bucket_name, object_key, data)
+
+    def create_multipart_upload(
+        self, bucket_name: str, object_key: str
+    ) -> Optional[str]:
+        return self._call("create_multipart_upload", bucket_name, object_key)
+
+    def upload_part(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_number: int,
+        data: bytes,
+    ) -> Optional[str]:
+        return self._call(
+            "upload_part", bucket_name, object_key, upload_id, part_number, data
+        )
+
+    def complete_multipart_upload(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        parts: List[Dict],
+    ) -> bool:
+        return self._call(
+            "complete_multipart_upload", bucket_name, object_key, upload_id, parts
+        )
+
+    def abort_multipart_upload(
+        self, bucket_name: str, object_key: str, upload_id: str
+    ) -> bool:
+        return self._call("abort_multipart_upload", bucket_name, object_key, upload_id)
+
+    def generate_presigned_url(
+        self,
+        bucket_name: str,
+        file_name: str,
+        expiration=3600,
+        client_method: str = "put_object",
+    ) -> str:
+        return self._call(
+            "generate_presigned_url", bucket_name, file_name, expiration, client_method
+        )
+
+    def generate_presigned_urls(
+        self,
+        bucket_name: str,
+        object_keys: Iterable[str],
+        expiration=3600,
+        client_method: str = "put_object",
+    ) -> Dict[str, str]:
+        return self._call(
+            "generate_presigned_urls",
+            bucket_name,
+            object_keys,
+            expiration,
+            client_method,
+        )
+
+    def generate_presigned_part_urls(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_numbers: Iterable[int],
+        expiration=3600,
+    ) -> Dict[int, str]:
+        return self._call(
+            "generate_presigned_part_urls",
+            bucket_name,
+            object_key,
+            upload_id,
+            part_numbers,
+            expiration,
+        )
+
+    def list_parts(
+        self, bucket_name: str, object_key: str, upload_id: str
+    ) -> Optional[List[Dict]]:
+        return self._call("list_parts", bucket_name, object_key, upload_id)
+
+    def delete_object(self, bucket_name: str, object_key: str) -> bool:
+        return self._call("delete_object", bucket_name, object_key)
+
+    def delete_objects(self, bucket_name: str, object_keys: Iterable[str]) -> int:
+        return self._call("delete_objects", bucket_name, object_keys)
+
+    def copy_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        destination_key: str,
+        destination_bucket: Optional[str] = None,
+    ) -> bool:
+        return self._call(
+            "copy_object", bucket_name, object_key, destination_key, destination_bucket
+        )
+
+    def move_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        destination_key: str,
+        destination_bucket: Optional[str] = None,
+    ) -> bool:
+        return self._call(
+            "move_object", bucket_name, object_key, destination_key, destination_bucket
+        )
+
+    def move_prefix(
+        self,
+        bucket_name: str,
+        prefix: str,
+        destination_prefix: str,
+        destination_bucket: Optional[str] = None,
+    ) -> int:
+        return self._call(
+            "move_prefix", bucket_name, prefix, destination_prefix, destination_bucket
+        )
@@ -0,0 +1,249 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional
+from domain.interfaces.async_s3_repository import AsyncS3Repository
+from domain.interfaces.s3_repository import S3Repository
+from domain.entities.s3_bucket import S3Bucket
+from domain.entities.s3_object import S3Object
+from domain.entities.s3_directory_listing import S3DirectoryListing
+from domain.entities.s3_object_stream import STREAM_CHUNK_SIZE, S3ObjectStream
+
+
+class ExecutorAsyncS3Repository(AsyncS3Repository):
+    def __init__(self, repository: S3Repository, max_workers: int = 32):
+        """
+        Async adapter that runs a blocking repository on a dedicated pool.
+
+        The pool is separate from the event loop's default executor so S3
+        calls never starve other blocking work, and its size caps how many
+        S3 requests the process has in flight.
+
+        :param repository: Synchronous repository doing the actual calls
+        :param max_workers: Maximum number of concurrent S3 calls
+        """
+        self.repository = repository
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="s3-async"
+        )
+
+    async def _run(self, func: Callable, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, partial(func, *args, **kwargs)
+        )
+
+    async def list_buckets(self) -> List[S3Bucket]:
+        return await self._run(self.repository.list_buckets)
+
+    async def create_bucket(self, bucket_name: str) -> bool:
+        return await self._run(self.repository.create_bucket, bucket_name)
+
+    async def delete_bucket(self, bucket_name: str) -> bool:
+        return await self._run(self.repository.delete_bucket, bucket_name)
+
+    async def list_objects(self, bucket_name: str) -> List[S3Object]:
+        return await self._run(self.repository.list_objects, bucket_name)
+
+    async def iter_objects(
+        self,
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        start_after: Optional[str] = None,
+        page_size: int = 1000,
+    ) -> AsyncIterator[S3Object]:
+        objects = self.repository.iter_objects(
+            bucket_name, prefix=prefix, start_after=start_after, page_size=page_size
+        )
+        # Pull a page at a time on the pool so the loop only wakes per page.
+        while page := await self._run(lambda: list(islice(objects, page_size))):
+            for obj in page:
+                yield obj
+
+    async def list_directory(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        max_keys: Optional[int] = None,
+    ) -> S3DirectoryListing:
+        return await self._run(
+            self.repository.list_directory, bucket_name, prefix, delimiter, max_keys
+        )
+
+    async def iter_directory(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        page_size: int = 1000,
+    ) -> AsyncIterator[S3DirectoryListing]:
+        pages = self.repository.iter_directory(
+            bucket_name, prefix, delimiter, page_size
+        )
+        while page := await self._run(next, pages, None):
+            yield page
+
+    async def put_object(
+        self,
+        bucket_name: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        object_key: Optional[str] = None,
+    ) -> bool:
+        return await self._run(
+            self.repository.put_object,
+            bucket_name,
+            file_path,
+            progress_callback,
+            object_key,
+        )
+
+    async def head_object(
+        self, bucket_name: str, object_key: str
+    ) -> Optional[S3Object]:
+        return await self._run(self.repository.head_object, bucket_name, object_key)
+
+    async def open_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        byte_range: Optional[str] = None,
+        if_none_match: Optional[str] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Optional[S3ObjectStream]:
+        stream = await self._run(
+            self.repository.open_object,
+            bucket_name,
+            object_key,
+            byte_range,
+            if_none_match,
+            chunk_size,
+        )
+        if stream is not None and stream.chunks is not None:
+            stream.chunks = self._iter_chunks(iter(stream.chunks), stream.close)
+        return stream
+
+    async def _iter_chunks(
+        self, chunks: Iterator[bytes], close: Callable[[], None]
+    ) -> AsyncIterator[bytes]:
+        # One blocking socket read per chunk on the pool; closing releases
+        # the connection when the consumer stops early (client went away).
+        try:
+            while chunk := await self._run(next, chunks, b""):
+                yield chunk
+        finally:
+            close()
+
+    async def put_object_bytes(
+        self, bucket_name: str, object_key: str, data: bytes
+    ) -> bool:
+        return await self._run(
+            self.repository.put_object_bytes, bucket_name, object_key, data
+        )
+
+    async def create_multipart_upload(
+        self, bucket_name: str, object_key: str
+    ) -> Optional[str]:
+        return await self._run(
+            self.repository.create_multipart_upload, bucket_name, object_key
+        )
+
+    async def upload_part(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_number: int,
+        data: bytes,
+    ) -> Optional[str]:
+        return await self._run(
+            self.repository.upload_part,
+            bucket_name,
+            object_key,
+            upload_id,
+            part_number,
+            data,
+        )
+
+    async def complete_multipart_upload(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        parts: List[Dict],
+    ) -> bool:
+        return await self._run(
+            self.repository.complete_multipart_upload,
+            bucket_name,
+            object_key,
+            upload_id,
+            parts,
+        )
+
+    async def abort_multipart_upload(
+        self, bucket_name: str, object_key: str, upload_id: str
+    ) -> bool:
+        return await self._run(
+            self.repository.abort_multipart_upload, bucket_name, object_key, upload_id
+        )
+
+    async def generate_presigned_url(
+        self,
+        bucket_name: str,
+        file_name: str,
+        expiration=3600,
+        client_method: str = "put_object",
+    ) -> str:
+        return await self._run(
+            self.repository.generate_presigned_url,
+            bucket_name,
+            file_name,
+            expiration,
+            client_method,
+        )
+
+    async def generate_presigned_urls(
+        self,
+        bucket_name: str,
+        object_keys: Iterable[str],
+        expiration=3600,
+        client_method: str = "put_object",
+    ) -> Dict[str, str]:
+        return await self._run(
+            self.repository.generate_presigned_urls,
+            bucket_name,
+            list(object_keys),
+            expiration,
+            client_method,
+        )
+
+    async def generate_presigned_part_urls(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_numbers: Iterable[int],
+        expiration=3600,
+    ) -> Dict[int, str]:
+        return await self._run(
+            self.repository.generate_presigned_part_urls,
+            bucket_name,
+            object_key,
+            upload_id,
+            list(part_numbers),
+            expiration,
+        )
+
+    async def list_parts(
+        self, bucket_name: str, object_key: str, upload_id: str
+    ) -> Optional[List[Dict]]:
+        return await self._run(
+            self.repository.list_parts, bucket_name, object_key, upload_id
+        )
+
+    async def delete_object(self, bucket_name: str, object_key: str) -> bool:
+        return await self._run(
+            self.repository.delete_object, bucket_name, object_key
+        )
@@ -0,0 +1,299 @@
+import logging
+import os
+import threading
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from domain.interfaces.s3_repository import S3Repository
+from domain.entities.s3_object import S3Object
+from domain.entities.s3_directory_listing import S3DirectoryListing
+from adapters.delegating_s3_repository import DelegatingS3Repository
+from adapters.sqlite_object_index import SqliteObjectIndex
+
+
+class IndexedS3Repository(DelegatingS3Repository):
+    def __init__(
+        self,
+        repository: S3Repository,
+        index: SqliteObjectIndex,
+        max_age: float = 300,
+        serve_stale: bool = False,
+    ):
+        """
+        Repository decorator serving listings from a local SQLite index.
+
+        A listing or directory level covered by an index entry younger than
+        max_age is read from the index. Otherwise it comes from S3, object
+        listings being written to the index on the way through. With
+        serve_stale, an older index entry is returned immediately and
+        refreshed in the background.
+
+        Keys written or deleted through this repository are not trusted in
+        the index until a listing that started after the change completes,
+        so listings under them go to S3 until then: the object just
+        uploaded or renamed is always found, and a deleted one never is.
+        Only listings read to the end fill the index.
+
+        :param repository: Repository doing the S3 calls
+        :param index: Index to read from and fill
+        :param max_age: Seconds an indexed listing counts as fresh
+        :param serve_stale: Answer from outdated entries and reconcile later
+        """
+        super().__init__(repository)
+        self.index = index
+        self.max_age = max_age
+        self.serve_stale = serve_stale
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+        # Per bucket, keys written since the index last listed them, with
+        # the index generation at the write, and the same keys sorted.
+        self._written: Dict[str, Dict[str, int]] = {}
+        self._written_keys: Dict[str, List[str]] = {}
+
+    def refresh(
+        self, bucket_name: str, prefix: Optional[str] = None, resume: bool = False
+    ) -> int:
+        """
+        Re-list bucket/prefix into the index and return the objects seen.
+
+        With resume, an unfinished earlier refresh continues from the last
+        committed key via StartAfter instead of starting over.
+        """
+        start_after = self.index.resume_key(bucket_name, prefix) if resume else None
+        objects = self.repository.iter_objects(
+            bucket_name, prefix=prefix, start_after=start_after
+        )
+        return sum(
+            1
+            for _ in self.index.fill(
+                bucket_name, prefix, objects, resume=start_after is not None
+            )
+        )
+
+    def refresh_in_background(
+        self, bucket_name: str, prefix: Optional[str] = None
+    ) -> Optional[threading.Thread]:
+        key = (bucket_name, prefix or "")
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return None
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.refresh(bucket_name, prefix)
+            except Exception as e:
+                logging.error(f"Error refreshing index of {bucket_name}: {e}")
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(key)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def list_objects(self, bucket_name: str) -> List[S3Object]:
+        return list(self.iter_objects(bucket_name))
+
+    def iter_objects(
+        self,
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        start_after: Optional[str] = None,
+        page_size: int = 1000,
+    ) -> Iterator[S3Object]:
+        if self._from_index(bucket_name, prefix):
+            return self.index.iter_objects(bucket_name, prefix, start_after)
+
+        objects = self.repository.iter_objects(
+            bucket_name, prefix=prefix, start_after=start_after, page_size=page_size
+        )
+        if start_after:
+            return objects
+        # Nothing is written before a full batch, so a lookup reading a
+        # single key does not touch the index.
+        return self.index.fill(bucket_name, prefix, objects)
+
+    def list_directory(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        max_keys: Optional[int] = None,
+    ) -> S3DirectoryListing:
+        if not self._from_index(bucket_name, prefix):
+            return self.repository.list_directory(
+                bucket_name, prefix, delimiter, max_keys
+            )
+        prefixes = []
+        objects = []
+        for page in self.index.iter_directory(
+            bucket_name, prefix, delimiter, max_keys or 1000
+        ):
+            prefixes.extend(page.prefixes)
+            objects.extend(page.objects)
+            if max_keys:
+                break
+        return S3DirectoryListing(prefix, prefixes, objects)
+
+    def iter_directory(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        page_size: int = 1000,
+    ) -> Iterator[S3DirectoryListing]:
+        if self._from_index(bucket_name, prefix):
+            return self.index.iter_directory(bucket_name, prefix, delimiter, page_size)
+        if self._written_under(bucket_name, prefix):
+            # A level is not indexed by itself; relist what it is part of.
+            self.refresh_in_background(bucket_name, prefix)
+        return self.repository.iter_directory(
+            bucket_name, prefix, delimiter, page_size
+        )
+
+    def _from_index(self, bucket_name: str, prefix: Optional[str]) -> bool:
+        if self._written_under(bucket_name, prefix):
+            return False
+        if self.index.is_fresh(bucket_name, prefix, self.max_age):
+            return True
+        if self.serve_stale and self.index.has_listing(bucket_name, prefix):
+            self.refresh_in_background(bucket_name, prefix)
+            return True
+        return False
+
+    def _wrote(self, bucket_name: str, object_key: Optional[str]) -> None:
+        if object_key is None:
+            return
+        generation = self.index.generation()
+        with self._refreshing_lock:
+            written = self._written.setdefault(bucket_name, {})
+            if object_key not in written:
+                insort(self._written_keys.setdefault(bucket_name, []), object_key)
+            written[object_key] = generation
+        self.index.invalidate(bucket_name, object_key)
+
+    def _written_under(self, bucket_name: str, prefix: Optional[str]) -> bool:
+        prefix = prefix or ""
+        with self._refreshing_lock:
+            keys = self._written_keys.get(bucket_name)
+            if not keys:
+                return False
+            start = bisect_left(keys, prefix)
+            if start == len(keys) or not keys[start].startswith(prefix):
+                return False
+        # Keys a complete listing started after the write covers are in
+        # the index, or known to be gone; they are forgotten.
+        listings = self.index.complete_listings(bucket_name)
+        with self._refreshing_lock:
+            written = self._written[bucket_name]
+            keys = self._written_keys[bucket_name]
+            index = bisect_left(keys, prefix)
+            while index < len(keys) and keys[index].startswith(prefix):
+                key = keys[index]
+                if not any(
+                    key.startswith(listing_prefix) and generation > written[key]
+                    for listing_prefix, generation in listings
+                ):
+                    return True
+                del written[key]
+                del keys[index]
+            return False
+
+    def delete_bucket(self, bucket_name: str) -> bool:
+        deleted = self.repository.delete_bucket(bucket_name)
+        if deleted:
+            self.index.drop_bucket(bucket_name)
+        return deleted
+
+    def put_object(
+        self,
+        bucket_name: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        object_key: Optional[str] = None,
+    ) -> bool:
+        try:
+            return self.repository.put_object(
+                bucket_name, file_path, progress_callback, object_key
+            )
+        finally:
+            self._wrote(bucket_name, object_key or os.path.basename(file_path))
+
+    def put_object_bytes(self, bucket_name: str, object_key: str, data: bytes) -> bool:
+        try:
+            return self.repository.put_object_bytes(bucket_name, object_key, data)
+        finally:
+            self._wrote(bucket_name, object_key)
+
+    def complete_multipart_upload(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        parts: List[Dict],
+    ) -> bool:
+        try:
+            return self.repository.complete_multipart_upload(
+                bucket_name, object_key, upload_id, parts
+            )
+        finally:
+            self._wrote(bucket_name, object_key)
+
+    def delete_object(self, bucket_name: str, object_key: str) -> bool:
+        deleted = self.repository.delete_object(bucket_name, object_key)
+        if deleted:
+            self.index.remove(bucket_name, [object_key])
+            # A fill under way may have buffered the key and write it back.
+            self._wrote(bucket_name, object_key)
+        return deleted
+
+    def delete_objects(self, bucket_name: str, object_keys: Iterable[str]) -> int:
+        try:
+            return self.repository.delete_objects(bucket_name, object_keys)
+        finally:
+            self.index.invalidate(bucket_name)
+
+    def copy_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        destination_key: str,
+        destination_bucket: Optional[str] = None,
+    ) -> bool:
+        try:
+            return self.repository.copy_object(
+                bucket_name, object_key, destination_key, destination_bucket
+            )
+        finally:
+            self._wrote(destination_bucket or bucket_name, destination_key)
+
+    def move_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        destination_key: str,
+        destination_bucket: Optional[str] = None,
+    ) -> bool:
+        moved = self.repository.move_object(
+            bucket_name, object_key, destination_key, destination_bucket
+        )
+        if moved:
+            self.index.remove(bucket_name, [object_key])
+            self._wrote(bucket_name, object_key)
+        self._wrote(destination_bucket or bucket_name, destination_key)
+        return moved
+
+    def move_prefix(
+        self,
+        bucket_name: str,
+        prefix: str,
+        destination_prefix: str,
+        destination_bucket: Optional[str] = None,
+    ) -> int:
+        try:
+            return self.repository.move_prefix(
+                bucket_name, prefix, destination_prefix, destination_bucket
+            )
+        finally:
+            self.index.invalidate(bucket_name)
+            self.index.invalidate(destination_bucket or bucket_name)
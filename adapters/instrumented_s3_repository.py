@@ -0,0 +1,245 @@
+import logging
+import os
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+from domain.interfaces.s3_repository import S3Repository
+from adapters.delegating_s3_repository import DelegatingS3Repository
+from adapters.metrics import REGISTRY, Labels, MetricsRegistry
+
+try:
+    from opentelemetry import trace
+except ImportError:  # Tracing is optional; metrics work without it.
+    trace = None
+
+CALLS = "s3explorer_repository_calls_total"
+FAILURES = "s3explorer_repository_failures_total"
+LATENCY = "s3explorer_repository_call_seconds"
+BYTES = "s3explorer_repository_bytes_total"
+OBJECTS = "s3explorer_repository_objects_total"
+S3_REQUESTS = "s3explorer_s3_requests_total"
+S3_ERRORS = "s3explorer_s3_errors_total"
+S3_ATTEMPT_ERRORS = "s3explorer_s3_attempt_errors_total"
+
+# Iterating methods, with the number of objects (and prefixes) in an item.
+_ITERATORS = {
+    "iter_objects": lambda obj: 1,
+    "iter_directory": lambda listing: len(listing.objects) + len(listing.prefixes),
+}
+_UPLOADED_BYTES = {
+    "put_object": lambda args, result: os.path.getsize(args[1]),
+    "put_object_bytes": lambda args, result: len(args[2]),
+    "upload_part": lambda args, result: len(args[4]),
+}
+_DOWNLOADED_BYTES = {
+    "get_object": lambda args, result: len(result),
+    "download_object": lambda args, result: os.path.getsize(args[2]),
+    "open_object": lambda args, result: result.content_length,
+}
+_OBJECT_COUNTS = {
+    "list_objects": len,
+    "list_directory": lambda listing: len(listing.objects) + len(listing.prefixes),
+    "delete_objects": int,
+}
+
+
+class InstrumentedS3Repository(DelegatingS3Repository):
+    def __init__(
+        self,
+        repository: S3Repository,
+        registry: MetricsRegistry = REGISTRY,
+        tracing: bool = False,
+    ):
+        """
+        Repository decorator recording metrics for every operation.
+
+        Per method it counts calls and failures (a False/None result or an
+        exception), observes latency in a histogram and adds up bytes and
+        objects moved. Streaming listings are timed until the consumer
+        has exhausted or closed them. S3 error codes are recorded by the
+        client hooks installed with instrument_s3_client.
+
+        :param repository: Repository doing the S3 calls
+        :param registry: Registry receiving the samples
+        :param tracing: Also emit an OpenTelemetry span per operation
+        """
+        super().__init__(repository)
+        self.registry = registry
+        self.tracer = None
+        if tracing:
+            if trace is None:
+                logging.warning("opentelemetry is not installed; tracing disabled")
+            else:
+                self.tracer = trace.get_tracer("s3explorer")
+        self._labels: Dict[str, Labels] = {}
+        _describe(registry)
+
+    def _call(self, method: str, *args, **kwargs):
+        labels = self._labels.get(method)
+        if labels is None:
+            labels = self._labels[method] = (("method", method),)
+        span = self._start_span(method, args)
+        started = time.perf_counter()
+        try:
+            if span is None:
+                result = getattr(self.repository, method)(*args, **kwargs)
+            else:
+                with trace.use_span(span, end_on_exit=False):
+                    result = getattr(self.repository, method)(*args, **kwargs)
+        except Exception as e:
+            self._finish(labels, started, True, span, e)
+            raise
+        if method in _ITERATORS:
+            return self._observe_iterator(
+                labels, started, result, span, _ITERATORS[method]
+            )
+        failed = result is False or result is None
+        if not failed:
+            self._count(method, labels, args, result)
+        self._finish(labels, started, failed, span)
+        return result
+
+    def summary(self) -> List[dict]:
+        """Per-method calls, failures, latency percentiles and bytes."""
+        calls = self.registry.counters(CALLS)
+        failures = self.registry.counters(FAILURES)
+        histograms = self.registry.histograms(LATENCY)
+        moved: Dict[Labels, float] = {}
+        for labels, value in self.registry.counters(BYTES).items():
+            method_labels = labels[:1]
+            moved[method_labels] = moved.get(method_labels, 0) + value
+        rows = []
+        for labels, count in sorted(calls.items()):
+            histogram = histograms.get(labels)
+            rows.append(
+                {
+                    "method": labels[0][1],
+                    "calls": int(count),
+                    "failures": int(failures.get(labels, 0)),
+                    "p50": histogram.quantile(0.5) if histogram else None,
+                    "p95": histogram.quantile(0.95) if histogram else None,
+                    "p99": histogram.quantile(0.99) if histogram else None,
+                    "bytes": int(moved.get(labels, 0)),
+                }
+            )
+        return rows
+
+    def _observe_iterator(
+        self,
+        labels: Labels,
+        started: float,
+        iterator: Iterator,
+        span,
+        size: Callable[[object], int],
+    ) -> Iterator:
+        count = 0
+        error = None
+        try:
+            for item in iterator:
+                count += size(item)
+                yield item
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.registry.inc(OBJECTS, labels, count)
+            self._finish(labels, started, error is not None, span, error)
+
+    def _count(self, method: str, labels: Labels, args: tuple, result) -> None:
+        try:
+            if method in _UPLOADED_BYTES:
+                size = _UPLOADED_BYTES[method](args, result)
+                self.registry.inc(BYTES, labels + (("direction", "upload"),), size)
+            elif method in _DOWNLOADED_BYTES:
+                size = _DOWNLOADED_BYTES[method](args, result)
+                self.registry.inc(BYTES, labels + (("direction", "download"),), size)
+            elif method in _OBJECT_COUNTS:
+                self.registry.inc(OBJECTS, labels, _OBJECT_COUNTS[method](result))
+        except (OSError, TypeError, IndexError):
+            pass
+
+    def _finish(
+        self,
+        labels: Labels,
+        started: float,
+        failed: bool,
+        span,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        self.registry.observe(LATENCY, labels, time.perf_counter() - started)
+        self.registry.inc(CALLS, labels)
+        if failed:
+            self.registry.inc(FAILURES, labels)
+        if span is not None:
+            if error is not None:
+                span.record_exception(error)
+            if failed:
+                span.set_status(trace.Status(trace.StatusCode.ERROR))
+            span.end()
+
+    def _start_span(self, method: str, args: tuple):
+        if self.tracer is None:
+            return None
+        attributes = {"s3.method": method}
+        if args and isinstance(args[0], str):
+            attributes["s3.bucket"] = args[0]
+        return self.tracer.start_span(f"s3.{method}", attributes=attributes)
+
+
+def instrument_s3_client(s3_client, registry: MetricsRegistry = REGISTRY) -> None:
+    """
+    Record every S3 API call of a botocore client, with error codes.
+
+    The repository methods turn ClientErrors into False/None results, so
+    the codes (SlowDown, NoSuchKey, AccessDenied...) are taken from the
+    client's event hooks instead. Attempts that botocore retried are
+    counted separately from calls that finally failed.
+    """
+    _describe(registry)
+
+    def after_call(http_response, parsed, event_name, **kwargs):
+        operation = event_name.rsplit(".", 1)[-1]
+        status = str(getattr(http_response, "status_code", ""))
+        registry.inc(S3_REQUESTS, (("operation", operation), ("status", status)))
+        code = (parsed or {}).get("Error", {}).get("Code")
+        if code:
+            registry.inc(S3_ERRORS, (("operation", operation), ("code", code)))
+
+    def after_call_error(exception, event_name, **kwargs):
+        operation = event_name.rsplit(".", 1)[-1]
+        code = type(exception).__name__
+        registry.inc(S3_REQUESTS, (("operation", operation), ("status", "error")))
+        registry.inc(S3_ERRORS, (("operation", operation), ("code", code)))
+
+    def needs_retry(response, event_name, **kwargs):
+        if not response:
+            return None
+        code = (response[1] or {}).get("Error", {}).get("Code")
+        if code:
+            operation = event_name.rsplit(".", 1)[-1]
+            registry.inc(
+                S3_ATTEMPT_ERRORS, (("operation", operation), ("code", code))
+            )
+        return None
+
+    # Frontends share one client; unique ids keep the hooks from being
+    # registered twice for the same registry.
+    unique_id = f"s3explorer-metrics-{id(registry)}"
+    # A ScheduledS3Client sends its transfers through a second client.
+    for client in getattr(s3_client, "clients", (s3_client,)):
+        events = client.meta.events
+        events.register("after-call.s3", after_call, unique_id + "-after-call")
+        events.register(
+            "after-call-error.s3", after_call_error, unique_id + "-after-call-error"
+        )
+        events.register("needs-retry.s3", needs_retry, unique_id + "-needs-retry")
+
+
+def _describe(registry: MetricsRegistry) -> None:
+    registry.describe(CALLS, "Repository method calls.")
+    registry.describe(FAILURES, "Repository calls that failed or returned nothing.")
+    registry.describe(LATENCY, "Repository call latency in seconds.")
+    registry.describe(BYTES, "Bytes uploaded or downloaded by repository calls.")
+    registry.describe(OBJECTS, "Objects listed or deleted by repository calls.")
+    registry.describe(S3_REQUESTS, "S3 API calls by operation and HTTP status.")
+    registry.describe(S3_ERRORS, "S3 API calls that failed, by error code.")
+    registry.describe(S3_ATTEMPT_ERRORS, "S3 API attempts that failed, by error code.")
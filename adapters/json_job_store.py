@@ -0,0 +1,55 @@
+import json
+import logging
+import os
+import shutil
+from typing import List
+from domain.entities.job import Job
+from domain.interfaces.job_store import JobStore
+
+DEFAULT_JOBS_DIR = os.path.join(os.path.expanduser("~"), ".s3explorer", "jobs")
+
+
+class JsonJobStore(JobStore):
+    def __init__(self, directory: str = DEFAULT_JOBS_DIR):
+        """
+        Jobs checkpointed as one JSON file each, <job id>.json.
+
+        A checkpoint is written to a temporary file and renamed over the
+        old one, so a crash mid-write leaves the previous checkpoint.
+        Input files of a job live next to it in <job id>.files/.
+
+        :param directory: Directory holding the jobs, created if missing
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def save(self, job: Job) -> None:
+        path = self._path(job.job_id)
+        with open(path + ".tmp", "w") as checkpoint:
+            json.dump(job.state(), checkpoint)
+        os.replace(path + ".tmp", path)
+
+    def load_all(self) -> List[Job]:
+        jobs = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as checkpoint:
+                    jobs.append(Job.from_state(json.load(checkpoint)))
+            except (OSError, ValueError, TypeError) as e:
+                logging.error(f"Error loading job checkpoint {name}: {e}")
+        return jobs
+
+    def delete(self, job_id: str) -> None:
+        try:
+            os.remove(self._path(job_id))
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(self.files_directory(job_id), ignore_errors=True)
+
+    def files_directory(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id + ".files")
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.directory, job_id + ".json")
@@ -0,0 +1,165 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from adapters.multipart_upload import MAX_PARTS, MB, TransferConfig
+
+# CopyObject handles sources up to 5 GiB; larger ones need UploadPartCopy.
+MAX_COPY_OBJECT_SIZE = 5 * 1024 * MB
+COPY_PART_SIZE = 512 * MB
+# Metadata carried over from HeadObject when the copy is done in parts.
+_COPIED_HEADERS = (
+    "CacheControl",
+    "ContentDisposition",
+    "ContentEncoding",
+    "ContentLanguage",
+    "ContentType",
+    "Expires",
+    "Metadata",
+    "StorageClass",
+)
+
+
+class MultipartCopier:
+    def __init__(self, s3_client, config: TransferConfig):
+        self.s3_client = s3_client
+        self.config = config
+
+    def copy(
+        self,
+        source_bucket: str,
+        source_key: str,
+        bucket_name: str,
+        object_key: str,
+        size: Optional[int] = None,
+    ) -> None:
+        """
+        Copy an object server-side; no bytes pass through this host.
+
+        Objects up to 5 GiB use a single CopyObject. Larger ones are copied
+        as concurrent UploadPartCopy ranges pinned to the source ETag,
+        retrying only the parts that fail, and aborted if any part keeps
+        failing. Pass size when it is already known from a listing to skip
+        the HeadObject for small objects.
+        """
+        source = {"Bucket": source_bucket, "Key": source_key}
+        if size is not None and size <= MAX_COPY_OBJECT_SIZE:
+            self.s3_client.copy_object(
+                CopySource=source, Bucket=bucket_name, Key=object_key
+            )
+            return
+        head = self.s3_client.head_object(Bucket=source_bucket, Key=source_key)
+        if head["ContentLength"] <= MAX_COPY_OBJECT_SIZE:
+            self.s3_client.copy_object(
+                CopySource=source,
+                Bucket=bucket_name,
+                Key=object_key,
+                CopySourceIfMatch=head["ETag"],
+            )
+            return
+        self._copy_parts(source, bucket_name, object_key, head)
+
+    def _copy_parts(
+        self, source: Dict[str, str], bucket_name: str, object_key: str, head: dict
+    ) -> None:
+        size = head["ContentLength"]
+        part_size = self._part_size_for(size)
+        part_count = (size + part_size - 1) // part_size
+        upload_id = self.s3_client.create_multipart_upload(
+            Bucket=bucket_name,
+            Key=object_key,
+            **{name: head[name] for name in _COPIED_HEADERS if head.get(name)},
+        )["UploadId"]
+        try:
+            etags = {}
+            pending = list(range(1, part_count + 1))
+            for attempt in range(1, self.config.max_attempts + 1):
+                failures = self._copy_part_batch(
+                    source,
+                    head["ETag"],
+                    bucket_name,
+                    object_key,
+                    upload_id,
+                    size,
+                    part_size,
+                    pending,
+                    etags,
+                )
+                if not failures:
+                    break
+                pending = sorted(failures)
+                logging.warning(
+                    f"Retrying {len(pending)} failed copy parts of {object_key} "
+                    f"(attempt {attempt + 1}/{self.config.max_attempts})"
+                )
+            else:
+                raise next(iter(failures.values()))
+
+            self.s3_client.complete_multipart_upload(
+                Bucket=bucket_name,
+                Key=object_key,
+                UploadId=upload_id,
+                MultipartUpload={
+                    "Parts": [
+                        {"PartNumber": number, "ETag": etags[number]}
+                        for number in sorted(etags)
+                    ]
+                },
+            )
+        except BaseException:
+            self._abort(bucket_name, object_key, upload_id)
+            raise
+
+    def _copy_part_batch(
+        self,
+        source: Dict[str, str],
+        etag: str,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        size: int,
+        part_size: int,
+        part_numbers: List[int],
+        etags: Dict[int, str],
+    ) -> Dict[int, Exception]:
+        failures = {}
+        with ThreadPoolExecutor(max_workers=self.config.max_concurrency) as executor:
+            futures = {
+                executor.submit(
+                    self.s3_client.upload_part_copy,
+                    Bucket=bucket_name,
+                    Key=object_key,
+                    UploadId=upload_id,
+                    PartNumber=number,
+                    CopySource=source,
+                    CopySourceIfMatch=etag,
+                    CopySourceRange=(
+                        f"bytes={(number - 1) * part_size}-"
+                        f"{min(number * part_size, size) - 1}"
+                    ),
+                ): number
+                for number in part_numbers
+            }
+            for future in as_completed(futures):
+                number = futures[future]
+                try:
+                    etags[number] = future.result()["CopyPartResult"]["ETag"]
+                except (ClientError, BotoCoreError) as e:
+                    failures[number] = e
+        return failures
+
+    def _part_size_for(self, size: int) -> int:
+        part_size = max(self.config.part_size, COPY_PART_SIZE)
+        while part_size * MAX_PARTS < size:
+            part_size *= 2
+        return part_size
+
+    def _abort(self, bucket_name: str, object_key: str, upload_id: str) -> None:
+        try:
+            self.s3_client.abort_multipart_upload(
+                Bucket=bucket_name, Key=object_key, UploadId=upload_id
+            )
+        except ClientError as e:
+            logging.error(f"Error aborting multipart copy of {object_key}: {e}")
@@ -0,0 +1,191 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+MB = 1024 * 1024
+MIN_PART_SIZE = 5 * MB
+MAX_PARTS = 10000
+
+
+class TransferConfig:
+    def __init__(
+        self,
+        multipart_threshold: int = 64 * MB,
+        part_size: int = 16 * MB,
+        max_concurrency: int = 10,
+        max_attempts: int = 3,
+    ):
+        """
+        Tuning knobs for the transfer engines.
+
+        :param multipart_threshold: Files at or above this size use multipart
+        :param part_size: Size of each uploaded part in bytes
+        :param max_concurrency: Number of parts in flight at once
+        :param max_attempts: Attempts per part before the transfer fails
+        """
+        self.multipart_threshold = multipart_threshold
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self.max_concurrency = max(max_concurrency, 1)
+        self.max_attempts = max(max_attempts, 1)
+
+
+class MultipartUploader:
+    def __init__(self, s3_client, config: TransferConfig):
+        self.s3_client = s3_client
+        self.config = config
+
+    def upload_file(
+        self,
+        bucket_name: str,
+        object_key: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        """
+        Upload a file as concurrent parts, retrying only the parts that fail.
+
+        Raises the last error if a part is still failing after max_attempts
+        rounds; the multipart upload is aborted in that case.
+        """
+        file_size = os.path.getsize(file_path)
+        part_size = self._part_size_for(file_size)
+        part_count = max((file_size + part_size - 1) // part_size, 1)
+        progress = TransferProgress(progress_callback)
+
+        upload_id = self.s3_client.create_multipart_upload(
+            Bucket=bucket_name, Key=object_key
+        )["UploadId"]
+        try:
+            etags = {}
+            pending = list(range(1, part_count + 1))
+            for attempt in range(1, self.config.max_attempts + 1):
+                failures = self._upload_parts(
+                    bucket_name,
+                    object_key,
+                    upload_id,
+                    file_path,
+                    file_size,
+                    part_size,
+                    pending,
+                    etags,
+                    progress,
+                )
+                if not failures:
+                    break
+                pending = sorted(failures)
+                logging.warning(
+                    f"Retrying {len(pending)} failed parts of {object_key} "
+                    f"(attempt {attempt + 1}/{self.config.max_attempts})"
+                )
+            else:
+                raise next(iter(failures.values()))
+
+            self.s3_client.complete_multipart_upload(
+                Bucket=bucket_name,
+                Key=object_key,
+                UploadId=upload_id,
+                MultipartUpload={
+                    "Parts": [
+                        {"PartNumber": number, "ETag": etags[number]}
+                        for number in sorted(etags)
+                    ]
+                },
+            )
+        except BaseException:
+            self._abort(bucket_name, object_key, upload_id)
+            raise
+
+    def _upload_parts(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        file_path: str,
+        file_size: int,
+        part_size: int,
+        part_numbers: List[int],
+        etags: Dict[int, str],
+        progress: "TransferProgress",
+    ) -> Dict[int, Exception]:
+        failures = {}
+        fd = os.open(file_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        try:
+            with ThreadPoolExecutor(
+                max_workers=self.config.max_concurrency
+            ) as executor:
+                futures = {
+                    executor.submit(
+                        self._upload_part,
+                        bucket_name,
+                        object_key,
+                        upload_id,
+                        fd,
+                        number,
+                        (number - 1) * part_size,
+                        min(part_size, file_size - (number - 1) * part_size),
+                        progress,
+                    ): number
+                    for number in part_numbers
+                }
+                for future in as_completed(futures):
+                    number = futures[future]
+                    try:
+                        etags[number] = future.result()
+                    except (ClientError, BotoCoreError, OSError) as e:
+                        failures[number] = e
+        finally:
+            os.close(fd)
+        return failures
+
+    def _upload_part(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        fd: int,
+        part_number: int,
+        offset: int,
+        length: int,
+        progress: "TransferProgress",
+    ) -> str:
+        # Parts are read inside the worker so at most max_concurrency parts
+        # are held in memory at a time.
+        body = os.pread(fd, length, offset)
+        response = self.s3_client.upload_part(
+            Bucket=bucket_name,
+            Key=object_key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        progress.add(len(body))
+        return response["ETag"]
+
+    def _part_size_for(self, file_size: int) -> int:
+        part_size = self.config.part_size
+        while part_size * MAX_PARTS < file_size:
+            part_size *= 2
+        return part_size
+
+    def _abort(self, bucket_name: str, object_key: str, upload_id: str) -> None:
+        try:
+            self.s3_client.abort_multipart_upload(
+                Bucket=bucket_name, Key=object_key, UploadId=upload_id
+            )
+        except ClientError as e:
+            logging.error(f"Error aborting multipart upload of {object_key}: {e}")
+
+
+class TransferProgress:
+    def __init__(self, callback: Optional[Callable[[int], None]]):
+        self.callback = callback
+        self.lock = threading.Lock()
+
+    def add(self, bytes_transferred: int) -> None:
+        if self.callback:
+            with self.lock:
+                self.callback(bytes_transferred)
@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, List, Tuple
+from domain.interfaces.s3_repository import S3Repository
+from adapters.delegating_s3_repository import DelegatingS3Repository
+
+
+class PresignCachingS3Repository(DelegatingS3Repository):
+    def __init__(
+        self,
+        repository: S3Repository,
+        min_remaining: float = 0.5,
+        max_entries: int = 100_000,
+    ):
+        """
+        Repository decorator caching presigned URLs until they near expiry.
+
+        A URL is handed out again while at least min_remaining of its
+        lifetime is left, so every caller gets a URL that stays valid for
+        at least expiration * min_remaining seconds. Batches only sign the
+        URLs missing from the cache, in one call to the wrapped repository.
+        The least recently used URLs are evicted past max_entries.
+
+        :param repository: Repository signing the URLs
+        :param min_remaining: Fraction of the lifetime a reused URL has left
+        :param max_entries: Upper bound on cached URLs
+        """
+        super().__init__(repository)
+        self.min_remaining = min_remaining
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def generate_presigned_url(
+        self,
+        bucket_name: str,
+        file_name: str,
+        expiration=3600,
+        client_method: str = "put_object",
+    ) -> str:
+        return self.generate_presigned_urls(
+            bucket_name, [file_name], expiration, client_method
+        ).get(file_name)
+
+    def generate_presigned_urls(
+        self,
+        bucket_name: str,
+        object_keys: Iterable[str],
+        expiration=3600,
+        client_method: str = "put_object",
+    ) -> Dict[str, str]:
+        return self._sign(
+            {
+                object_key: (client_method, bucket_name, object_key, expiration)
+                for object_key in object_keys
+            },
+            lambda missing: self.repository.generate_presigned_urls(
+                bucket_name, missing, expiration, client_method
+            ),
+            expiration,
+        )
+
+    def generate_presigned_part_urls(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_numbers: Iterable[int],
+        expiration=3600,
+    ) -> Dict[int, str]:
+        return self._sign(
+            {
+                part_number: (
+                    "upload_part",
+                    bucket_name,
+                    object_key,
+                    upload_id,
+                    part_number,
+                    expiration,
+                )
+                for part_number in part_numbers
+            },
+            lambda missing: self.repository.generate_presigned_part_urls(
+                bucket_name, object_key, upload_id, missing, expiration
+            ),
+            expiration,
+        )
+
+    def _sign(
+        self,
+        keys: Dict[Hashable, Tuple],
+        sign: Callable[[List], Dict],
+        expiration: float,
+    ) -> Dict:
+        now = time.monotonic()
+        urls = {}
+        with self._lock:
+            for item, key in keys.items():
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    urls[item] = entry[1]
+            self.hits += len(urls)
+            self.misses += len(keys) - len(urls)
+        missing = [item for item in keys if item not in urls]
+        if not missing:
+            return urls
+
+        signed = sign(missing)
+        reuse_until = now + expiration * (1 - self.min_remaining)
+        with self._lock:
+            for item, url in signed.items():
+                self._entries[keys[item]] = (reuse_until, url)
+                self._entries.move_to_end(keys[item])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        urls.update(signed)
+        return urls
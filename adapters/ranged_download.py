@@ -0,0 +1,192 @@
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Optional, Set
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from adapters.multipart_upload import TransferConfig, TransferProgress
+
+SIDECAR_SUFFIX = ".s3download"
+CHUNK_SIZE = 1024 * 1024
+
+
+class RangedDownloader:
+    def __init__(self, s3_client, config: TransferConfig):
+        self.s3_client = s3_client
+        self.config = config
+
+    def download_file(
+        self,
+        bucket_name: str,
+        object_key: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        """
+        Download an object into file_path, resuming an interrupted download.
+
+        Objects below the multipart threshold are fetched with one GET.
+        Larger ones are split into part_size byte ranges fetched
+        concurrently and written in place into a preallocated file. Each
+        finished range is appended to a sidecar file next to the target,
+        which is removed once the download completes.
+        """
+        head = self.s3_client.head_object(Bucket=bucket_name, Key=object_key)
+        size = head["ContentLength"]
+        etag = head["ETag"]
+        progress = TransferProgress(progress_callback)
+
+        if size < self.config.multipart_threshold:
+            self._download_whole(bucket_name, object_key, etag, file_path, progress)
+            return
+
+        range_size = self.config.part_size
+        range_count = (size + range_size - 1) // range_size
+        sidecar_path = file_path + SIDECAR_SUFFIX
+        header = {"etag": etag, "size": size, "range_size": range_size}
+        done = self._load_sidecar(sidecar_path, header, file_path)
+        if done and progress_callback:
+            progress.add(sum(min(range_size, size - i * range_size) for i in done))
+
+        fd = os.open(file_path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0))
+        try:
+            if not done:
+                os.ftruncate(fd, size)
+                with open(sidecar_path, "w") as sidecar:
+                    sidecar.write(json.dumps(header) + "\n")
+            with open(sidecar_path, "a") as sidecar:
+                journal = _Journal(sidecar)
+                pending = [i for i in range(range_count) if i not in done]
+                for attempt in range(1, self.config.max_attempts + 1):
+                    failures = self._download_ranges(
+                        bucket_name,
+                        object_key,
+                        etag,
+                        fd,
+                        size,
+                        range_size,
+                        pending,
+                        journal,
+                        progress,
+                    )
+                    if not failures:
+                        break
+                    pending = sorted(failures)
+                    logging.warning(
+                        f"Retrying {len(pending)} failed ranges of {object_key} "
+                        f"(attempt {attempt + 1}/{self.config.max_attempts})"
+                    )
+                else:
+                    raise next(iter(failures.values()))
+        finally:
+            os.close(fd)
+        os.remove(sidecar_path)
+
+    def _download_whole(
+        self,
+        bucket_name: str,
+        object_key: str,
+        etag: str,
+        file_path: str,
+        progress: TransferProgress,
+    ) -> None:
+        response = self.s3_client.get_object(
+            Bucket=bucket_name, Key=object_key, IfMatch=etag
+        )
+        with open(file_path, "wb") as file_data:
+            for chunk in response["Body"].iter_chunks(CHUNK_SIZE):
+                file_data.write(chunk)
+                progress.add(len(chunk))
+
+    def _download_ranges(
+        self,
+        bucket_name: str,
+        object_key: str,
+        etag: str,
+        fd: int,
+        size: int,
+        range_size: int,
+        range_indexes,
+        journal: "_Journal",
+        progress: TransferProgress,
+    ) -> Dict[int, Exception]:
+        failures = {}
+        with ThreadPoolExecutor(max_workers=self.config.max_concurrency) as executor:
+            futures = {
+                executor.submit(
+                    self._download_range,
+                    bucket_name,
+                    object_key,
+                    etag,
+                    fd,
+                    index * range_size,
+                    min((index + 1) * range_size, size) - 1,
+                    progress,
+                ): index
+                for index in range_indexes
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    future.result()
+                    journal.record(index)
+                except (ClientError, BotoCoreError, OSError) as e:
+                    failures[index] = e
+        return failures
+
+    def _download_range(
+        self,
+        bucket_name: str,
+        object_key: str,
+        etag: str,
+        fd: int,
+        start: int,
+        end: int,
+        progress: TransferProgress,
+    ) -> None:
+        response = self.s3_client.get_object(
+            Bucket=bucket_name,
+            Key=object_key,
+            Range=f"bytes={start}-{end}",
+            IfMatch=etag,
+        )
+        offset = start
+        try:
+            for chunk in response["Body"].iter_chunks(CHUNK_SIZE):
+                os.pwrite(fd, chunk, offset)
+                offset += len(chunk)
+                progress.add(len(chunk))
+            if offset != end + 1:
+                raise OSError(f"Short read for bytes {start}-{end} of {object_key}")
+        except BaseException:
+            # Roll progress back so a retried range is not counted twice.
+            progress.add(start - offset)
+            raise
+
+    @staticmethod
+    def _load_sidecar(sidecar_path: str, header: Dict, file_path: str) -> Set[int]:
+        # A sidecar only counts if it describes the same object version and
+        # range layout and the target file is still fully allocated.
+        try:
+            with open(sidecar_path) as sidecar:
+                if json.loads(sidecar.readline()) != header:
+                    return set()
+                if os.path.getsize(file_path) != header["size"]:
+                    return set()
+                return {int(line) for line in sidecar if line.strip().isdigit()}
+        except (OSError, ValueError):
+            return set()
+
+
+class _Journal:
+    def __init__(self, sidecar):
+        self.sidecar = sidecar
+        self.lock = threading.Lock()
+
+    def record(self, range_index: int) -> None:
+        with self.lock:
+            self.sidecar.write(f"{range_index}\n")
+            self.sidecar.flush()
@@ -0,0 +1,230 @@
+import configparser
+import os
+import threading
+from typing import Mapping, Optional
+
+import boto3
+from botocore.config import Config
+
+from adapters.transfer_scheduler import (
+    INTERACTIVE,
+    ScheduledS3Client,
+    TransferScheduler,
+)
+
+DEFAULT_CONFIG_PATH = os.path.join(
+    os.path.expanduser("~"), ".s3explorer", "config.ini"
+)
+CONFIG_SECTION = "s3"
+ENV_PREFIX = "S3_EXPLORER_"
+# urllib3 opens pooled connections lazily, so a large pool costs nothing
+# until it is used. 128 matches the highest concurrency the frontends
+# accept (sync --concurrency), so parallel work never queues on the pool.
+DEFAULT_MAX_POOL_CONNECTIONS = 128
+
+
+class S3ClientSettings:
+    def __init__(
+        self,
+        endpoint_url: Optional[str] = "http://localhost:4566",
+        region_name: Optional[str] = "us-east-1",
+        aws_access_key_id: Optional[str] = "test",
+        aws_secret_access_key: Optional[str] = "test",
+        aws_session_token: Optional[str] = None,
+        max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+        retry_mode: str = "adaptive",
+        max_attempts: int = 10,
+        connect_timeout: float = 5,
+        read_timeout: float = 60,
+        tcp_keepalive: bool = True,
+        addressing_style: Optional[str] = None,
+        max_bucket_concurrency: int = DEFAULT_MAX_POOL_CONNECTIONS,
+        max_bytes_per_second: float = 0,
+    ):
+        """
+        Connection settings of the shared S3 client.
+
+        The defaults target the LocalStack endpoint from docker-compose.yml.
+        An empty endpoint_url or credential falls back to botocore's own
+        resolution (AWS endpoints, environment, profiles, instance roles).
+
+        :param endpoint_url: S3 endpoint, empty for AWS
+        :param region_name: Region used for signing
+        :param aws_access_key_id: Access key, empty for the default chain
+        :param aws_secret_access_key: Secret key, empty for the default chain
+        :param aws_session_token: Session token for temporary credentials
+        :param max_pool_connections: HTTP connections kept per client
+        :param retry_mode: botocore retry mode (legacy, standard, adaptive)
+        :param max_attempts: Attempts per request, including the first
+        :param connect_timeout: Seconds to wait for a connection
+        :param read_timeout: Seconds to wait for response data
+        :param tcp_keepalive: Enable TCP keepalive on pooled connections
+        :param addressing_style: S3 addressing style (auto, path, virtual)
+        :param max_bucket_concurrency: Most transfer requests in flight per
+            bucket, however far the scheduler's limit grows
+        :param max_bytes_per_second: Cap on transferred bytes, 0 for none
+        """
+        self.endpoint_url = endpoint_url or None
+        self.region_name = region_name or None
+        self.aws_access_key_id = aws_access_key_id or None
+        self.aws_secret_access_key = aws_secret_access_key or None
+        self.aws_session_token = aws_session_token or None
+        self.max_pool_connections = max(int(max_pool_connections), 1)
+        self.retry_mode = retry_mode
+        self.max_attempts = max(int(max_attempts), 1)
+        self.connect_timeout = float(connect_timeout)
+        self.read_timeout = float(read_timeout)
+        self.tcp_keepalive = tcp_keepalive
+        self.addressing_style = addressing_style or None
+        self.max_bucket_concurrency = max(int(max_bucket_concurrency), 1)
+        self.max_bytes_per_second = max(float(max_bytes_per_second), 0)
+
+    @classmethod
+    def load(
+        cls,
+        path: Optional[str] = None,
+        environ: Optional[Mapping[str, str]] = None,
+    ) -> "S3ClientSettings":
+        """
+        Settings from the [s3] section of an INI file, overridden by
+        S3_EXPLORER_<SETTING> environment variables.
+
+        The file is S3_EXPLORER_CONFIG or ~/.s3explorer/config.ini and may
+        be missing. Keys are the constructor's argument names.
+        """
+        environ = os.environ if environ is None else environ
+        path = path or environ.get(ENV_PREFIX + "CONFIG", DEFAULT_CONFIG_PATH)
+        values = {}
+        parser = configparser.ConfigParser()
+        if parser.read(path) and parser.has_section(CONFIG_SECTION):
+            values.update(parser.items(CONFIG_SECTION))
+        for name in _SETTINGS:
+            env_name = ENV_PREFIX + name.upper()
+            if env_name in environ:
+                values[name] = environ[env_name]
+        unknown = set(values) - set(_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown S3 settings: {', '.join(sorted(unknown))}")
+        if "tcp_keepalive" in values:
+            values["tcp_keepalive"] = _to_bool(values["tcp_keepalive"])
+        return cls(**values)
+
+    def botocore_config(self, retries: bool = True) -> Config:
+        """
+        Without retries, every failed attempt is raised to the caller, as
+        the transfer scheduler does its own retrying.
+        """
+        options = {
+            "region_name": self.region_name,
+            "max_pool_connections": self.max_pool_connections,
+            "retries": {
+                "mode": self.retry_mode if retries else "standard",
+                "max_attempts": self.max_attempts if retries else 1,
+            },
+            "connect_timeout": self.connect_timeout,
+            "read_timeout": self.read_timeout,
+            "tcp_keepalive": self.tcp_keepalive,
+        }
+        if self.addressing_style:
+            options["s3"] = {"addressing_style": self.addressing_style}
+        return Config(**options)
+
+
+_SETTINGS = (
+    "endpoint_url",
+    "region_name",
+    "aws_access_key_id",
+    "aws_secret_access_key",
+    "aws_session_token",
+    "max_pool_connections",
+    "retry_mode",
+    "max_attempts",
+    "connect_timeout",
+    "read_timeout",
+    "tcp_keepalive",
+    "addressing_style",
+    "max_bucket_concurrency",
+    "max_bytes_per_second",
+)
+
+_client = None
+_transfer_client = None
+_scheduler = None
+_client_lock = threading.Lock()
+
+
+def create_s3_client(
+    settings: Optional[S3ClientSettings] = None, retries: bool = True
+):
+    """Build a new S3 client; most callers want get_s3_client instead."""
+    settings = settings or S3ClientSettings.load()
+    # A private session: boto3's default session is not thread-safe.
+    session = boto3.session.Session(
+        aws_access_key_id=settings.aws_access_key_id,
+        aws_secret_access_key=settings.aws_secret_access_key,
+        aws_session_token=settings.aws_session_token,
+        region_name=settings.region_name,
+    )
+    return session.client(
+        "s3",
+        endpoint_url=settings.endpoint_url,
+        config=settings.botocore_config(retries),
+    )
+
+
+def get_s3_client():
+    """
+    The process-wide S3 client, created on first use.
+
+    botocore clients are thread-safe, so every repository, thread and
+    frontend shares one client and its connection pool.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = create_s3_client()
+    return _client
+
+
+def get_transfer_scheduler() -> TransferScheduler:
+    """
+    The process-wide transfer scheduler, created on first use.
+
+    One scheduler sees every frontend's requests, so their bucket limits
+    and the bandwidth cap hold for the process as a whole.
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _client_lock:
+            if _scheduler is None:
+                settings = S3ClientSettings.load()
+                _scheduler = TransferScheduler(
+                    max_limit=settings.max_bucket_concurrency,
+                    max_bytes_per_second=settings.max_bytes_per_second,
+                )
+    return _scheduler
+
+
+def get_scheduled_s3_client(lane: int = INTERACTIVE) -> ScheduledS3Client:
+    """
+    The shared S3 client with its transfer requests going through the
+    transfer scheduler in lane.
+
+    Those requests are sent by a second client without botocore retries,
+    so throttling reaches the scheduler on the first attempt.
+    """
+    global _transfer_client
+    if _transfer_client is None:
+        with _client_lock:
+            if _transfer_client is None:
+                _transfer_client = create_s3_client(retries=False)
+    return ScheduledS3Client(
+        get_s3_client(), get_transfer_scheduler(), lane, _transfer_client
+    )
+
+
+def _to_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
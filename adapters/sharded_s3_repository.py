@@ -0,0 +1,512 @@
+import heapq
+import itertools
+import os
+import threading
+from bisect import bisect_left, insort
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
+from domain.interfaces.s3_repository import S3Repository
+from domain.entities.s3_object import S3Object
+from domain.entities.s3_directory_listing import S3DirectoryListing
+from adapters.delegating_s3_repository import DelegatingS3Repository
+
+# Sorts after every character a key can contain, so branch + MAX_CHARACTER
+# is a StartAfter past all keys starting with branch.
+MAX_CHARACTER = "\U0010ffff"
+# Digits read past where a page's keys start to differ, to cut page-sized
+# parts of the keyspace finely enough.
+EXTRA_DIGITS = 3
+# Entries of the bounded delimiter listing used to discover prefixes.
+DISCOVERY_KEYS = 1000
+# Shards planned per worker, so uneven shards still keep every worker busy;
+# also the shards per worker an ordered listing runs ahead of the consumer.
+SHARDS_PER_WORKER = 4
+
+
+class _Shard:
+    __slots__ = (
+        "prefix",
+        "start_after",
+        "last_key",
+        "objects",
+        "position",
+        "pages",
+        "done",
+        "children",
+        "head_length",
+    )
+
+    def __init__(
+        self,
+        prefix: str,
+        start_after: Optional[str] = None,
+        last_key: Optional[str] = None,
+        objects: Optional[List[S3Object]] = None,
+    ):
+        """
+        Keys under prefix after start_after, up to and including last_key,
+        or a run of objects that planning has already listed.
+        """
+        self.prefix = prefix
+        self.start_after = start_after
+        self.last_key = last_key
+        self.objects = objects
+        # Where the shard starts; shards never overlap, so this orders them.
+        self.position = objects[0].key if objects else start_after or prefix
+        self.pages: Deque[List[S3Object]] = deque()
+        self.done = False
+        # Shards split off the end of this one, in key order.
+        self.children: List["_Shard"] = []
+        # Without a last_key: how long a head all keys after start_after
+        # are known to share with it.
+        self.head_length = len(prefix)
+
+
+class ShardedS3Repository(DelegatingS3Repository):
+    def __init__(
+        self,
+        repository: S3Repository,
+        max_workers: int = 16,
+        ordered: bool = True,
+        delimiter: str = "/",
+        max_depth: int = 2,
+        prefetch_pages: int = 2,
+    ):
+        """
+        Repository decorator listing objects as concurrent keyspace shards.
+
+        Every ListObjectsV2 page needs the previous page's continuation
+        token, so a plain listing is one sequential stream. Here the
+        keyspace is first split into the CommonPrefixes of a bounded
+        delimiter listing, descending up to max_depth levels while there
+        are too few of them. A pool of max_workers threads then lists the
+        shards a page at a time, continuing each one with StartAfter, and
+        whenever workers are idle, a shard hands the end of its range to new
+        shards, sized by how much of the keyspace its last page covered.
+
+        With ordered, objects come out in key order like a plain listing.
+        Workers take the shards closest to the consumer first, only the
+        first max_workers * SHARDS_PER_WORKER unfinished shards are listed,
+        and each buffers at most prefetch_pages pages. Unordered yields pages
+        as soon as any shard has one, with at most max_workers *
+        prefetch_pages pages buffered.
+
+        :param repository: Repository listing the individual shards
+        :param max_workers: Pages requested at the same time
+        :param ordered: Yield objects in key order
+        :param delimiter: Separator used to discover prefixes
+        :param max_depth: Prefix levels descended to find enough shards
+        :param prefetch_pages: Pages buffered per shard (ordered) or worker
+        """
+        super().__init__(repository)
+        self.max_workers = max_workers
+        self.ordered = ordered
+        self.delimiter = delimiter
+        self.max_depth = max_depth
+        self.prefetch_pages = prefetch_pages
+
+    def list_objects(self, bucket_name: str) -> List[S3Object]:
+        return list(self.iter_objects(bucket_name))
+
+    def iter_objects(
+        self,
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        start_after: Optional[str] = None,
+        page_size: int = 1000,
+    ) -> Iterator[S3Object]:
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="s3-shard"
+        )
+        listing = _ShardListing(self, bucket_name, page_size)
+        try:
+            if start_after:
+                shards = [_Shard(prefix or "", start_after)]
+            else:
+                shards = self._plan(executor, bucket_name, prefix or "")
+                shards.sort(key=lambda shard: shard.position)
+            yield from listing.run(executor, shards)
+        finally:
+            # Also reached when the consumer stops early: stop the workers.
+            listing.close()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _plan(
+        self, executor: ThreadPoolExecutor, bucket_name: str, prefix: str
+    ) -> List[_Shard]:
+        target = self.max_workers * SHARDS_PER_WORKER
+        shards = []
+        pending = [prefix]
+        for depth in range(self.max_depth + 1):
+            # Delimiter listings leave out the key equal to their prefix
+            # (a folder marker), so it is looked up on the side.
+            markers = {
+                level: executor.submit(self._first_object, bucket_name, level)
+                for level in pending
+                if level
+            }
+            found = []
+            for level, listing in zip(
+                pending,
+                executor.map(
+                    lambda level: self._discover(bucket_name, level), pending
+                ),
+            ):
+                if listing is None:
+                    shards.append(_Shard(level))
+                    continue
+                marker = markers[level].result() if level else None
+                if marker is not None and marker.key == level:
+                    shards.append(_Shard(level, objects=[marker]))
+                # Objects of the level sort between its prefixes: each is a run.
+                shards.extend(_Shard(level, objects=[obj]) for obj in listing.objects)
+                found.extend(listing.prefixes)
+            if len(found) + len(shards) >= target or depth == self.max_depth:
+                shards.extend(_Shard(sub_prefix) for sub_prefix in found)
+                break
+            if not found:
+                break
+            pending = found
+        return shards
+
+    def _discover(
+        self, bucket_name: str, prefix: str
+    ) -> Optional[S3DirectoryListing]:
+        """
+        One level below prefix, or None when it is too wide to list this
+        way; such a level becomes one shard, which splits once it runs.
+        """
+        level = self.repository.list_directory(
+            bucket_name, prefix, self.delimiter, DISCOVERY_KEYS
+        )
+        # The folder marker object is not returned, hence the - 1.
+        if len(level.prefixes) + len(level.objects) >= DISCOVERY_KEYS - 1:
+            return None
+        return level
+
+    def _split(
+        self, bucket_name: str, shard: _Shard, page: List[S3Object], count: int
+    ) -> List[_Shard]:
+        """
+        Up to count shards taking over the end of the range of shard.
+
+        Keys are read as numbers (see _Keyspace), and the first and last
+        key of page show how much of that number line a page covers. An
+        ordered listing splits off max_workers ranges of about
+        prefetch_pages pages, so workers fill the buffers the consumer
+        reaches next; an unordered one divides the rest of the range evenly
+        among count shards, which needs to know where the range ends.
+        """
+        first, after = page[0].key, page[-1].key
+        if self.ordered:
+            count = self.max_workers
+        if shard.last_key is None:
+            head_length = shard.head_length
+            if not self.ordered:
+                head_length = self._divergence(
+                    bucket_name, shard.prefix, after, head_length
+                )
+                shard.head_length = head_length
+        else:
+            head_length = len(os.path.commonprefix([after, shard.last_key]))
+        shared = len(os.path.commonprefix([first, after]))
+        base = after[: min(head_length, shared)]
+        characters = {c for obj in page for c in obj.key[len(base) :]}
+        characters.update((shard.last_key or "")[len(base) :])
+        if len(characters) < 2:
+            return []
+        keyspace = _Keyspace(
+            base, characters, max(head_length, shared) - len(base) + EXTRA_DIGITS
+        )
+        low = keyspace.value(after)
+        if shard.last_key is None:
+            # Every key after after starts with its head.
+            high = keyspace.value(after[:head_length]) + keyspace.span(head_length)
+        else:
+            high = keyspace.value(shard.last_key)
+        step = max(low - keyspace.value(first), 1) * self.prefetch_pages
+        if not self.ordered:
+            step = max(step, (high - low) // (count + 1))
+        points = []
+        for value in range(low + step, high, step)[:count]:
+            point = keyspace.key(value)
+            if point > (points[-1] if points else after) and (
+                shard.last_key is None or point < shard.last_key
+            ):
+                points.append(point)
+        if not points:
+            return []
+        # The shard itself carries on up to the first point.
+        children = [
+            _Shard(shard.prefix, start_after, last_key)
+            for start_after, last_key in zip(points, points[1:] + [shard.last_key])
+        ]
+        children[-1].head_length = shard.head_length
+        shard.last_key = points[0]
+        return children
+
+    def _divergence(
+        self, bucket_name: str, prefix: str, after: str, known_length: int
+    ) -> int:
+        """
+        Length of the head that all keys after the key after share with it,
+        known to be at least known_length.
+
+        A binary search over the branches of after, probing for the first
+        key beyond each one; a key found also shows every branch deeper
+        than where it differs from after has keys beyond it. The known head
+        is probed first, as it usually still holds for a later key.
+        """
+        low, high = known_length, len(after)
+        middle = low
+        while low < high:
+            beyond = self._first_object(
+                bucket_name, prefix, after[: middle + 1] + MAX_CHARACTER
+            )
+            if beyond is None:
+                low = middle + 1
+            else:
+                high = min(middle, len(os.path.commonprefix([after, beyond.key])))
+            middle = (low + high) // 2
+        return low
+
+    def _first_object(
+        self, bucket_name: str, prefix: str, start_after: Optional[str] = None
+    ) -> Optional[S3Object]:
+        objects = self.repository.iter_objects(
+            bucket_name, prefix=prefix or None, start_after=start_after, page_size=1
+        )
+        try:
+            return next(iter(objects), None)
+        finally:
+            _close(objects)
+
+
+class _ShardListing:
+    def __init__(
+        self, sharded: ShardedS3Repository, bucket_name: str, page_size: int
+    ):
+        """
+        One run of ShardedS3Repository.iter_objects: the shards, the pool
+        workers requesting their pages and the consumer taking them.
+
+        A shard is runnable, being listed by a worker, parked because it may
+        not buffer more pages, or done. All state is guarded by one lock;
+        workers wait on runnable shards and the consumer on pages.
+        """
+        self.sharded = sharded
+        self.bucket_name = bucket_name
+        self.page_size = page_size
+        lock = threading.Lock()
+        self.work = threading.Condition(lock)
+        self.delivered = threading.Condition(lock)
+        self.runnable: List[Tuple[str, int, _Shard]] = []
+        self.parked: List[_Shard] = []
+        # Positions of the shards not done yet, in key order.
+        self.unfinished: List[str] = []
+        # Pages of an unordered listing; ordered ones queue per shard.
+        self.ready: Deque[List[S3Object]] = deque()
+        self.idle = 0
+        self.sequence = itertools.count()
+        self.error: Optional[BaseException] = None
+        self.closed = False
+
+    def run(
+        self, executor: ThreadPoolExecutor, shards: List[_Shard]
+    ) -> Iterator[S3Object]:
+        with self.work:
+            for shard in shards:
+                if shard.objects is None:
+                    self._add(shard)
+        for _ in range(self.sharded.max_workers):
+            executor.submit(self._work)
+        if self.sharded.ordered:
+            yield from self._drain(shards)
+            return
+        for shard in shards:
+            if shard.objects is not None:
+                yield from shard.objects
+        while True:
+            with self.delivered:
+                while not self.ready and self.unfinished and self.error is None:
+                    self.delivered.wait()
+                if self.error is not None:
+                    raise self.error
+                if not self.ready:
+                    return
+                page = self.ready.popleft()
+                self._unpark()
+            yield from page
+
+    def close(self) -> None:
+        with self.work:
+            self.closed = True
+            self.work.notify_all()
+
+    def _drain(self, shards: List[_Shard]) -> Iterator[S3Object]:
+        """
+        Objects of shards and of the shards split off them, in key order.
+
+        A shard's children follow it and precede its next sibling, so they
+        go on top of a stack of pending shards once the shard is done; a
+        chain of splits can be far deeper than the recursion limit.
+        """
+        pending = list(reversed(shards))
+        while pending:
+            shard = pending.pop()
+            if shard.objects is not None:
+                yield from shard.objects
+                continue
+            while True:
+                with self.delivered:
+                    while not shard.pages and not shard.done and self.error is None:
+                        self.delivered.wait()
+                    if self.error is not None:
+                        raise self.error
+                    if not shard.pages:
+                        # Done: no more children are split off it.
+                        pending.extend(reversed(shard.children))
+                        break
+                    page = shard.pages.popleft()
+                    self._unpark()
+                yield from page
+
+    def _work(self) -> None:
+        while True:
+            with self.work:
+                while not self.runnable and self._listing():
+                    self.idle += 1
+                    self.work.wait()
+                    self.idle -= 1
+                if not self._listing():
+                    return
+                shard = heapq.heappop(self.runnable)[-1]
+            try:
+                page, done = self._fetch(shard)
+                with self.work:
+                    if page:
+                        pages = shard.pages if self.sharded.ordered else self.ready
+                        pages.append(page)
+                        self.delivered.notify()
+                    if done:
+                        self._finish(shard)
+                        continue
+                    idle = 0 if self.runnable else self.idle
+                children = []
+                if idle:
+                    children = self.sharded._split(
+                        self.bucket_name, shard, page, idle
+                    )
+            except BaseException as e:
+                with self.work:
+                    self.error = e
+                    self.work.notify_all()
+                    self.delivered.notify()
+                return
+            with self.work:
+                shard.children[:0] = children
+                for child in children:
+                    self._add(child)
+                if self._may_run(shard):
+                    self._schedule(shard)
+                else:
+                    self.parked.append(shard)
+
+    def _fetch(self, shard: _Shard) -> Tuple[List[S3Object], bool]:
+        """The next page of shard, and whether the shard is done."""
+        objects = self.sharded.repository.iter_objects(
+            self.bucket_name,
+            prefix=shard.prefix or None,
+            start_after=shard.start_after,
+            page_size=self.page_size,
+        )
+        try:
+            page = list(islice(objects, self.page_size))
+        finally:
+            _close(objects)
+        done = len(page) < self.page_size
+        if shard.last_key is not None and page and page[-1].key >= shard.last_key:
+            page = [obj for obj in page if obj.key <= shard.last_key]
+            done = True
+        if page:
+            shard.start_after = page[-1].key
+        return page, done
+
+    def _listing(self) -> bool:
+        return not self.closed and self.error is None and bool(self.unfinished)
+
+    def _add(self, shard: _Shard) -> None:
+        insort(self.unfinished, shard.position)
+        self._schedule(shard)
+
+    def _schedule(self, shard: _Shard) -> None:
+        heapq.heappush(self.runnable, (shard.position, next(self.sequence), shard))
+        self.work.notify()
+
+    def _may_run(self, shard: _Shard) -> bool:
+        sharded = self.sharded
+        if not sharded.ordered:
+            return len(self.ready) < sharded.max_workers * sharded.prefetch_pages
+        # The shard the consumer waits for comes first, so it always may run.
+        return (
+            len(shard.pages) < sharded.prefetch_pages
+            and bisect_left(self.unfinished, shard.position)
+            < sharded.max_workers * SHARDS_PER_WORKER
+        )
+
+    def _unpark(self) -> None:
+        for shard in [shard for shard in self.parked if self._may_run(shard)]:
+            self.parked.remove(shard)
+            self._schedule(shard)
+
+    def _finish(self, shard: _Shard) -> None:
+        shard.done = True
+        del self.unfinished[bisect_left(self.unfinished, shard.position)]
+        self._unpark()
+        self.delivered.notify()
+        if not self.unfinished:
+            self.work.notify_all()
+
+
+class _Keyspace:
+    def __init__(self, base: str, characters: Iterable[str], digits: int):
+        """
+        Keys starting with base as numbers: the characters after base are
+        digits, valued by their rank among characters (S3 sorts keys by
+        character), and the first digits of them are read.
+
+        Numbers keep the order of the keys, so a range of keys can be cut
+        into parts of a given size; characters not among characters count
+        as the closest one that is.
+        """
+        self.base = base
+        self.alphabet = sorted(characters)
+        self.digits = digits
+
+    def value(self, key: str) -> int:
+        radix = len(self.alphabet)
+        suffix = key[len(self.base) : len(self.base) + self.digits]
+        value = 0
+        for c in suffix:
+            value = value * radix + min(bisect_left(self.alphabet, c), radix - 1)
+        return value * radix ** (self.digits - len(suffix))
+
+    def key(self, value: int) -> str:
+        radix = len(self.alphabet)
+        characters = []
+        for _ in range(self.digits):
+            value, digit = divmod(value, radix)
+            characters.append(self.alphabet[digit])
+        return self.base + "".join(reversed(characters))
+
+    def span(self, length: int) -> int:
+        """How many numbers the keys sharing their first length characters span."""
+        return len(self.alphabet) ** (self.digits - (length - len(self.base)))
+
+
+def _close(objects) -> None:
+    close = getattr(objects, "close", None)
+    if close is not None:
+        close()
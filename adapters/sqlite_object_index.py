@@ -0,0 +1,464 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional, Tuple
+from domain.entities.s3_object import S3Object
+from domain.entities.s3_directory_listing import S3DirectoryListing
+
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.expanduser("~"), ".s3explorer", "index.sqlite3"
+)
+SORT_COLUMNS = {"key": "key", "size": "size", "last_modified": "last_modified"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    bucket TEXT NOT NULL,
+    key TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_modified REAL NOT NULL,
+    etag TEXT,
+    generation INTEGER NOT NULL,
+    PRIMARY KEY (bucket, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS objects_size ON objects (bucket, size);
+CREATE INDEX IF NOT EXISTS objects_last_modified ON objects (bucket, last_modified);
+CREATE TABLE IF NOT EXISTS listings (
+    bucket TEXT NOT NULL,
+    prefix TEXT NOT NULL,
+    generation INTEGER NOT NULL,
+    last_key TEXT,
+    complete INTEGER NOT NULL DEFAULT 0,
+    refreshed_at REAL,
+    PRIMARY KEY (bucket, prefix)
+);
+CREATE TABLE IF NOT EXISTS refreshes (
+    bucket TEXT NOT NULL,
+    prefix TEXT NOT NULL,
+    generation INTEGER NOT NULL,
+    last_key TEXT,
+    PRIMARY KEY (bucket, prefix)
+);
+INSERT OR IGNORE INTO refreshes (bucket, prefix, generation, last_key)
+    SELECT bucket, prefix, generation, last_key FROM listings WHERE complete = 0;
+DELETE FROM listings WHERE complete = 0;
+"""
+
+
+class SqliteObjectIndex:
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, batch_size: int = 1000):
+        """
+        Local SQLite index of object metadata per bucket.
+
+        Listings are written in batches as they stream in. Each (bucket,
+        prefix) listing records the last key it committed, so an
+        interrupted build can resume with StartAfter. A completed listing
+        drops index rows that it did not see again.
+
+        Every fill writes a new generation. The previous complete listing
+        keeps answering until the new one finishes and takes its place,
+        so an abandoned or running refresh never hides it, and rows are
+        never set back to an older generation when two fills race. A fill
+        records nothing until its first batch is written or its listing
+        ends, so a listing abandoned early (a lookup reading one key)
+        leaves no unfinished refresh behind.
+
+        :param path: SQLite database file, created if missing
+        :param batch_size: Objects written per transaction while filling
+        """
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        # Highest generation handed out, as a fill's generation is only
+        # stored with its first batch.
+        self._generation = 0
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(_SCHEMA)
+
+    def fill(
+        self,
+        bucket_name: str,
+        prefix: str,
+        objects: Iterable[S3Object],
+        resume: bool = False,
+    ) -> Iterator[S3Object]:
+        """
+        Pass a streamed listing through while writing it to the index.
+
+        With resume, objects are expected to start after the last key
+        committed by an earlier, unfinished fill of the same prefix.
+        """
+        prefix = prefix or ""
+        # Taken before listing, so fills are ordered by when they started.
+        generation = self._begin(bucket_name, prefix, resume)
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                self._write_batch(bucket_name, prefix, generation, batch)
+                batch = []
+            yield obj
+        self._write_batch(bucket_name, prefix, generation, batch)
+        self._finish(bucket_name, prefix, generation)
+
+    def generation(self) -> int:
+        """
+        The latest generation: a listing with a higher one started after
+        this call, so it saw every write made before it.
+        """
+        with self._lock:
+            return max(self._stored_generation(), self._generation)
+
+    def complete_listings(self, bucket_name: str) -> List[Tuple[str, int]]:
+        """Prefix and generation of the complete listings of bucket_name."""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT prefix, generation FROM listings "
+                "WHERE bucket = ? AND complete = 1",
+                (bucket_name,),
+            ).fetchall()
+
+    def resume_key(self, bucket_name: str, prefix: str = "") -> Optional[str]:
+        """Last key committed by an unfinished fill, if there is one."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT last_key FROM refreshes WHERE bucket = ? AND prefix = ?",
+                (bucket_name, prefix or ""),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def is_fresh(
+        self, bucket_name: str, prefix: str = "", max_age: float = 300
+    ) -> bool:
+        return self._covering_listing(bucket_name, prefix or "", max_age) is not None
+
+    def has_listing(self, bucket_name: str, prefix: str = "") -> bool:
+        return self._covering_listing(bucket_name, prefix or "", None) is not None
+
+    def invalidate(self, bucket_name: str, object_key: Optional[str] = None) -> None:
+        """Mark listings that cover object_key (or the whole bucket) stale."""
+        with self._lock, self._connection:
+            for (prefix,) in self._connection.execute(
+                "SELECT prefix FROM listings WHERE bucket = ?", (bucket_name,)
+            ).fetchall():
+                if object_key is None or object_key.startswith(prefix):
+                    self._connection.execute(
+                        "UPDATE listings SET refreshed_at = NULL "
+                        "WHERE bucket = ? AND prefix = ?",
+                        (bucket_name, prefix),
+                    )
+
+    def remove(self, bucket_name: str, object_keys: Iterable[str]) -> None:
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "DELETE FROM objects WHERE bucket = ? AND key = ?",
+                ((bucket_name, key) for key in object_keys),
+            )
+
+    def drop_bucket(self, bucket_name: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM objects WHERE bucket = ?", (bucket_name,)
+            )
+            self._connection.execute(
+                "DELETE FROM listings WHERE bucket = ?", (bucket_name,)
+            )
+            self._connection.execute(
+                "DELETE FROM refreshes WHERE bucket = ?", (bucket_name,)
+            )
+
+    def iter_objects(
+        self,
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        start_after: Optional[str] = None,
+    ) -> Iterator[S3Object]:
+        return self.query(bucket_name, prefix=prefix, start_after=start_after)
+
+    def iter_directory(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        page_size: int = 1000,
+    ) -> Iterator[S3DirectoryListing]:
+        """
+        One level below prefix, a page of page_size entries at a time, as
+        S3 answers a Delimiter listing. Reading skips past each common
+        prefix in one query, however many keys it holds.
+        """
+        prefix = prefix or ""
+        where, params = self._where(bucket_name, prefix)
+        sql = (
+            "SELECT key, size, last_modified, etag FROM objects WHERE "
+            + where
+            + " AND key >= ? ORDER BY key LIMIT ?"
+        )
+        # The first key not looked at yet.
+        cursor = prefix
+        prefixes: List[str] = []
+        objects: List[S3Object] = []
+        yielded = False
+        while cursor is not None:
+            with self._lock:
+                rows = self._connection.execute(
+                    sql, params + [cursor, self.batch_size]
+                ).fetchall()
+            cursor = None
+            for key, size, last_modified, etag in rows:
+                if len(prefixes) + len(objects) >= page_size:
+                    yield S3DirectoryListing(prefix, prefixes, objects)
+                    yielded = True
+                    prefixes, objects = [], []
+                cut = key.find(delimiter, len(prefix)) if delimiter else -1
+                if cut >= 0:
+                    common = key[: cut + len(delimiter)]
+                    prefixes.append(common)
+                    cursor = _successor(common)
+                    break
+                if key != prefix:  # The "folder" marker object itself.
+                    objects.append(
+                        S3Object(key, size, _to_datetime(last_modified), etag)
+                    )
+            else:
+                if len(rows) == self.batch_size:
+                    cursor = rows[-1][0] + "\0"
+        if prefixes or objects or not yielded:
+            yield S3DirectoryListing(prefix, prefixes, objects)
+
+    def query(
+        self,
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        start_after: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        modified_after: Optional[datetime] = None,
+        modified_before: Optional[datetime] = None,
+        order_by: str = "key",
+        descending: bool = False,
+        limit: Optional[int] = None,
+    ) -> Iterator[S3Object]:
+        where, params = self._where(
+            bucket_name,
+            prefix,
+            start_after,
+            min_size,
+            max_size,
+            modified_after,
+            modified_before,
+        )
+        sql = (
+            "SELECT key, size, last_modified, etag FROM objects WHERE "
+            + where
+            + f" ORDER BY {SORT_COLUMNS[order_by]} {'DESC' if descending else 'ASC'}"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        for key, size, last_modified, etag in self._read(sql, params):
+            yield S3Object(key, size, _to_datetime(last_modified), etag)
+
+    def count(
+        self,
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        modified_after: Optional[datetime] = None,
+        modified_before: Optional[datetime] = None,
+    ) -> Tuple[int, int]:
+        """Number of matching objects and their total size."""
+        where, params = self._where(
+            bucket_name,
+            prefix,
+            None,
+            min_size,
+            max_size,
+            modified_after,
+            modified_before,
+        )
+        with self._lock:
+            count, total = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM objects WHERE " + where,
+                params,
+            ).fetchone()
+        return count, total
+
+    def _read(self, sql: str, params: list) -> Iterator[tuple]:
+        if self.path == ":memory:":
+            with self._lock:
+                rows = self._connection.execute(sql, params).fetchall()
+            yield from rows
+            return
+        # A private connection lets long reads stream page by page without
+        # holding the writer lock; WAL keeps them from blocking fills.
+        connection = sqlite3.connect(self.path)
+        try:
+            cursor = connection.execute(sql, params)
+            while page := cursor.fetchmany(self.batch_size):
+                yield from page
+        finally:
+            connection.close()
+
+    def _begin(self, bucket_name: str, prefix: str, resume: bool) -> int:
+        with self._lock:
+            if resume:
+                row = self._connection.execute(
+                    "SELECT generation FROM refreshes "
+                    "WHERE bucket = ? AND prefix = ?",
+                    (bucket_name, prefix),
+                ).fetchone()
+                if row is not None:
+                    return row[0]
+            # Generations are global so refreshing a sub-prefix also
+            # supersedes rows written by a listing of a parent prefix.
+            # The complete listing, if any, stays as it is until _finish.
+            self._generation = max(self._stored_generation(), self._generation) + 1
+            return self._generation
+
+    def _stored_generation(self) -> int:
+        (generation,) = self._connection.execute(
+            "SELECT MAX(COALESCE((SELECT MAX(generation) FROM listings), 0), "
+            "COALESCE((SELECT MAX(generation) FROM refreshes), 0))"
+        ).fetchone()
+        return generation
+
+    def _write_batch(
+        self, bucket_name: str, prefix: str, generation: int, batch: List[S3Object]
+    ) -> None:
+        if not batch:
+            return
+        with self._lock, self._connection:
+            # A fill that started earlier must not set back rows a later
+            # one has written; its _finish would then delete them.
+            self._connection.executemany(
+                "INSERT INTO objects "
+                "(bucket, key, size, last_modified, etag, generation) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (bucket, key) DO UPDATE SET "
+                "size = excluded.size, last_modified = excluded.last_modified, "
+                "etag = excluded.etag, generation = excluded.generation "
+                "WHERE excluded.generation >= objects.generation",
+                (
+                    (
+                        bucket_name,
+                        obj.key,
+                        obj.size,
+                        _to_timestamp(obj.last_modified),
+                        obj.etag,
+                        generation,
+                    )
+                    for obj in batch
+                ),
+            )
+            # The refresh is recorded with its first batch; a later fill
+            # of the same prefix owns the row once it has written.
+            self._connection.execute(
+                "INSERT INTO refreshes (bucket, prefix, generation, last_key) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (bucket, prefix) DO UPDATE SET "
+                "generation = excluded.generation, last_key = excluded.last_key "
+                "WHERE excluded.generation >= refreshes.generation",
+                (bucket_name, prefix, generation, batch[-1].key),
+            )
+
+    def _finish(self, bucket_name: str, prefix: str, generation: int) -> None:
+        where, params = self._where(bucket_name, prefix)
+        with self._lock, self._connection:
+            # Rows under this prefix that the listing did not touch are gone.
+            self._connection.execute(
+                f"DELETE FROM objects WHERE {where} AND generation < ?",
+                params + [generation],
+            )
+            # Also the row of an earlier, abandoned fill: this one is newer.
+            self._connection.execute(
+                "DELETE FROM refreshes "
+                "WHERE bucket = ? AND prefix = ? AND generation <= ?",
+                (bucket_name, prefix, generation),
+            )
+            # Swap in this listing, unless a later fill already finished.
+            row = self._connection.execute(
+                "SELECT generation FROM listings WHERE bucket = ? AND prefix = ?",
+                (bucket_name, prefix),
+            ).fetchone()
+            if row is None or row[0] < generation:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO listings "
+                    "(bucket, prefix, generation, last_key, complete, refreshed_at) "
+                    "VALUES (?, ?, ?, NULL, 1, ?)",
+                    (bucket_name, prefix, generation, time.time()),
+                )
+
+    def _covering_listing(
+        self, bucket_name: str, prefix: str, max_age: Optional[float]
+    ) -> Optional[str]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT prefix, refreshed_at FROM listings "
+                "WHERE bucket = ? AND complete = 1",
+                (bucket_name,),
+            ).fetchall()
+        for listing_prefix, refreshed_at in rows:
+            if not prefix.startswith(listing_prefix):
+                continue
+            if max_age is None or (
+                refreshed_at is not None and time.time() - refreshed_at <= max_age
+            ):
+                return listing_prefix
+        return None
+
+    @staticmethod
+    def _where(
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        start_after: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        modified_after: Optional[datetime] = None,
+        modified_before: Optional[datetime] = None,
+    ) -> Tuple[str, list]:
+        clauses = ["bucket = ?"]
+        params = [bucket_name]
+        if prefix:
+            # A key range instead of LIKE so the primary key index is used.
+            clauses.append("key >= ? AND key < ?")
+            params += [prefix, _successor(prefix)]
+        if start_after:
+            clauses.append("key > ?")
+            params.append(start_after)
+        if min_size is not None:
+            clauses.append("size >= ?")
+            params.append(min_size)
+        if max_size is not None:
+            clauses.append("size <= ?")
+            params.append(max_size)
+        if modified_after is not None:
+            clauses.append("last_modified >= ?")
+            params.append(_to_timestamp(modified_after))
+        if modified_before is not None:
+            clauses.append("last_modified < ?")
+            params.append(_to_timestamp(modified_before))
+        return " AND ".join(clauses), params
+
+
+def _successor(prefix: str) -> str:
+    """The first string after every string starting with prefix."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _to_timestamp(value) -> float:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return float(value)
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
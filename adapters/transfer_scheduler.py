@@ -0,0 +1,358 @@
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+from botocore.exceptions import ClientError, ConnectionError, HTTPClientError
+
+T = TypeVar("T")
+
+# Lanes, most urgent first: requests a user waits for go ahead of bulk work.
+INTERACTIVE = 0
+BULK = 1
+
+# Requests of uploads, downloads, deletes and copies; the client's other
+# calls (listings, presigning...) are not scheduled.
+SCHEDULED_OPERATIONS = frozenset(
+    {
+        "put_object",
+        "get_object",
+        "head_object",
+        "copy_object",
+        "delete_object",
+        "delete_objects",
+        "create_multipart_upload",
+        "upload_part",
+        "upload_part_copy",
+        "complete_multipart_upload",
+        "abort_multipart_upload",
+    }
+)
+# Error codes of S3 and S3-compatible stores shedding load.
+THROTTLING_CODES = frozenset(
+    {
+        "SlowDown",
+        "Throttling",
+        "ThrottlingException",
+        "RequestThrottled",
+        "RequestLimitExceeded",
+        "TooManyRequests",
+        "TooManyRequestsException",
+        "ServiceUnavailable",
+    }
+)
+TRANSIENT_CODES = frozenset(
+    {"InternalError", "RequestTimeout", "RequestTimeoutException", "BadGateway"}
+)
+THROTTLING_STATUSES = frozenset({429, 503})
+TRANSIENT_STATUSES = frozenset({500, 502, 504})
+
+
+class _Bucket:
+    __slots__ = ("limit", "in_flight", "waiting", "decreased_at")
+
+    def __init__(self, limit: float):
+        self.limit = limit
+        self.in_flight = 0
+        # (lane, sequence) of the requests waiting for a slot.
+        self.waiting: List[Tuple[int, int]] = []
+        self.decreased_at = 0.0
+
+
+class TransferScheduler:
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 128,
+        max_bytes_per_second: float = 0,
+        max_attempts: int = 8,
+        base_delay: float = 0.05,
+        max_delay: float = 20.0,
+        decrease: float = 0.7,
+    ):
+        """
+        Admission control shared by every S3 request of a process.
+
+        Each bucket has a concurrency limit that adapts AIMD-style: it
+        grows by one per limit successful requests while it is the
+        bottleneck, and is cut by decrease when the store throttles (at
+        most once per round of requests, as those in flight saw the old
+        limit). Requests beyond the limit wait, interactive ones ahead of
+        bulk ones. Throttled and transient failures are retried after a
+        jittered exponential delay, and bodies are paced so the process
+        sends and receives at most max_bytes_per_second (0: no cap).
+
+        :param initial_limit: Concurrency a bucket starts with
+        :param min_limit: Lowest concurrency a bucket is cut to
+        :param max_limit: Highest concurrency a bucket grows to
+        :param max_bytes_per_second: Cap on request and response bodies
+        :param max_attempts: Attempts per request, including the first
+        :param base_delay: Upper bound of the first retry delay in seconds
+        :param max_delay: Upper bound of any retry delay in seconds
+        :param decrease: Factor applied to the limit on throttling
+        """
+        self.initial_limit = initial_limit
+        self.min_limit = max(min_limit, 1)
+        self.max_limit = max(max_limit, self.min_limit)
+        self.max_bytes_per_second = max_bytes_per_second
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.decrease = decrease
+        self.throttles = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+        self._admitted = threading.Condition(self._lock)
+        self._buckets: Dict[str, _Bucket] = {}
+        self._sequence = itertools.count()
+        self._next_send = 0.0
+
+    def run(
+        self,
+        bucket_name: str,
+        lane: int,
+        request: Callable[[], T],
+        size: int = 0,
+        rewind: Optional[Callable[[], None]] = None,
+    ) -> T:
+        """
+        The result of request, sent once bucket_name has a free slot.
+
+        size is the request body length to pace; rewind, if given, resets
+        the body before a retry. Raises the last error when it is not
+        retryable or max_attempts are used up.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            self.pace(size)
+            started = self._acquire(bucket_name, lane)
+            try:
+                result = request()
+            except Exception as e:
+                throttled = is_throttling(e)
+                self._release(bucket_name, started, False, throttled)
+                if attempt == self.max_attempts or not (
+                    throttled or is_transient(e)
+                ):
+                    raise
+                delay = self.retry_delay(attempt)
+                logging.info(
+                    f"Retrying S3 request to {bucket_name} in {delay:.2f}s "
+                    f"(attempt {attempt + 1}/{self.max_attempts}): {e}"
+                )
+                with self._lock:
+                    self.retries += 1
+                time.sleep(delay)
+                if rewind is not None:
+                    rewind()
+                continue
+            self._release(bucket_name, started, True, False)
+            return result
+
+    def retry_delay(self, attempt: int) -> float:
+        """Seconds to wait before the attempt after attempt."""
+        # Full jitter: spreads the retries of requests that failed together
+        # instead of sending them back together.
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def retry_later(
+        self, bucket_name: str, attempt: int, started: float, throttled: bool
+    ) -> None:
+        """
+        Wait before resending what a successful request failed in part,
+        like keys a DeleteObjects answer lists as throttled one by one.
+
+        started is when the request was sent (time.monotonic()); with
+        throttled the bucket's limit is cut as for a throttled request.
+        """
+        with self._lock:
+            self.retries += 1
+            bucket = self._buckets.get(bucket_name)
+            if throttled and bucket is not None:
+                self._throttled(bucket, started)
+        time.sleep(self.retry_delay(attempt))
+
+    def pace(self, size: int) -> None:
+        """Wait until size more bytes fit under max_bytes_per_second."""
+        rate = self.max_bytes_per_second
+        if not rate or size <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_send)
+            self._next_send = start + size / rate
+        if start > now:
+            time.sleep(start - now)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "throttles": self.throttles,
+                "retries": self.retries,
+                "buckets": {
+                    name: {
+                        "limit": round(bucket.limit, 1),
+                        "in_flight": bucket.in_flight,
+                        "waiting": len(bucket.waiting),
+                    }
+                    for name, bucket in self._buckets.items()
+                },
+            }
+
+    def _acquire(self, bucket_name: str, lane: int) -> float:
+        with self._lock:
+            bucket = self._buckets.get(bucket_name)
+            if bucket is None:
+                bucket = self._buckets[bucket_name] = _Bucket(
+                    min(max(self.initial_limit, self.min_limit), self.max_limit)
+                )
+            ticket = (lane, next(self._sequence))
+            heapq.heappush(bucket.waiting, ticket)
+            while bucket.waiting[0] != ticket or bucket.in_flight >= int(
+                bucket.limit
+            ):
+                self._admitted.wait()
+            heapq.heappop(bucket.waiting)
+            bucket.in_flight += 1
+            if bucket.waiting:
+                # The next in line may fit as well.
+                self._admitted.notify_all()
+            return time.monotonic()
+
+    def _release(
+        self, bucket_name: str, started: float, succeeded: bool, throttled: bool
+    ) -> None:
+        with self._lock:
+            bucket = self._buckets[bucket_name]
+            saturated = bucket.in_flight >= int(bucket.limit)
+            bucket.in_flight -= 1
+            if throttled:
+                self._throttled(bucket, started)
+            elif succeeded and saturated:
+                # A limit that is not reached says nothing about the store.
+                bucket.limit = min(self.max_limit, bucket.limit + 1 / bucket.limit)
+            self._admitted.notify_all()
+
+    def _throttled(self, bucket: _Bucket, started: float) -> None:
+        self.throttles += 1
+        if started > bucket.decreased_at:
+            bucket.limit = max(self.min_limit, bucket.limit * self.decrease)
+            bucket.decreased_at = time.monotonic()
+
+
+class ScheduledS3Client:
+    def __init__(
+        self,
+        s3_client,
+        scheduler: TransferScheduler,
+        lane: int = INTERACTIVE,
+        transfer_client=None,
+    ):
+        """
+        botocore S3 client whose SCHEDULED_OPERATIONS run through
+        scheduler; everything else goes straight to s3_client.
+
+        :param s3_client: Client for the calls that are not scheduled
+        :param scheduler: Scheduler admitting and retrying the requests
+        :param lane: Lane of this client's requests (INTERACTIVE or BULK)
+        :param transfer_client: Client sending the scheduled requests,
+            best one without botocore retries so the scheduler sees every
+            throttled attempt (default: s3_client)
+        """
+        self.s3_client = s3_client
+        self.scheduler = scheduler
+        self.lane = lane
+        self.transfer_client = transfer_client or s3_client
+
+    @property
+    def clients(self) -> Tuple:
+        """The botocore clients behind this one, e.g. to install hooks."""
+        if self.transfer_client is self.s3_client:
+            return (self.s3_client,)
+        return self.s3_client, self.transfer_client
+
+    def __getattr__(self, name: str):
+        if name not in SCHEDULED_OPERATIONS:
+            return getattr(self.s3_client, name)
+        method = partial(self._request, name)
+        setattr(self, name, method)
+        return method
+
+    def _request(self, operation: str, **params):
+        body = params.get("Body")
+        rewind = None
+        if hasattr(body, "seek") and hasattr(body, "tell"):
+            rewind = partial(body.seek, body.tell())
+        response = self.scheduler.run(
+            params.get("Bucket", ""),
+            self.lane,
+            partial(getattr(self.transfer_client, operation), **params),
+            _body_size(body),
+            rewind,
+        )
+        if operation == "get_object" and self.scheduler.max_bytes_per_second:
+            # The body is read after the slot is freed, so it is paced as
+            # it is read.
+            response["Body"] = _PacedBody(response["Body"], self.scheduler)
+        return response
+
+
+class _PacedBody:
+    def __init__(self, body, scheduler: TransferScheduler):
+        self._body = body
+        self._scheduler = scheduler
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        data = self._body.read(amt)
+        self._scheduler.pace(len(data))
+        return data
+
+    def iter_chunks(self, chunk_size: int = 1024):
+        while chunk := self.read(chunk_size):
+            yield chunk
+
+    def __getattr__(self, name: str):
+        return getattr(self._body, name)
+
+
+def is_throttling(error: BaseException) -> bool:
+    if not isinstance(error, ClientError):
+        return False
+    code, status = _error_code(error)
+    return code in THROTTLING_CODES or status in THROTTLING_STATUSES
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether error is worth retrying: throttling, 5xx or connection errors."""
+    if isinstance(error, (ConnectionError, HTTPClientError)):
+        return True
+    if not isinstance(error, ClientError):
+        return False
+    code, status = _error_code(error)
+    if code in TRANSIENT_CODES or status in TRANSIENT_STATUSES:
+        return True
+    return is_throttling(error)
+
+
+def _error_code(error: ClientError) -> Tuple[Optional[str], Optional[int]]:
+    response = error.response or {}
+    return (
+        response.get("Error", {}).get("Code"),
+        response.get("ResponseMetadata", {}).get("HTTPStatusCode"),
+    )
+
+
+def _body_size(body) -> int:
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        return len(body)
+    try:
+        return os.fstat(body.fileno()).st_size - body.tell()
+    except (AttributeError, OSError, ValueError):
+        return 0
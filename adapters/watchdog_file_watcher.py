@@ -0,0 +1,43 @@
+from typing import Callable, Optional
+
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+from domain.interfaces.file_watcher import FileWatcher
+
+# Events that do not change a file's content.
+IGNORED_EVENTS = ("opened", "closed_no_write")
+
+
+class _CallbackHandler(FileSystemEventHandler):
+    def __init__(self, callback: Callable[[str, bool], None]):
+        self.callback = callback
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.event_type in IGNORED_EVENTS:
+            return
+        # A directory's mtime changes with its entries, which have events of
+        # their own.
+        if event.is_directory and event.event_type == "modified":
+            return
+        self.callback(event.src_path, event.is_directory)
+        dest_path = getattr(event, "dest_path", "")
+        if dest_path:
+            self.callback(dest_path, event.is_directory)
+
+
+class WatchdogFileWatcher(FileWatcher):
+    def __init__(self):
+        """FileWatcher on watchdog's native observer (inotify, FSEvents...)."""
+        self.observer: Optional[Observer] = None
+
+    def start(self, directory: str, callback: Callable[[str, bool], None]) -> None:
+        self.observer = Observer()
+        self.observer.schedule(_CallbackHandler(callback), directory, recursive=True)
+        self.observer.start()
+
+    def stop(self) -> None:
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+            self.observer = None
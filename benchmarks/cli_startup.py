@@ -0,0 +1,97 @@
+"""
+Cold-start time of the CLI, checked against a budget.
+
+    python -m benchmarks.cli_startup --budget-ms 150
+    python -m benchmarks.cli_startup --cli-args "list-objects --help"
+
+Runs `python -X importtime main.py <cli-args>` in fresh interpreters. It
+reports the median wall time and the slowest imports, and exits non-zero
+when the median is over budget or a heavy module gets imported.
+"""
+import argparse
+import json
+import os
+import shlex
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+HEAVY_MODULES = ("boto3", "botocore", "flet", "fastapi", "starlette", "numpy")
+
+
+def run_once(cli_args: List[str]) -> Tuple[float, str]:
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", MAIN, *cli_args],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    if completed.returncode != 0:
+        raise SystemExit(f"main.py {' '.join(cli_args)} failed:\n{completed.stderr}")
+    return elapsed, completed.stderr
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int]]:
+    """(module, cumulative microseconds) for every import, slowest first."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        imports.append((module.rstrip(), int(cumulative)))
+    return sorted(imports, key=lambda item: item[1], reverse=True)
+
+
+def run(cli_args: List[str], runs: int, budget_ms: float) -> dict:
+    run_once(cli_args)  # Warm up the bytecode caches.
+    timings = []
+    imports = []
+    for _ in range(runs):
+        elapsed, stderr = run_once(cli_args)
+        timings.append(elapsed)
+        imports = parse_importtime(stderr)
+    heavy = sorted(
+        {
+            module.strip()
+            for module, _ in imports
+            if module.strip().split(".")[0] in HEAVY_MODULES
+        }
+    )
+    median = statistics.median(timings)
+    return {
+        "command": ["main.py", *cli_args],
+        "runs": runs,
+        "median_ms": round(median, 1),
+        "min_ms": round(min(timings), 1),
+        "budget_ms": budget_ms,
+        "heavy_imports": heavy,
+        "slowest_imports": [
+            {"module": module.strip(), "cumulative_ms": round(us / 1000, 1)}
+            for module, us in imports
+            if not module.startswith("  ")
+        ][:15],
+        "passed": median <= budget_ms and not heavy,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cli-args", default="--help", help="Arguments for main.py")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=150)
+    args = parser.parse_args()
+    report = run(shlex.split(args.cli_args), args.runs, args.budget_ms)
+    print(json.dumps(report, indent=2))
+    if not report["passed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
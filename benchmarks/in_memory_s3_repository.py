@@ -0,0 +1,623 @@
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from botocore.exceptions import ClientError
+
+from domain.interfaces.s3_repository import S3Repository
+from domain.entities.s3_bucket import S3Bucket
+from domain.entities.s3_object import S3Object
+from domain.entities.s3_directory_listing import S3DirectoryListing
+from domain.entities.s3_object_stream import (
+    STREAM_CHUNK_SIZE,
+    S3ObjectStream,
+    resolve_byte_range,
+)
+
+DELETE_BATCH_SIZE = 1000
+LIST_PAGE_SIZE = 1000
+CHUNK_SIZE = 1024 * 1024
+
+
+class _StoredObject:
+    __slots__ = ("size", "last_modified", "etag", "data")
+
+    def __init__(self, size: int, etag: str, data: Optional[bytes]):
+        self.size = size
+        self.last_modified = datetime.now(timezone.utc)
+        self.etag = etag
+        self.data = data
+
+
+class InMemoryS3Repository(S3Repository):
+    def __init__(
+        self,
+        latency: float = 0.0,
+        page_latency: Optional[float] = None,
+        throttle_rate: float = 0.0,
+        keep_data: bool = False,
+        seed: Optional[int] = None,
+    ):
+        """
+        S3Repository kept in process memory, for benchmarks.
+
+        Every simulated request sleeps for latency seconds (listing pages
+        for page_latency when given). A throttle_rate fraction of requests
+        fail with a SlowDown ClientError, which is handled like the boto3
+        adapter handles it. Object bodies are only kept with keep_data;
+        otherwise reads return zero bytes of the recorded size.
+
+        :param latency: Seconds added to every request
+        :param page_latency: Seconds added per listing page (default: latency)
+        :param throttle_rate: Probability that a request is throttled
+        :param keep_data: Store uploaded bytes instead of only their size
+        :param seed: Seed for the throttling random generator
+        """
+        self.latency = latency
+        self.page_latency = latency if page_latency is None else page_latency
+        self.throttle_rate = throttle_rate
+        self.keep_data = keep_data
+        self.requests = 0
+        self.throttled = 0
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._buckets: Dict[str, datetime] = {}
+        self._objects: Dict[str, Dict[str, _StoredObject]] = {}
+        self._keys: Dict[str, List[str]] = {}
+        self._uploads: Dict[str, Dict[int, bytes]] = {}
+
+    def seed_objects(self, bucket_name: str, keys: Iterable[str], size: int = 0):
+        """Create objects directly, without simulated latency."""
+        with self._lock:
+            self._ensure_bucket(bucket_name)
+            objects = self._objects[bucket_name]
+            for key in keys:
+                objects[key] = _StoredObject(size, '"seed"', None)
+            self._keys[bucket_name] = sorted(objects)
+
+    def list_buckets(self) -> List[S3Bucket]:
+        try:
+            self._request("ListBuckets")
+            with self._lock:
+                return [S3Bucket(name, date) for name, date in self._buckets.items()]
+        except ClientError as e:
+            logging.error(f"Error listing buckets: {e}")
+            return []
+
+    def create_bucket(self, bucket_name: str) -> bool:
+        try:
+            self._request("CreateBucket")
+            with self._lock:
+                self._ensure_bucket(bucket_name)
+            return True
+        except ClientError as e:
+            logging.error(f"Error creating bucket: {e}")
+            return False
+
+    def delete_bucket(self, bucket_name: str) -> bool:
+        try:
+            self._request("DeleteBucket")
+            with self._lock:
+                if self._keys.get(bucket_name):
+                    raise _error("BucketNotEmpty", "DeleteBucket")
+                self._buckets.pop(bucket_name, None)
+                self._objects.pop(bucket_name, None)
+                self._keys.pop(bucket_name, None)
+            return True
+        except ClientError as e:
+            logging.error(f"Error deleting bucket {bucket_name}: {e}")
+            return False
+
+    def list_objects(self, bucket_name: str) -> List[S3Object]:
+        return list(self.iter_objects(bucket_name))
+
+    def iter_objects(
+        self,
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        start_after: Optional[str] = None,
+        page_size: int = 1000,
+    ) -> Iterator[S3Object]:
+        prefix = prefix or ""
+        marker = start_after if start_after and start_after >= prefix else None
+        try:
+            while True:
+                self._request("ListObjectsV2", self.page_latency)
+                with self._lock:
+                    keys = self._keys.get(bucket_name, [])
+                    if marker is None:
+                        position = bisect_left(keys, prefix)
+                    else:
+                        position = bisect_right(keys, marker)
+                    page = [
+                        (key, self._objects[bucket_name][key])
+                        for key in islice(keys, position, position + page_size)
+                        if key.startswith(prefix)
+                    ]
+                for key, stored in page:
+                    yield S3Object(key, stored.size, stored.last_modified, stored.etag)
+                if len(page) < page_size:
+                    return
+                marker = page[-1][0]
+        except ClientError as e:
+            logging.error(f"Error listing objects in {bucket_name}: {e}")
+
+    def list_directory(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        max_keys: Optional[int] = None,
+    ) -> S3DirectoryListing:
+        # Like S3, a common prefix is skipped over in one step no matter how
+        # many keys it holds, and every 1000 entries cost one page request.
+        prefix = prefix or ""
+        prefixes = []
+        objects = []
+        try:
+            self._request("ListObjectsV2", self.page_latency)
+            with self._lock:
+                keys = self._keys.get(bucket_name, [])
+                position = bisect_left(keys, prefix)
+                while position < len(keys) and keys[position].startswith(prefix):
+                    if max_keys and len(prefixes) + len(objects) >= max_keys:
+                        break
+                    key = keys[position]
+                    cut = key.find(delimiter, len(prefix))
+                    if cut < 0:
+                        if key != prefix:
+                            stored = self._objects[bucket_name][key]
+                            objects.append(
+                                S3Object(
+                                    key, stored.size, stored.last_modified, stored.etag
+                                )
+                            )
+                        position += 1
+                        continue
+                    common = key[: cut + len(delimiter)]
+                    prefixes.append(common)
+                    position = bisect_left(keys, _successor(common), position)
+            for _ in range((len(prefixes) + len(objects) - 1) // LIST_PAGE_SIZE):
+                self._request("ListObjectsV2", self.page_latency)
+        except ClientError as e:
+            logging.error(f"Error listing {prefix or '/'} in {bucket_name}: {e}")
+        return S3DirectoryListing(prefix, prefixes, objects)
+
+    def iter_directory(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        page_size: int = LIST_PAGE_SIZE,
+    ) -> Iterator[S3DirectoryListing]:
+        prefix = prefix or ""
+        # The first key not returned yet, like S3's continuation token.
+        after = prefix
+        try:
+            while after is not None:
+                self._request("ListObjectsV2", self.page_latency)
+                prefixes = []
+                objects = []
+                with self._lock:
+                    keys = self._keys.get(bucket_name, [])
+                    position = bisect_left(keys, after)
+                    after = None
+                    while position < len(keys) and keys[position].startswith(prefix):
+                        if len(prefixes) + len(objects) >= page_size:
+                            after = keys[position]
+                            break
+                        key = keys[position]
+                        cut = key.find(delimiter, len(prefix))
+                        if cut < 0:
+                            if key != prefix:
+                                stored = self._objects[bucket_name][key]
+                                objects.append(
+                                    S3Object(
+                                        key,
+                                        stored.size,
+                                        stored.last_modified,
+                                        stored.etag,
+                                    )
+                                )
+                            position += 1
+                            continue
+                        common = key[: cut + len(delimiter)]
+                        prefixes.append(common)
+                        position = bisect_left(keys, _successor(common), position)
+                yield S3DirectoryListing(prefix, prefixes, objects)
+        except ClientError as e:
+            logging.error(f"Error listing {prefix or '/'} in {bucket_name}: {e}")
+
+    def put_object(
+        self,
+        bucket_name: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        object_key: Optional[str] = None,
+    ) -> bool:
+        try:
+            self._request("PutObject")
+            digest = hashlib.md5()
+            chunks = []
+            size = 0
+            with open(file_path, "rb") as file_data:
+                for chunk in iter(lambda: file_data.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    if self.keep_data:
+                        chunks.append(chunk)
+                    if progress_callback:
+                        progress_callback(len(chunk))
+            stored = _StoredObject(
+                size,
+                f'"{digest.hexdigest()}"',
+                b"".join(chunks) if self.keep_data else None,
+            )
+            with self._lock:
+                self._store(
+                    bucket_name, object_key or os.path.basename(file_path), stored
+                )
+            return True
+        except (ClientError, OSError) as e:
+            logging.error(f"Error uploading object {file_path}: {e}")
+            return False
+
+    def get_object(self, bucket_name: str, object_key: str) -> Optional[bytes]:
+        try:
+            self._request("GetObject")
+            stored = self._find(bucket_name, object_key, "GetObject")
+            return stored.data if stored.data is not None else bytes(stored.size)
+        except ClientError as e:
+            logging.error(f"Error reading object {object_key} from {bucket_name}: {e}")
+            return None
+
+    def head_object(self, bucket_name: str, object_key: str) -> Optional[S3Object]:
+        self._request("HeadObject")
+        try:
+            stored = self._find(bucket_name, object_key, "HeadObject")
+        except ClientError as e:
+            logging.error(f"Error reading object {object_key} from {bucket_name}: {e}")
+            return None
+        return S3Object(object_key, stored.size, stored.last_modified, stored.etag)
+
+    def open_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        byte_range: Optional[str] = None,
+        if_none_match: Optional[str] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Optional[S3ObjectStream]:
+        self._request("GetObject")
+        try:
+            stored = self._find(bucket_name, object_key, "GetObject")
+        except ClientError as e:
+            logging.error(f"Error reading object {object_key} from {bucket_name}: {e}")
+            return None
+        if if_none_match and stored.etag in (if_none_match, "*"):
+            return S3ObjectStream(
+                304, etag=stored.etag, last_modified=stored.last_modified
+            )
+        try:
+            selected = resolve_byte_range(byte_range, stored.size)
+        except ValueError:
+            return S3ObjectStream(416, size=stored.size)
+        start, end = selected if selected else (0, stored.size - 1)
+
+        def chunks():
+            for offset in range(start, end + 1, chunk_size):
+                length = min(chunk_size, end + 1 - offset)
+                if stored.data is None:
+                    yield bytes(length)
+                else:
+                    yield stored.data[offset : offset + length]
+
+        return S3ObjectStream(
+            206 if selected else 200,
+            size=stored.size,
+            content_length=end + 1 - start,
+            content_range=selected and f"bytes {start}-{end}/{stored.size}",
+            etag=stored.etag,
+            last_modified=stored.last_modified,
+            content_type="binary/octet-stream",
+            chunks=chunks(),
+        )
+
+    def download_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> bool:
+        data = self.get_object(bucket_name, object_key)
+        if data is None:
+            return False
+        with open(file_path, "wb") as file_data:
+            file_data.write(data)
+        if progress_callback:
+            progress_callback(len(data))
+        return True
+
+    def put_object_bytes(self, bucket_name: str, object_key: str, data: bytes) -> bool:
+        try:
+            self._request("PutObject")
+            stored = _StoredObject(
+                len(data),
+                f'"{hashlib.md5(data).hexdigest()}"',
+                data if self.keep_data else None,
+            )
+            with self._lock:
+                self._store(bucket_name, object_key, stored)
+            return True
+        except ClientError as e:
+            logging.error(f"Error uploading object {object_key}: {e}")
+            return False
+
+    def create_multipart_upload(
+        self, bucket_name: str, object_key: str
+    ) -> Optional[str]:
+        try:
+            self._request("CreateMultipartUpload")
+            upload_id = uuid.uuid4().hex
+            with self._lock:
+                self._uploads[upload_id] = {}
+            return upload_id
+        except ClientError as e:
+            logging.error(f"Error starting multipart upload of {object_key}: {e}")
+            return None
+
+    def upload_part(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_number: int,
+        data: bytes,
+    ) -> Optional[str]:
+        try:
+            self._request("UploadPart")
+            with self._lock:
+                parts = self._uploads[upload_id]
+                parts[part_number] = data if self.keep_data else len(data)
+            return f'"{hashlib.md5(data).hexdigest()}"'
+        except (ClientError, KeyError) as e:
+            logging.error(f"Error uploading part {part_number} of {object_key}: {e}")
+            return None
+
+    def complete_multipart_upload(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        parts: List[Dict],
+    ) -> bool:
+        try:
+            self._request("CompleteMultipartUpload")
+            with self._lock:
+                uploaded = self._uploads.pop(upload_id)
+                pieces = [uploaded[part["PartNumber"]] for part in parts]
+                if self.keep_data:
+                    data = b"".join(pieces)
+                    size = len(data)
+                else:
+                    data, size = None, sum(pieces)
+                stored = _StoredObject(size, f'"{upload_id}-{len(parts)}"', data)
+                self._store(bucket_name, object_key, stored)
+            return True
+        except (ClientError, KeyError) as e:
+            logging.error(f"Error completing multipart upload of {object_key}: {e}")
+            return False
+
+    def abort_multipart_upload(
+        self, bucket_name: str, object_key: str, upload_id: str
+    ) -> bool:
+        with self._lock:
+            self._uploads.pop(upload_id, None)
+        return True
+
+    def generate_presigned_url(
+        self,
+        bucket_name: str,
+        file_name: str,
+        expiration=3600,
+        client_method: str = "put_object",
+    ) -> str:
+        return (
+            f"memory://{bucket_name}/{file_name}"
+            f"?method={client_method}&expires={int(expiration)}"
+        )
+
+    def generate_presigned_urls(
+        self,
+        bucket_name: str,
+        object_keys: Iterable[str],
+        expiration=3600,
+        client_method: str = "put_object",
+    ) -> Dict[str, str]:
+        return {
+            object_key: self.generate_presigned_url(
+                bucket_name, object_key, expiration, client_method
+            )
+            for object_key in object_keys
+        }
+
+    def generate_presigned_part_urls(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_numbers: Iterable[int],
+        expiration=3600,
+    ) -> Dict[int, str]:
+        return {
+            part_number: (
+                f"memory://{bucket_name}/{object_key}?uploadId={upload_id}"
+                f"&partNumber={part_number}&expires={int(expiration)}"
+            )
+            for part_number in part_numbers
+        }
+
+    def list_parts(
+        self, bucket_name: str, object_key: str, upload_id: str
+    ) -> Optional[List[Dict]]:
+        try:
+            self._request("ListParts")
+            with self._lock:
+                uploaded = dict(self._uploads[upload_id])
+        except (ClientError, KeyError) as e:
+            logging.error(f"Error listing parts of {object_key}: {e}")
+            return None
+        parts = []
+        for part_number, piece in sorted(uploaded.items()):
+            size = piece if isinstance(piece, int) else len(piece)
+            parts.append(
+                {
+                    "PartNumber": part_number,
+                    "ETag": f'"{upload_id}-{part_number}"',
+                    "Size": size,
+                }
+            )
+        return parts
+
+    def delete_object(self, bucket_name: str, object_key: str) -> bool:
+        try:
+            self._request("DeleteObject")
+            with self._lock:
+                self._discard(bucket_name, object_key)
+            return True
+        except ClientError as e:
+            logging.error(f"Error deleting object {object_key} from {bucket_name}: {e}")
+            return False
+
+    def delete_objects(self, bucket_name: str, object_keys: Iterable[str]) -> int:
+        keys = iter(object_keys)
+        deleted = 0
+        while batch := list(islice(keys, DELETE_BATCH_SIZE)):
+            try:
+                self._request("DeleteObjects")
+                with self._lock:
+                    for key in batch:
+                        self._discard(bucket_name, key)
+                deleted += len(batch)
+            except ClientError as e:
+                logging.error(
+                    f"Error deleting {len(batch)} objects from {bucket_name}: {e}"
+                )
+        return deleted
+
+    def copy_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        destination_key: str,
+        destination_bucket: Optional[str] = None,
+    ) -> bool:
+        try:
+            self._request("CopyObject")
+            stored = self._find(bucket_name, object_key, "CopyObject")
+            copy = _StoredObject(stored.size, stored.etag, stored.data)
+            with self._lock:
+                self._store(destination_bucket or bucket_name, destination_key, copy)
+            return True
+        except ClientError as e:
+            logging.error(f"Error copying {object_key} to {destination_key}: {e}")
+            return False
+
+    def move_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        destination_key: str,
+        destination_bucket: Optional[str] = None,
+    ) -> bool:
+        if ((destination_bucket or bucket_name), destination_key) == (
+            bucket_name,
+            object_key,
+        ):
+            return True
+        return self.copy_object(
+            bucket_name, object_key, destination_key, destination_bucket
+        ) and self.delete_object(bucket_name, object_key)
+
+    def move_prefix(
+        self,
+        bucket_name: str,
+        prefix: str,
+        destination_prefix: str,
+        destination_bucket: Optional[str] = None,
+    ) -> int:
+        if (destination_bucket or bucket_name) == bucket_name:
+            if destination_prefix == prefix:
+                return 0
+            if destination_prefix.startswith(prefix):
+                raise ValueError(
+                    "The destination must not be inside the source prefix"
+                )
+        copied = [
+            obj.key
+            for obj in list(self.iter_objects(bucket_name, prefix=prefix))
+            if self.copy_object(
+                bucket_name,
+                obj.key,
+                destination_prefix + obj.key[len(prefix) :],
+                destination_bucket,
+            )
+        ]
+        return self.delete_objects(bucket_name, copied)
+
+    def _request(self, operation: str, latency: Optional[float] = None) -> None:
+        with self._lock:
+            self.requests += 1
+            throttled = self._random.random() < self.throttle_rate
+            if throttled:
+                self.throttled += 1
+        latency = self.latency if latency is None else latency
+        if latency:
+            time.sleep(latency)
+        if throttled:
+            raise _error("SlowDown", operation)
+
+    def _ensure_bucket(self, bucket_name: str) -> None:
+        if bucket_name not in self._buckets:
+            self._buckets[bucket_name] = datetime.now(timezone.utc)
+            self._objects[bucket_name] = {}
+            self._keys[bucket_name] = []
+
+    def _find(self, bucket_name: str, object_key: str, operation: str) -> _StoredObject:
+        with self._lock:
+            stored = self._objects.get(bucket_name, {}).get(object_key)
+        if stored is None:
+            raise _error("NoSuchKey", operation)
+        return stored
+
+    def _store(self, bucket_name: str, object_key: str, stored: _StoredObject) -> None:
+        if bucket_name not in self._buckets:
+            raise _error("NoSuchBucket", "PutObject")
+        objects = self._objects[bucket_name]
+        if object_key not in objects:
+            insort(self._keys[bucket_name], object_key)
+        objects[object_key] = stored
+
+    def _discard(self, bucket_name: str, object_key: str) -> None:
+        objects = self._objects.get(bucket_name, {})
+        if objects.pop(object_key, None) is not None:
+            keys = self._keys[bucket_name]
+            del keys[bisect_right(keys, object_key) - 1]
+
+
+def _successor(prefix: str) -> str:
+    """Smallest string greater than every key starting with prefix."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _error(code: str, operation: str) -> ClientError:
+    return ClientError({"Error": {"Code": code, "Message": code}}, operation)
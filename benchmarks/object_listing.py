@@ -0,0 +1,91 @@
+"""
+Memory and speed of ObjectListing against a plain List[S3Object].
+
+    python -m benchmarks.object_listing --objects 1000000
+"""
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from domain.entities.object_listing import ObjectListing, np
+from domain.entities.s3_object import S3Object
+
+
+def synthetic_objects(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    for i in range(count):
+        yield S3Object(
+            f"logs/{i % 97:02d}/{i // 97:08d}-{rng.getrandbits(32):08x}.json.gz",
+            rng.randrange(0, 64 * 1024 * 1024),
+            start + timedelta(seconds=rng.randrange(0, 4 * 365 * 86400)),
+        )
+
+
+def measure_memory(build) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    container = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return container, current
+
+
+def timed(func) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def run(count: int) -> dict:
+    objects, list_bytes = measure_memory(lambda: list(synthetic_objects(count)))
+    listing, listing_bytes = measure_memory(
+        lambda: ObjectListing.from_objects(synthetic_objects(count))
+    )
+    cutoff = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    min_size = 32 * 1024 * 1024
+    return {
+        "objects": count,
+        "numpy": np is not None,
+        "bytes_per_object": {
+            "list": round(list_bytes / count, 1),
+            "object_listing": round(listing_bytes / count, 1),
+        },
+        "seconds": {
+            "sort_by_size": {
+                "list": timed(lambda: sorted(objects, key=lambda o: o.size)),
+                "object_listing": timed(lambda: listing.sort("size")),
+            },
+            "filter_size_and_date": {
+                "list": timed(
+                    lambda: [
+                        o
+                        for o in objects
+                        if o.size >= min_size and o.last_modified >= cutoff
+                    ]
+                ),
+                "object_listing": timed(
+                    lambda: listing.filter(min_size=min_size, modified_after=cutoff)
+                ),
+            },
+            "total_size": {
+                "list": timed(lambda: sum(o.size for o in objects)),
+                "object_listing": timed(listing.total_size),
+            },
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--objects", type=int, default=1_000_000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.objects), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+"""
+Throughput, latency percentiles and peak RSS of the project's hot paths.
+
+    python -m benchmarks.runner --target memory --latency-ms 20 --objects 100000
+    docker compose up -d
+    python -m benchmarks.runner --target localstack --label v0.2 --output v0.2.json
+
+The memory target runs on InMemoryS3Repository, which adds per-request
+latency and SlowDown throttling. The localstack target runs the same
+scenarios on Boto3S3Repository against the docker-compose endpoint, in a
+temporary bucket that is removed afterwards.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+from domain.interfaces.s3_repository import S3Repository
+from domain.use_cases.bucket_use_cases import BucketUseCases
+from domain.use_cases.object_use_cases import ObjectUseCases
+from domain.use_cases.async_bucket_use_cases import AsyncBucketUseCases
+from domain.use_cases.async_object_use_cases import AsyncObjectUseCases
+from adapters.executor_async_s3_repository import ExecutorAsyncS3Repository
+from adapters.multipart_upload import MB
+from benchmarks.in_memory_s3_repository import InMemoryS3Repository
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class PeakRssSampler:
+    def __init__(self, interval: float = 0.005):
+        """
+        Samples the resident set size on a background thread.
+
+        ru_maxrss only ever grows for the whole process, so on Linux the
+        peak of each scenario is sampled from /proc/self/statm instead.
+        """
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self) -> "PeakRssSampler":
+        self.peak = current_rss()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+
+def current_rss() -> int:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        if resource is None:
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS.
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.items = 0
+        self.bytes = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def call(self, func: Callable, *args, items: int = 1, size: int = 0, **kwargs):
+        """Time one operation; False or None results count as errors."""
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.add(time.perf_counter() - started, result, items, size)
+        return result
+
+    async def call_async(self, coroutine, items: int = 1, size: int = 0):
+        started = time.perf_counter()
+        result = await coroutine
+        self.add(time.perf_counter() - started, result, items, size)
+        return result
+
+    def add(self, seconds: float, result, items: int, size: int) -> None:
+        with self._lock:
+            self.latencies.append(seconds)
+            if result is False or result is None:
+                self.errors += 1
+            else:
+                self.items += items
+                self.bytes += size
+
+    def summary(self, elapsed: float, peak_rss: int) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "operations": len(latencies),
+            "errors": self.errors,
+            "items": self.items,
+            "seconds": round(elapsed, 4),
+            "operations_per_second": _rate(len(latencies), elapsed),
+            "items_per_second": _rate(self.items, elapsed),
+            "mb_per_second": _rate(self.bytes / MB, elapsed),
+            "latency_ms": {
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "p99": _percentile(latencies, 99),
+                "max": _percentile(latencies, 100),
+            },
+            "peak_rss_mb": round(peak_rss / MB, 1),
+        }
+
+
+class Context:
+    def __init__(self, repository: S3Repository, bucket_name: str, args, workdir):
+        self.repository = repository
+        self.bucket_name = bucket_name
+        self.args = args
+        self.workdir = workdir
+        self.bucket_use_cases = BucketUseCases(repository)
+        self.object_use_cases = ObjectUseCases(repository)
+
+    def seed(self, prefix: str, count: int, size: int = 0) -> None:
+        keys = (f"{prefix}{i:09d}" for i in range(count))
+        if isinstance(self.repository, InMemoryS3Repository):
+            self.repository.seed_objects(self.bucket_name, keys, size)
+            return
+        data = bytes(size)
+        with ThreadPoolExecutor(max_workers=self.args.concurrency) as executor:
+            for _ in executor.map(
+                lambda key: self.repository.put_object_bytes(
+                    self.bucket_name, key, data
+                ),
+                keys,
+            ):
+                pass
+
+    def write_file(self, name: str, size: int) -> str:
+        path = os.path.join(self.workdir, name)
+        chunk = os.urandom(min(size, MB))
+        with open(path, "wb") as file_data:
+            remaining = size
+            while remaining > 0:
+                file_data.write(chunk[:remaining])
+                remaining -= len(chunk)
+        return path
+
+
+def scenario_bucket_operations(context: Context, recorder: Recorder) -> None:
+    use_cases = context.bucket_use_cases
+    for _ in range(context.args.repeat):
+        name = f"{context.bucket_name}-{uuid.uuid4().hex[:8]}"
+        recorder.call(use_cases.create_bucket, name)
+        recorder.call(use_cases.get_buckets)
+        recorder.call(use_cases.delete_bucket, name)
+
+
+def scenario_list_objects(context: Context, recorder: Recorder) -> None:
+    context.seed("list/", context.args.objects)
+    for _ in range(context.args.repeat):
+        recorder.call(
+            _count,
+            context.object_use_cases.get_objects(context.bucket_name, prefix="list/"),
+            items=context.args.objects,
+        )
+
+
+def scenario_upload_small(context: Context, recorder: Recorder) -> None:
+    size = context.args.small_kb * 1024
+    path = context.write_file("small.bin", size)
+    with ThreadPoolExecutor(max_workers=context.args.concurrency) as executor:
+        for i in range(context.args.small_files):
+            executor.submit(
+                recorder.call,
+                context.object_use_cases.put_object,
+                context.bucket_name,
+                path,
+                object_key=f"small/{i:06d}",
+                size=size,
+            )
+
+
+def scenario_upload_large(context: Context, recorder: Recorder) -> None:
+    size = context.args.large_mb * MB
+    path = context.write_file("large.bin", size)
+    recorder.call(
+        context.object_use_cases.put_object,
+        context.bucket_name,
+        path,
+        object_key="large/object.bin",
+        size=size,
+    )
+
+
+def scenario_bulk_delete(context: Context, recorder: Recorder) -> None:
+    context.seed("delete/", context.args.objects)
+    deleted = recorder.call(
+        context.object_use_cases.delete_prefix, context.bucket_name, "delete/", items=0
+    )
+    recorder.items += deleted or 0
+
+
+def scenario_api_list(context: Context, recorder: Recorder) -> None:
+    count = context.args.api_objects
+    context.seed("api/", count)
+
+    async def request(client):
+        response = await client.get(
+            f"/buckets/{context.bucket_name}", params={"prefix": "api/"}
+        )
+        return response.status_code == 200 or None
+
+    _run_api(context, recorder, request, context.args.api_requests, items=count)
+
+
+def scenario_api_stream_upload(context: Context, recorder: Recorder) -> None:
+    size = context.args.stream_mb * MB
+    chunk = os.urandom(MB)
+
+    async def body():
+        for _ in range(context.args.stream_mb):
+            yield chunk
+
+    async def request(client):
+        response = await client.put(
+            f"/buckets/{context.bucket_name}/objects/stream/object.bin",
+            content=body(),
+        )
+        return response.status_code == 200 and response.json()["result"] or None
+
+    _run_api(context, recorder, request, 1, size=size)
+
+
+def scenario_cli_list(context: Context, recorder: Recorder) -> None:
+    from click.testing import CliRunner
+    from presentation import click_cli
+
+    count = context.args.cli_objects
+    context.seed("cli/", count)
+    runner = CliRunner()
+    arguments = ["list-objects", "--bucket", context.bucket_name, "--prefix", "cli/"]
+    with patched(click_cli, services=click_cli.CliServices(context.repository)):
+        for _ in range(context.args.repeat):
+            recorder.call(
+                lambda: runner.invoke(click_cli.cli, arguments).exit_code == 0 or None,
+                items=count,
+            )
+
+
+SCENARIOS: Dict[str, Callable[[Context, Recorder], None]] = {
+    "bucket_operations": scenario_bucket_operations,
+    "list_objects": scenario_list_objects,
+    "upload_small": scenario_upload_small,
+    "upload_large": scenario_upload_large,
+    "bulk_delete": scenario_bulk_delete,
+    "api_list": scenario_api_list,
+    "api_stream_upload": scenario_api_stream_upload,
+    "cli_list": scenario_cli_list,
+}
+
+
+def _run_api(
+    context: Context,
+    recorder: Recorder,
+    request: Callable,
+    count: int,
+    items: int = 1,
+    size: int = 0,
+) -> None:
+    import httpx
+    from presentation import api
+
+    async_repository = ExecutorAsyncS3Repository(
+        context.repository, max_workers=context.args.concurrency
+    )
+
+    async def run():
+        limit = asyncio.Semaphore(context.args.concurrency)
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark", timeout=None
+        ) as client:
+
+            async def send():
+                async with limit:
+                    await recorder.call_async(request(client), items, size)
+
+            await asyncio.gather(*(send() for _ in range(count)))
+
+    with patched(
+        api,
+        repository=async_repository,
+        object_use_cases=AsyncObjectUseCases(async_repository),
+        bucket_use_cases=AsyncBucketUseCases(async_repository),
+    ):
+        asyncio.run(run())
+
+
+@contextmanager
+def patched(module, **values):
+    """Swap module globals (the presentation layers' use cases) temporarily."""
+    originals = {name: getattr(module, name) for name in values}
+    for name, value in values.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in originals.items():
+            setattr(module, name, value)
+
+
+def create_repository(args) -> S3Repository:
+    if args.target == "localstack":
+        from adapters.boto3_s3_repository import Boto3S3Repository
+
+        return Boto3S3Repository()
+    return InMemoryS3Repository(
+        latency=args.latency_ms / 1000,
+        page_latency=(
+            None if args.page_latency_ms is None else args.page_latency_ms / 1000
+        ),
+        throttle_rate=args.throttle_rate,
+        seed=0,
+    )
+
+
+def run(args) -> dict:
+    repository = create_repository(args)
+    bucket_use_cases = BucketUseCases(repository)
+    bucket_name = f"bench-{uuid.uuid4().hex[:12]}"
+    if not bucket_use_cases.create_bucket(bucket_name):
+        raise SystemExit(f"Could not create benchmark bucket '{bucket_name}'")
+
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory(prefix="s3-benchmark-") as workdir:
+            context = Context(repository, bucket_name, args, workdir)
+            for name in args.scenario or SCENARIOS:
+                recorder = Recorder()
+                with PeakRssSampler() as sampler:
+                    started = time.perf_counter()
+                    SCENARIOS[name](context, recorder)
+                    elapsed = time.perf_counter() - started
+                results[name] = recorder.summary(elapsed, sampler.peak)
+                print(f"{name}: {json.dumps(results[name])}", file=sys.stderr)
+    finally:
+        bucket_use_cases.delete_bucket(bucket_name, force=True)
+
+    report = {
+        "label": args.label,
+        "target": args.target,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            key: value for key, value in vars(args).items() if key != "output"
+        },
+        "scenarios": results,
+    }
+    if isinstance(repository, InMemoryS3Repository):
+        report["requests"] = repository.requests
+        report["throttled"] = repository.throttled
+    return report
+
+
+def main(argv: Optional[Iterable[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target", choices=("memory", "localstack"), default="memory")
+    parser.add_argument(
+        "--label", default="dev", help="Name of this run, e.g. a release"
+    )
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="Run only this scenario (repeatable)",
+    )
+    parser.add_argument("--objects", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--small-files", type=int, default=500)
+    parser.add_argument("--small-kb", type=int, default=16)
+    parser.add_argument("--large-mb", type=int, default=256)
+    parser.add_argument("--stream-mb", type=int, default=256)
+    parser.add_argument("--api-objects", type=int, default=5_000)
+    parser.add_argument("--api-requests", type=int, default=200)
+    parser.add_argument("--cli-objects", type=int, default=10_000)
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="Fake latency per request"
+    )
+    parser.add_argument(
+        "--page-latency-ms", type=float, help="Fake latency per listing page"
+    )
+    parser.add_argument(
+        "--throttle-rate", type=float, default=0.0, help="Fraction of fake SlowDowns"
+    )
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+    print(text)
+
+
+def _count(objects) -> int:
+    return sum(1 for _ in objects)
+
+
+def _rate(amount: float, seconds: float) -> float:
+    return round(amount / seconds, 2) if seconds else 0.0
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * percentile / 100))
+    return round(sorted_values[index] * 1000, 3)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Speedup of ShardedS3Repository over a sequential listing.
+
+    python -m benchmarks.sharded_listing --objects 200000 --page-latency-ms 50
+    python -m benchmarks.sharded_listing --workers 1 4 16 64 --layout hashed
+
+Lists the same keys from InMemoryS3Repository, where every listing page
+costs page_latency like a ListObjectsV2 round trip, once sequentially and
+then sharded (ordered and unordered) at each worker count. It checks every
+sharded listing returns exactly the sequential keys, and reports the
+speedup and the parallel efficiency (speedup / workers).
+"""
+import argparse
+import hashlib
+import json
+import time
+from typing import Dict, Iterator, List
+
+from adapters.sharded_s3_repository import ShardedS3Repository
+from benchmarks.in_memory_s3_repository import InMemoryS3Repository
+
+LAYOUTS = ("hierarchical", "hashed", "sequential")
+BUCKET = "benchmark"
+
+
+def layout_keys(layout: str, count: int) -> Iterator[str]:
+    for i in range(count):
+        if layout == "hierarchical":
+            yield f"logs/{i % 24:02d}/{i % 7}/{i:09d}.json.gz"
+        elif layout == "hashed":
+            yield hashlib.md5(str(i).encode()).hexdigest()
+        else:
+            yield f"events-{i:012d}"
+
+
+def timed_listing(repository) -> tuple:
+    started = time.perf_counter()
+    keys = [obj.key for obj in repository.iter_objects(BUCKET)]
+    return time.perf_counter() - started, keys
+
+
+def run(layout: str, count: int, page_latency: float, workers: List[int]) -> dict:
+    repository = InMemoryS3Repository(page_latency=page_latency)
+    repository.seed_objects(BUCKET, layout_keys(layout, count))
+    requests = repository.requests
+    sequential, expected = timed_listing(repository)
+    report: Dict = {
+        "layout": layout,
+        "objects": count,
+        "page_latency_ms": page_latency * 1000,
+        "sequential": {
+            "seconds": round(sequential, 3),
+            "requests": repository.requests - requests,
+        },
+        "sharded": [],
+    }
+    for max_workers in workers:
+        for ordered in (True, False):
+            sharded = ShardedS3Repository(
+                repository, max_workers=max_workers, ordered=ordered
+            )
+            requests = repository.requests
+            seconds, keys = timed_listing(sharded)
+            speedup = sequential / seconds
+            report["sharded"].append(
+                {
+                    "workers": max_workers,
+                    "ordered": ordered,
+                    "seconds": round(seconds, 3),
+                    "requests": repository.requests - requests,
+                    "speedup": round(speedup, 2),
+                    "efficiency": round(speedup / max_workers, 2),
+                    "correct": (keys if ordered else sorted(keys)) == expected,
+                }
+            )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--objects", type=int, default=100_000)
+    parser.add_argument("--page-latency-ms", type=float, default=50)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument(
+        "--layout", choices=LAYOUTS, action="append", help="Default: all"
+    )
+    args = parser.parse_args()
+    reports = [
+        run(layout, args.objects, args.page_latency_ms / 1000, args.workers)
+        for layout in args.layout or LAYOUTS
+    ]
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Throughput of TransferScheduler against a store that throttles.
+
+    python -m benchmarks.throttled_transfers --capacity 12 --requests 3000
+    python -m benchmarks.throttled_transfers --threads 16 64 128
+
+Bulk PUTs from a pool of threads go through a ScheduledS3Client to a fake
+S3 client that answers SlowDown whenever more than capacity requests are
+in flight, while one interactive GET runs every 50 ms. The report shows
+the throughput as a fraction of what the capacity allows, how often the
+store throttled, the bucket's final limit and the extra wait of the
+interactive requests.
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from botocore.exceptions import ClientError
+
+from adapters.transfer_scheduler import (
+    BULK,
+    INTERACTIVE,
+    ScheduledS3Client,
+    TransferScheduler,
+)
+
+BUCKET = "benchmark"
+INTERACTIVE_INTERVAL = 0.05
+
+
+class ThrottlingStore:
+    def __init__(self, capacity: int, latency: float):
+        """Fake S3 client serving capacity requests of latency at a time."""
+        self.capacity = capacity
+        self.latency = latency
+        self.active = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    def put_object(self, Bucket: str, Key: str, Body=b"") -> dict:
+        with self.lock:
+            self.active += 1
+            throttled = self.active > self.capacity
+            self.throttled += throttled
+        try:
+            # Rejections are cheaper than the work, as on a real store.
+            time.sleep(self.latency / 4 if throttled else self.latency)
+            if throttled:
+                raise ClientError(
+                    {
+                        "Error": {"Code": "SlowDown", "Message": "Reduce rate"},
+                        "ResponseMetadata": {"HTTPStatusCode": 503},
+                    },
+                    "PutObject",
+                )
+            return {"ETag": '"benchmark"'}
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    get_object = put_object
+
+
+def run(capacity: int, latency: float, requests: int, threads: int) -> dict:
+    store = ThrottlingStore(capacity, latency)
+    scheduler = TransferScheduler()
+    bulk = ScheduledS3Client(store, scheduler, BULK)
+    interactive = ScheduledS3Client(store, scheduler, INTERACTIVE)
+    waits: List[float] = []
+    finished = threading.Event()
+
+    def poll():
+        while not finished.is_set():
+            started = time.perf_counter()
+            interactive.get_object(Bucket=BUCKET, Key="interactive")
+            waits.append(time.perf_counter() - started - latency)
+            time.sleep(INTERACTIVE_INTERVAL)
+
+    poller = threading.Thread(target=poll)
+    started = time.perf_counter()
+    poller.start()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(
+            executor.map(
+                lambda i: bulk.put_object(Bucket=BUCKET, Key=str(i), Body=b"x"),
+                range(requests),
+            )
+        )
+    seconds = time.perf_counter() - started
+    finished.set()
+    poller.join()
+    stats = scheduler.stats()
+    return {
+        "threads": threads,
+        "seconds": round(seconds, 3),
+        "requests_per_second": round(requests / seconds),
+        "of_capacity": round(requests / seconds / (capacity / latency), 2),
+        "throttled": store.throttled,
+        "final_limit": stats["buckets"][BUCKET]["limit"],
+        "interactive_wait_ms_p50": round(statistics.median(waits) * 1000, 1),
+        "interactive_wait_ms_max": round(max(waits) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--capacity", type=int, default=12)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[16, 64, 128])
+    args = parser.parse_args()
+    report = {
+        "capacity": args.capacity,
+        "latency_ms": args.latency_ms,
+        "requests": args.requests,
+        "runs": [
+            run(args.capacity, args.latency_ms / 1000, args.requests, threads)
+            for threads in args.threads
+        ],
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Change throughput of WatchUseCases under a build-like burst of writes.
+
+    python -m benchmarks.watch_burst --files 5000 --writes 4
+    python -m benchmarks.watch_burst --files 20000 --latency-ms 20 --debounce 0.5
+
+A pool of writers creates files in a temporary directory in several
+appends each, as a compiler does, rewrites some of them, replaces others
+through a temporary file and a rename, and deletes the rest, calling
+notify() for every write the way the file watcher would. Uploads go to
+InMemoryS3Repository. The report shows the events per minute sustained,
+the uploads per file (1.0 means no duplicates), how many writes were
+caught half-done, the time to drain after the last event, the most
+changes pending at once and whether the bucket ended up equal to the
+directory.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.in_memory_s3_repository import InMemoryS3Repository
+from domain.use_cases.object_use_cases import ObjectUseCases
+from domain.use_cases.watch_use_cases import WatchResult, WatchUseCases
+
+BUCKET = "benchmark"
+PREFIX = "build/"
+
+
+class CountingS3Repository(InMemoryS3Repository):
+    def __init__(self, *args, **kwargs):
+        """InMemoryS3Repository counting uploads per key and partial files."""
+        super().__init__(*args, **kwargs)
+        self.puts = Counter()
+        self.partial = 0
+
+    def put_object(
+        self, bucket_name, file_path, progress_callback=None, object_key=None
+    ):
+        self.puts[object_key] += 1
+        # Writers finish files with a newline, so a missing one is a file
+        # uploaded before it was complete.
+        with open(file_path, "rb") as file_data:
+            file_data.seek(0, os.SEEK_END)
+            if file_data.tell():
+                file_data.seek(-1, os.SEEK_END)
+                self.partial += file_data.read(1) != b"\n"
+        return super().put_object(bucket_name, file_path, progress_callback, object_key)
+
+
+def write(watch: WatchUseCases, path: str, writes: int, pause: float) -> int:
+    with open(path, "wb") as file_data:
+        for i in range(writes):
+            last = i == writes - 1
+            file_data.write(b"x" * 1024 + (b"\n" if last else b""))
+            file_data.flush()
+            watch.notify(path)
+            if not last:
+                time.sleep(pause)
+    return writes
+
+
+def build(watch: WatchUseCases, root: str, index: int, args, rng) -> int:
+    path = os.path.join(root, f"module{index % 50:02d}", f"file{index:06d}.o")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    events = write(watch, path, args.writes, args.pause_ms / 1000)
+    roll = rng.random()
+    if roll < args.rewrite:
+        events += write(watch, path, args.writes, args.pause_ms / 1000)
+    elif roll < args.rewrite + args.rename:
+        temporary = path + ".tmp"
+        events += write(watch, temporary, args.writes, args.pause_ms / 1000)
+        os.replace(temporary, path)
+        watch.notify(temporary)
+        watch.notify(path)
+        events += 2
+    elif roll < args.rewrite + args.rename + args.delete:
+        os.remove(path)
+        watch.notify(path)
+        events += 1
+    return events
+
+
+def run(args) -> dict:
+    repository = CountingS3Repository(latency=args.latency_ms / 1000)
+    repository.create_bucket(BUCKET)
+    with tempfile.TemporaryDirectory() as root:
+        watch = WatchUseCases(
+            ObjectUseCases(repository),
+            BUCKET,
+            root,
+            PREFIX,
+            debounce=args.debounce,
+            max_workers=args.concurrency,
+        )
+        totals = WatchResult()
+        peak_pending = 0
+        writing = threading.Event()
+        writing.set()
+
+        def flush_loop():
+            nonlocal peak_pending
+            while writing.is_set() or watch.pending:
+                time.sleep(max(args.debounce / 4, 0.05))
+                peak_pending = max(peak_pending, watch.pending)
+                totals.add(watch.flush())
+
+        flusher = threading.Thread(target=flush_loop)
+        started = time.perf_counter()
+        flusher.start()
+        rngs = [random.Random(i) for i in range(args.files)]
+        with ThreadPoolExecutor(max_workers=args.writers) as executor:
+            events = sum(
+                executor.map(
+                    lambda i: build(watch, root, i, args, rngs[i]), range(args.files)
+                )
+            )
+        written = time.perf_counter()
+        writing.clear()
+        flusher.join()
+        drained = time.perf_counter()
+        totals.add(watch.close())
+
+        expected = {
+            PREFIX + os.path.relpath(os.path.join(directory, name), root): size
+            for directory, _, names in os.walk(root)
+            for name in names
+            for size in [os.path.getsize(os.path.join(directory, name))]
+        }
+    remote = {obj.key: obj.size for obj in repository.iter_objects(BUCKET)}
+    uploads = sum(repository.puts.values())
+    return {
+        "files": args.files,
+        "events": events,
+        "events_per_minute": round(events / (written - started) * 60),
+        "uploads": uploads,
+        "uploads_per_changed_file": round(uploads / max(len(repository.puts), 1), 3),
+        "partial_uploads": repository.partial,
+        "deleted": totals.deleted,
+        "failed": totals.failed,
+        "drain_seconds": round(drained - written, 2),
+        "peak_pending": peak_pending,
+        "bucket_matches_directory": remote == expected,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--writes", type=int, default=4, help="Appends per file")
+    parser.add_argument("--pause-ms", type=float, default=20, help="Between appends")
+    parser.add_argument("--writers", type=int, default=32)
+    parser.add_argument("--rewrite", type=float, default=0.2)
+    parser.add_argument("--rename", type=float, default=0.1)
+    parser.add_argument("--delete", type=float, default=0.1)
+    parser.add_argument("--debounce", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=10)
+    args = parser.parse_args()
+    print(json.dumps(run(args), indent=2))
+
+
+if __name__ == "__main__":
+    main()
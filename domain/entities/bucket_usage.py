@@ -0,0 +1,156 @@
+import heapq
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from domain.entities.s3_object import S3Object
+
+KIB = 1024
+# Upper bounds (exclusive) of the size histogram; the last bucket is open.
+SIZE_BUCKETS = (
+    KIB,
+    64 * KIB,
+    KIB * KIB,
+    16 * KIB * KIB,
+    128 * KIB * KIB,
+    KIB * KIB * KIB,
+    5 * KIB * KIB * KIB,
+)
+
+
+class BucketUsage:
+    def __init__(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        depth: int = 1,
+        top: int = 10,
+        delimiter: str = "/",
+    ):
+        """
+        Usage statistics of a listing, aggregated one object at a time.
+
+        Memory does not grow with the number of keys: the top-N largest
+        and oldest objects are bounded heaps, sizes go into fixed histogram
+        buckets, and per-prefix totals are only kept for the first `depth`
+        levels below prefix.
+
+        :param bucket_name: Bucket being aggregated
+        :param prefix: Prefix the listing is restricted to
+        :param depth: Number of prefix levels with their own totals
+        :param top: Number of largest and oldest objects to keep
+        :param delimiter: Separator between prefix levels
+        """
+        self.bucket_name = bucket_name
+        self.prefix = prefix or ""
+        self.depth = depth
+        self.top = top
+        self.delimiter = delimiter
+        self.objects = 0
+        self.total_size = 0
+        self.histogram = [0] * (len(SIZE_BUCKETS) + 1)
+        self.prefixes: Dict[str, List[int]] = {}
+        self._largest: List[Tuple[int, str]] = []
+        self._oldest: List[Tuple[float, str]] = []
+
+    def add(self, obj: S3Object) -> None:
+        size = obj.size
+        self.objects += 1
+        self.total_size += size
+        self.histogram[bisect_right(SIZE_BUCKETS, size)] += 1
+
+        relative_key = obj.key[len(self.prefix) :]
+        end = 0
+        for _ in range(self.depth):
+            end = relative_key.find(self.delimiter, end)
+            if end < 0:
+                break
+            end += len(self.delimiter)
+            totals = self.prefixes.get(relative_key[:end])
+            if totals is None:
+                totals = self.prefixes[relative_key[:end]] = [0, 0]
+            totals[0] += 1
+            totals[1] += size
+
+        if self.top:
+            _push(self._largest, (size, obj.key), self.top)
+            # Negated so the heap root is the newest of the kept objects.
+            _push(self._oldest, (-_to_timestamp(obj.last_modified), obj.key), self.top)
+
+    def merge(self, other: "BucketUsage") -> None:
+        """Fold in the usage of a disjoint part of the same listing."""
+        self.objects += other.objects
+        self.total_size += other.total_size
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+        offset = other.prefix[len(self.prefix) :]
+        if offset and offset.count(self.delimiter) <= self.depth:
+            totals = self.prefixes.setdefault(offset, [0, 0])
+            totals[0] += other.objects
+            totals[1] += other.total_size
+        for prefix, (count, size) in other.prefixes.items():
+            name = offset + prefix
+            if name.count(self.delimiter) > self.depth:
+                continue
+            totals = self.prefixes.setdefault(name, [0, 0])
+            totals[0] += count
+            totals[1] += size
+        for entry in other._largest:
+            _push(self._largest, entry, self.top)
+        for entry in other._oldest:
+            _push(self._oldest, entry, self.top)
+
+    def largest(self) -> List[Tuple[str, int]]:
+        """(key, size) of the largest objects, largest first."""
+        return [(key, size) for size, key in sorted(self._largest, reverse=True)]
+
+    def oldest(self) -> List[Tuple[str, datetime]]:
+        """(key, last_modified) of the oldest objects, oldest first."""
+        return [
+            (key, datetime.fromtimestamp(-timestamp, tz=timezone.utc))
+            for timestamp, key in sorted(self._oldest, reverse=True)
+        ]
+
+    def histogram_buckets(self) -> List[Tuple[Optional[int], int]]:
+        """(exclusive upper bound or None for the open bucket, objects)."""
+        return list(zip(SIZE_BUCKETS + (None,), self.histogram))
+
+    def to_dict(self) -> dict:
+        return {
+            "bucket": self.bucket_name,
+            "prefix": self.prefix,
+            "objects": self.objects,
+            "total_size": self.total_size,
+            "prefixes": [
+                {"prefix": self.prefix + prefix, "objects": count, "size": size}
+                for prefix, (count, size) in sorted(self.prefixes.items())
+            ],
+            "histogram": [
+                {"max_size": bound, "objects": count}
+                for bound, count in self.histogram_buckets()
+            ],
+            "largest": [{"key": key, "size": size} for key, size in self.largest()],
+            "oldest": [
+                {"key": key, "last_modified": last_modified.isoformat()}
+                for key, last_modified in self.oldest()
+            ],
+        }
+
+    def __repr__(self):
+        return (
+            f"BucketUsage(bucket={self.bucket_name}, prefix={self.prefix}, "
+            f"objects={self.objects}, total_size={self.total_size})"
+        )
+
+
+def _push(heap: list, entry: tuple, limit: int) -> None:
+    if len(heap) < limit:
+        heapq.heappush(heap, entry)
+    elif entry > heap[0]:
+        heapq.heapreplace(heap, entry)
+
+
+def _to_timestamp(value) -> float:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return float(value)
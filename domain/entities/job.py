@@ -0,0 +1,145 @@
+import time
+from typing import Dict, Optional
+
+# Kinds of jobs.
+UPLOAD = "upload"
+DELETE = "delete"
+COPY = "copy"
+SYNC = "sync"
+KINDS = (UPLOAD, DELETE, COPY, SYNC)
+
+# Statuses; a job is PREPARING while its input (uploaded files) arrives.
+PREPARING = "preparing"
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+# Fields written to and read back from a checkpoint.
+_STATE = (
+    "job_id",
+    "kind",
+    "params",
+    "status",
+    "created_at",
+    "finished_at",
+    "objects_done",
+    "bytes_done",
+    "objects_total",
+    "bytes_total",
+    "failed",
+    "active_seconds",
+    "checkpoint",
+    "error",
+)
+
+
+class Job:
+    def __init__(
+        self,
+        job_id: str,
+        kind: str,
+        params: Dict,
+        status: str = QUEUED,
+        created_at: Optional[float] = None,
+        finished_at: Optional[float] = None,
+        objects_done: int = 0,
+        bytes_done: int = 0,
+        objects_total: Optional[int] = None,
+        bytes_total: Optional[int] = None,
+        failed: int = 0,
+        active_seconds: float = 0.0,
+        checkpoint: Optional[Dict] = None,
+        error: Optional[str] = None,
+    ):
+        """
+        A long-running bulk operation and how far it has got.
+
+        Totals are None while unknown (a listing still being walked), which
+        leaves the ETA unknown too. Rates are taken over the time the job
+        has actually been running, across restarts.
+
+        :param job_id: Unique id of the job
+        :param kind: One of KINDS
+        :param params: Arguments of the operation, as JSON values
+        :param status: One of the status constants
+        :param created_at: Epoch seconds the job was created
+        :param finished_at: Epoch seconds the job reached a FINISHED status
+        :param objects_done: Objects transferred, deleted or copied so far
+        :param bytes_done: Bytes of those objects
+        :param objects_total: Objects the job will process, if known
+        :param bytes_total: Bytes the job will process, if known
+        :param failed: Objects that could not be processed
+        :param active_seconds: Running time before the current run
+        :param checkpoint: Kind-specific position to resume from
+        :param error: Why the job failed
+        """
+        self.job_id = job_id
+        self.kind = kind
+        self.params = params
+        self.status = status
+        self.created_at = time.time() if created_at is None else created_at
+        self.finished_at = finished_at
+        self.objects_done = objects_done
+        self.bytes_done = bytes_done
+        self.objects_total = objects_total
+        self.bytes_total = bytes_total
+        self.failed = failed
+        self.active_seconds = active_seconds
+        self.checkpoint = checkpoint or {}
+        self.error = error
+        # time.monotonic() when the current run started, if running.
+        self.resumed_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        if self.resumed_at is None:
+            return self.active_seconds
+        return self.active_seconds + time.monotonic() - self.resumed_at
+
+    @property
+    def objects_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.objects_done / elapsed if elapsed else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.bytes_done / elapsed if elapsed else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Seconds left at the average rate so far, by bytes if known."""
+        if self.status in FINISHED:
+            return 0.0
+        if self.bytes_total and self.bytes_per_second:
+            return max(self.bytes_total - self.bytes_done, 0) / self.bytes_per_second
+        if self.objects_total is not None and self.objects_per_second:
+            remaining = max(self.objects_total - self.objects_done, 0)
+            return remaining / self.objects_per_second
+        return None
+
+    def to_dict(self) -> dict:
+        eta = self.eta
+        return {
+            **self.state(),
+            "elapsed": round(self.elapsed, 3),
+            "objects_per_second": round(self.objects_per_second, 1),
+            "bytes_per_second": round(self.bytes_per_second),
+            "eta": None if eta is None else round(eta, 1),
+        }
+
+    def state(self) -> dict:
+        """What a checkpoint stores, with active_seconds brought up to date."""
+        state = {name: getattr(self, name) for name in _STATE}
+        state["active_seconds"] = self.elapsed
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "Job":
+        return cls(**{name: state[name] for name in _STATE if name in state})
+
+    def __repr__(self):
+        return f"Job(id={self.job_id}, kind={self.kind}, status={self.status})"
@@ -0,0 +1,240 @@
+from array import array
+from datetime import datetime, timezone
+from itertools import compress, repeat
+from operator import ge, lt, le
+from typing import Iterable, Iterator, Optional, Sequence
+from domain.entities.s3_object import S3Object
+
+try:
+    import numpy as np
+except ImportError:  # Slower, but the array module covers everything.
+    np = None
+
+
+class _Columns:
+    """Append-only column storage shared by a listing and its views."""
+
+    __slots__ = (
+        "key_data",
+        "key_offsets",
+        "etag_data",
+        "etag_offsets",
+        "sizes",
+        "last_modified",
+    )
+
+    def __init__(self):
+        self.key_data = bytearray()
+        self.key_offsets = array("q", [0])
+        self.etag_data = bytearray()
+        self.etag_offsets = array("q", [0])
+        self.sizes = array("q")
+        self.last_modified = array("d")
+
+    def append(self, obj: S3Object) -> int:
+        self.key_data += obj.key.encode("utf-8")
+        self.key_offsets.append(len(self.key_data))
+        self.etag_data += (obj.etag or "").encode("utf-8")
+        self.etag_offsets.append(len(self.etag_data))
+        self.sizes.append(obj.size)
+        self.last_modified.append(_to_timestamp(obj.last_modified))
+        return len(self.sizes) - 1
+
+    def key(self, position: int) -> str:
+        offsets = self.key_offsets
+        return self.key_data[offsets[position] : offsets[position + 1]].decode("utf-8")
+
+    def object(self, position: int) -> S3Object:
+        offsets = self.etag_offsets
+        etag = self.etag_data[offsets[position] : offsets[position + 1]]
+        return S3Object(
+            self.key(position),
+            self.sizes[position],
+            datetime.fromtimestamp(self.last_modified[position], tz=timezone.utc),
+            etag.decode("utf-8") or None,
+        )
+
+
+class ObjectListing:
+    """
+    Columnar container for large object listings.
+
+    Keys and ETags are stored as shared UTF-8 buffers plus offsets arrays,
+    and sizes and modification times as typed arrays. That costs roughly
+    len(key) + len(etag) + 32 bytes per object instead of a Python object,
+    two strs, an int and a datetime each. S3Object views are only built on
+    access.
+
+    filter, sort and take return views: the columns are shared and only an
+    array of positions is built, so they never copy keys. With NumPy they
+    and total_size are vectorised and beat a List[S3Object]; without it
+    they fall back to map and compress over the arrays, which is slower.
+    """
+
+    __slots__ = ("_columns", "_index")
+
+    def __init__(self):
+        self._columns = _Columns()
+        # Positions in _columns, in order; None for all of them.
+        self._index: Optional[array] = None
+
+    @classmethod
+    def from_objects(cls, objects: Iterable[S3Object]) -> "ObjectListing":
+        listing = cls()
+        listing.extend(objects)
+        return listing
+
+    def append(self, obj: S3Object) -> None:
+        position = self._columns.append(obj)
+        if self._index is not None:
+            self._index.append(position)
+
+    def extend(self, objects: Iterable[S3Object]) -> None:
+        for obj in objects:
+            self.append(obj)
+
+    def __len__(self) -> int:
+        if self._index is None:
+            return len(self._columns.sizes)
+        return len(self._index)
+
+    def __getitem__(self, index: int) -> S3Object:
+        return self._columns.object(self._position(index))
+
+    def __iter__(self) -> Iterator[S3Object]:
+        return map(self._columns.object, self._positions())
+
+    def key(self, index: int) -> str:
+        return self._columns.key(self._position(index))
+
+    def total_size(self) -> int:
+        if np is not None:
+            return int(self._column(self._columns.sizes).sum())
+        if self._index is None:
+            return sum(self._columns.sizes)
+        return sum(map(self._columns.sizes.__getitem__, self._index))
+
+    def filter(
+        self,
+        prefix: Optional[str] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        modified_after: Optional[datetime] = None,
+        modified_before: Optional[datetime] = None,
+    ) -> "ObjectListing":
+        """Return a view of the objects matching every condition."""
+        columns = self._columns
+        sizes = columns.sizes
+        conditions = [
+            (sizes, ge, min_size),
+            (sizes, le, max_size),
+            (columns.last_modified, ge, modified_after),
+            (columns.last_modified, lt, modified_before),
+        ]
+        conditions = [
+            (column, compare, value if column is sizes else _to_timestamp(value))
+            for column, compare, value in conditions
+            if value is not None
+        ]
+        if np is not None:
+            positions = self._position_column()
+            mask = np.ones(len(positions), dtype=bool)
+            for column, compare, value in conditions:
+                mask &= compare(self._column(column), value)
+            positions = array("q", positions[mask].tobytes())
+        else:
+            positions = self._positions()
+            for column, compare, value in conditions:
+                values = map(column.__getitem__, positions)
+                positions = array(
+                    "q", compress(positions, map(compare, values, repeat(value)))
+                )
+        if prefix:
+            encoded = prefix.encode("utf-8")
+            data, offsets = columns.key_data, columns.key_offsets
+            positions = array(
+                "q",
+                (
+                    position
+                    for position in positions
+                    if data.startswith(
+                        encoded, offsets[position], offsets[position + 1]
+                    )
+                ),
+            )
+        return self._view(positions)
+
+    def sort(self, by: str = "key", reverse: bool = False) -> "ObjectListing":
+        """Return a view ordered by key, size or last_modified."""
+        columns = self._columns
+        if by == "key":
+            data, offsets = columns.key_data, columns.key_offsets
+            positions = self._positions()
+            # UTF-8 byte order is the order S3 lists keys in.
+            keys = [
+                data[offsets[position] : offsets[position + 1]]
+                for position in positions
+            ]
+            order = sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse)
+            return self._view(array("q", map(positions.__getitem__, order)))
+        if by not in ("size", "last_modified"):
+            raise ValueError(f"Cannot sort by {by!r}")
+        column = columns.sizes if by == "size" else columns.last_modified
+        if np is not None:
+            values = self._column(column)
+            # Stable in both directions, like sorted(reverse=True).
+            order = np.argsort(-values if reverse else values, kind="stable")
+            positions = array("q", self._position_column()[order].tobytes())
+        else:
+            positions = array(
+                "q",
+                sorted(self._positions(), key=column.__getitem__, reverse=reverse),
+            )
+        return self._view(positions)
+
+    def take(self, indexes: Sequence[int]) -> "ObjectListing":
+        """Return a view of the objects at indexes, in that order."""
+        if np is not None:
+            indexes = np.asarray(indexes, dtype=np.int64)
+            return self._view(
+                array("q", self._position_column()[indexes].tobytes())
+            )
+        positions = self._positions()
+        return self._view(array("q", map(positions.__getitem__, indexes)))
+
+    def _view(self, positions: array) -> "ObjectListing":
+        listing = ObjectListing()
+        listing._columns = self._columns
+        listing._index = positions
+        return listing
+
+    def _position(self, index: int) -> int:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ObjectListing index out of range")
+        return index if self._index is None else self._index[index]
+
+    def _positions(self):
+        if self._index is None:
+            return range(len(self._columns.sizes))
+        return self._index
+
+    def _position_column(self):
+        if self._index is None:
+            return np.arange(len(self._columns.sizes), dtype=np.int64)
+        return np.frombuffer(self._index, dtype=np.int64)
+
+    def _column(self, column: array):
+        values = np.frombuffer(column, dtype=column.typecode)
+        if self._index is None:
+            return values
+        return values[np.frombuffer(self._index, dtype=np.int64)]
+
+
+def _to_timestamp(value) -> float:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return float(value)
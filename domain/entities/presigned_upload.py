@@ -0,0 +1,72 @@
+from typing import Dict, Optional
+
+MB = 1024 * 1024
+# S3 multipart limits: every part but the last is at least 5 MiB and at
+# most 5 GiB, an upload has at most 10,000 parts and an object 5 TiB.
+MIN_PART_SIZE = 5 * MB
+MAX_PART_SIZE = 5 * 1024 * MB
+MAX_PARTS = 10000
+MAX_OBJECT_SIZE = 5 * 1024 * 1024 * MB
+
+
+class PresignedUpload:
+    def __init__(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_size: int,
+        part_count: Optional[int] = None,
+        urls: Optional[Dict[int, str]] = None,
+        expiration: int = 3600,
+    ):
+        """
+        A multipart upload whose parts the client PUTs straight to S3.
+
+        urls maps part numbers to presigned UploadPart URLs. They may cover
+        only the first parts; more are signed on request, so an upload can
+        be resumed from its upload_id after the URLs have expired.
+
+        :param bucket_name: Bucket receiving the object
+        :param object_key: Key of the object being uploaded
+        :param upload_id: S3 multipart upload id
+        :param part_size: Bytes per part, except the last one
+        :param part_count: Number of parts, when the size is known
+        :param urls: Presigned URL per part number
+        :param expiration: Seconds the URLs stay valid
+        """
+        self.bucket_name = bucket_name
+        self.object_key = object_key
+        self.upload_id = upload_id
+        self.part_size = part_size
+        self.part_count = part_count
+        self.urls = urls or {}
+        self.expiration = expiration
+
+    def to_dict(self) -> dict:
+        return {
+            "bucket": self.bucket_name,
+            "key": self.object_key,
+            "upload_id": self.upload_id,
+            "part_size": self.part_size,
+            "part_count": self.part_count,
+            "expiration": self.expiration,
+            "parts": [
+                {"part_number": number, "url": url}
+                for number, url in sorted(self.urls.items())
+            ],
+        }
+
+    def __repr__(self):
+        return (
+            f"PresignedUpload(key={self.object_key}, upload_id={self.upload_id}, "
+            f"part_size={self.part_size}, part_count={self.part_count})"
+        )
+
+
+def part_size_for(size: Optional[int], part_size: int) -> int:
+    """Smallest doubling of part_size that fits size in MAX_PARTS parts."""
+    part_size = max(part_size, MIN_PART_SIZE)
+    while size and part_size * MAX_PARTS < size:
+        part_size *= 2
+    return part_size
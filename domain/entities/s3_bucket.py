@@ -2,6 +2,8 @@ from datetime import datetime
 
 
 class S3Bucket:
+    __slots__ = ("name", "creation_date")
+
     def __init__(self, name: str, creation_date: datetime = None):
         self.name = name
         self.creation_date = creation_date or datetime.utcnow()
@@ -0,0 +1,15 @@
+from typing import List
+from domain.entities.s3_object import S3Object
+
+
+class S3DirectoryListing:
+    def __init__(self, prefix: str, prefixes: List[str], objects: List[S3Object]):
+        self.prefix = prefix
+        self.prefixes = prefixes
+        self.objects = objects
+
+    def __repr__(self):
+        return (
+            f"S3DirectoryListing(prefix={self.prefix}, prefixes={len(self.prefixes)}, "
+            f"objects={len(self.objects)})"
+        )
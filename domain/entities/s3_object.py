@@ -1,8 +1,11 @@
 class S3Object:
-    def __init__(self, key: str, size: int, last_modified):
+    __slots__ = ("key", "size", "last_modified", "etag")
+
+    def __init__(self, key: str, size: int, last_modified, etag: str = None):
         self.key = key
         self.size = size
         self.last_modified = last_modified
+        self.etag = etag
 
     def __repr__(self):
         return f"S3Object(key={self.key}, size={self.size}, last_modified={self.last_modified})"
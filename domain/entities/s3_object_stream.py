@@ -0,0 +1,109 @@
+import re
+from typing import Callable, Iterable, Optional, Tuple
+
+# Small enough that a download holds a bounded amount of memory, large
+# enough that per-chunk overhead (a thread hop in the async adapter) is noise.
+STREAM_CHUNK_SIZE = 256 * 1024
+
+_BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class S3ObjectStream:
+    __slots__ = (
+        "status",
+        "size",
+        "content_length",
+        "content_range",
+        "etag",
+        "last_modified",
+        "content_type",
+        "chunks",
+        "_close",
+    )
+
+    def __init__(
+        self,
+        status: int,
+        size: Optional[int] = None,
+        content_length: int = 0,
+        content_range: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified=None,
+        content_type: Optional[str] = None,
+        chunks: Optional[Iterable[bytes]] = None,
+        close: Optional[Callable[[], None]] = None,
+    ):
+        """
+        An opened GET of an object whose body has not been read yet.
+
+        status is the HTTP status S3 answered with: 200 for the whole
+        object, 206 for a byte range, 304 when If-None-Match matched and
+        416 when the range is not satisfiable. Only 200 and 206 carry
+        chunks, which must be consumed or closed to release the connection.
+
+        :param status: HTTP status of the GET
+        :param size: Size of the whole object, when known
+        :param content_length: Number of bytes in chunks
+        :param content_range: Content-Range of a 206 response
+        :param etag: ETag of the object
+        :param last_modified: Last modification time of the object
+        :param content_type: Content-Type stored with the object
+        :param chunks: The body, as an iterator of byte strings
+        :param close: Releases the body without reading the rest of it
+        """
+        self.status = status
+        self.size = size
+        self.content_length = content_length
+        self.content_range = content_range
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_type = content_type
+        self.chunks = chunks
+        self._close = close
+
+    def close(self) -> None:
+        if self._close is not None:
+            self._close()
+            self._close = None
+
+    def __repr__(self):
+        return (
+            f"S3ObjectStream(status={self.status}, "
+            f"content_length={self.content_length}, etag={self.etag})"
+        )
+
+
+def parse_byte_range(header: Optional[str]) -> Optional[Tuple[str, str]]:
+    """
+    (first, last) byte positions of a single-range Range header, as strings
+    that may be empty ("bytes=-500" is the last 500 bytes).
+
+    None for a missing, malformed or multi-range header; S3 only serves a
+    single range and RFC 9110 lets a server ignore the rest.
+    """
+    match = _BYTE_RANGE.match(header.strip()) if header else None
+    if match is None or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first and last and int(last) < int(first):
+        return None
+    return first, last
+
+
+def resolve_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) offsets a Range header selects in an object of
+    size bytes, or None when the header does not apply. Raises ValueError
+    when the range is not satisfiable.
+    """
+    byte_range = parse_byte_range(header)
+    if byte_range is None:
+        return None
+    first, last = byte_range
+    if not first:
+        if int(last) == 0 or size == 0:
+            raise ValueError(f"Range {header} not satisfiable for {size} bytes")
+        return max(size - int(last), 0), size - 1
+    if int(first) >= size:
+        raise ValueError(f"Range {header} not satisfiable for {size} bytes")
+    return int(first), min(int(last), size - 1) if last else size - 1
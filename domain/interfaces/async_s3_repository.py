@@ -0,0 +1,160 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional
+from domain.entities.s3_bucket import S3Bucket
+from domain.entities.s3_object import S3Object
+from domain.entities.s3_directory_listing import S3DirectoryListing
+from domain.entities.s3_object_stream import STREAM_CHUNK_SIZE, S3ObjectStream
+
+
+class AsyncS3Repository(ABC):
+    @abstractmethod
+    async def list_buckets(self) -> List[S3Bucket]:
+        pass
+
+    @abstractmethod
+    async def create_bucket(self, bucket_name: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def delete_bucket(self, bucket_name: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def list_objects(self, bucket_name: str) -> List[S3Object]:
+        pass
+
+    @abstractmethod
+    def iter_objects(
+        self,
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        start_after: Optional[str] = None,
+        page_size: int = 1000,
+    ) -> AsyncIterator[S3Object]:
+        pass
+
+    @abstractmethod
+    async def list_directory(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        max_keys: Optional[int] = None,
+    ) -> S3DirectoryListing:
+        pass
+
+    @abstractmethod
+    def iter_directory(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        page_size: int = 1000,
+    ) -> AsyncIterator[S3DirectoryListing]:
+        """list_directory one page at a time, each page in key order."""
+        pass
+
+    @abstractmethod
+    async def put_object(
+        self,
+        bucket_name: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        object_key: Optional[str] = None,
+    ) -> bool:
+        pass
+
+    @abstractmethod
+    async def head_object(
+        self, bucket_name: str, object_key: str
+    ) -> Optional[S3Object]:
+        pass
+
+    @abstractmethod
+    async def open_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        byte_range: Optional[str] = None,
+        if_none_match: Optional[str] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Optional[S3ObjectStream]:
+        pass
+
+    @abstractmethod
+    async def put_object_bytes(self, bucket_name: str, object_key: str, data: bytes) -> bool:
+        pass
+
+    @abstractmethod
+    async def create_multipart_upload(
+        self, bucket_name: str, object_key: str
+    ) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    async def upload_part(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_number: int,
+        data: bytes,
+    ) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    async def complete_multipart_upload(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        parts: List[Dict],
+    ) -> bool:
+        pass
+
+    @abstractmethod
+    async def abort_multipart_upload(
+        self, bucket_name: str, object_key: str, upload_id: str
+    ) -> bool:
+        pass
+
+    @abstractmethod
+    async def generate_presigned_url(
+        self,
+        bucket_name: str,
+        file_name: str,
+        expiration,
+        client_method: str = "put_object",
+    ) -> str:
+        pass
+
+    @abstractmethod
+    async def generate_presigned_urls(
+        self,
+        bucket_name: str,
+        object_keys: Iterable[str],
+        expiration=3600,
+        client_method: str = "put_object",
+    ) -> Dict[str, str]:
+        pass
+
+    @abstractmethod
+    async def generate_presigned_part_urls(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_numbers: Iterable[int],
+        expiration=3600,
+    ) -> Dict[int, str]:
+        pass
+
+    @abstractmethod
+    async def list_parts(
+        self, bucket_name: str, object_key: str, upload_id: str
+    ) -> Optional[List[Dict]]:
+        pass
+
+    @abstractmethod
+    async def delete_object(self, bucket_name: str, object_key: str) -> bool:
+        pass
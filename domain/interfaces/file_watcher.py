@@ -0,0 +1,16 @@
+from abc import ABC, abstractmethod
+from typing import Callable
+
+
+class FileWatcher(ABC):
+    @abstractmethod
+    def start(self, directory: str, callback: Callable[[str, bool], None]) -> None:
+        """
+        Call callback(path, is_directory) from a background thread for every
+        path created, modified, deleted or moved (both ends) under directory.
+        """
+        pass
+
+    @abstractmethod
+    def stop(self) -> None:
+        pass
@@ -0,0 +1,22 @@
+from abc import ABC, abstractmethod
+from typing import List
+from domain.entities.job import Job
+
+
+class JobStore(ABC):
+    @abstractmethod
+    def save(self, job: Job) -> None:
+        pass
+
+    @abstractmethod
+    def load_all(self) -> List[Job]:
+        pass
+
+    @abstractmethod
+    def delete(self, job_id: str) -> None:
+        pass
+
+    @abstractmethod
+    def files_directory(self, job_id: str) -> str:
+        """Local directory holding the input files of a job."""
+        pass
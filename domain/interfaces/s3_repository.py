@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 from domain.entities.s3_bucket import S3Bucket
 from domain.entities.s3_object import S3Object
+from domain.entities.s3_directory_listing import S3DirectoryListing
+from domain.entities.s3_object_stream import STREAM_CHUNK_SIZE, S3ObjectStream
 
 
 class S3Repository(ABC):
@@ -22,15 +24,192 @@ class S3Repository(ABC):
         pass
 
     @abstractmethod
-    def put_object(self, bucket_name: str, file_path: str) -> bool:
+    def iter_objects(
+        self,
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        start_after: Optional[str] = None,
+        page_size: int = 1000,
+    ) -> Iterator[S3Object]:
+        """
+        Stream the objects in key order. A request failing part way raises
+        instead of ending the listing, so a listing that ends is complete.
+        """
+        pass
+
+    @abstractmethod
+    def list_directory(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        max_keys: Optional[int] = None,
+    ) -> S3DirectoryListing:
+        pass
+
+    @abstractmethod
+    def iter_directory(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        page_size: int = 1000,
+    ) -> Iterator[S3DirectoryListing]:
+        """
+        list_directory one page at a time, each page in key order. Failures
+        raise, as in iter_objects.
+        """
+        pass
+
+    @abstractmethod
+    def put_object(
+        self,
+        bucket_name: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        object_key: Optional[str] = None,
+    ) -> bool:
+        pass
+
+    @abstractmethod
+    def get_object(self, bucket_name: str, object_key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def head_object(self, bucket_name: str, object_key: str) -> Optional[S3Object]:
+        """The object's size and metadata without its body, as open_object."""
+        pass
+
+    @abstractmethod
+    def open_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        byte_range: Optional[str] = None,
+        if_none_match: Optional[str] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Optional[S3ObjectStream]:
+        """None when the object does not exist; other S3 errors raise."""
+        pass
+
+    @abstractmethod
+    def download_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> bool:
+        pass
+
+    @abstractmethod
+    def put_object_bytes(self, bucket_name: str, object_key: str, data: bytes) -> bool:
+        pass
+
+    @abstractmethod
+    def create_multipart_upload(
+        self, bucket_name: str, object_key: str
+    ) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def upload_part(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_number: int,
+        data: bytes,
+    ) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def complete_multipart_upload(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        parts: List[Dict],
+    ) -> bool:
+        pass
+
+    @abstractmethod
+    def abort_multipart_upload(
+        self, bucket_name: str, object_key: str, upload_id: str
+    ) -> bool:
         pass
 
     @abstractmethod
     def generate_presigned_url(
-        self, bucket_name: str, file_name: str, expiration
+        self,
+        bucket_name: str,
+        file_name: str,
+        expiration,
+        client_method: str = "put_object",
     ) -> str:
         pass
 
+    @abstractmethod
+    def generate_presigned_urls(
+        self,
+        bucket_name: str,
+        object_keys: Iterable[str],
+        expiration=3600,
+        client_method: str = "put_object",
+    ) -> Dict[str, str]:
+        pass
+
+    @abstractmethod
+    def generate_presigned_part_urls(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_numbers: Iterable[int],
+        expiration=3600,
+    ) -> Dict[int, str]:
+        pass
+
+    @abstractmethod
+    def list_parts(
+        self, bucket_name: str, object_key: str, upload_id: str
+    ) -> Optional[List[Dict]]:
+        pass
+
     @abstractmethod
     def delete_object(self, bucket_name: str, object_key: str) -> bool:
         pass
+
+    @abstractmethod
+    def delete_objects(self, bucket_name: str, object_keys: Iterable[str]) -> int:
+        pass
+
+    @abstractmethod
+    def copy_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        destination_key: str,
+        destination_bucket: Optional[str] = None,
+    ) -> bool:
+        pass
+
+    @abstractmethod
+    def move_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        destination_key: str,
+        destination_bucket: Optional[str] = None,
+    ) -> bool:
+        pass
+
+    @abstractmethod
+    def move_prefix(
+        self,
+        bucket_name: str,
+        prefix: str,
+        destination_prefix: str,
+        destination_bucket: Optional[str] = None,
+    ) -> int:
+        pass
@@ -0,0 +1,17 @@
+from domain.interfaces.async_s3_repository import AsyncS3Repository
+from domain.entities.s3_bucket import S3Bucket
+from typing import List
+
+
+class AsyncBucketUseCases:
+    def __init__(self, repository: AsyncS3Repository):
+        self.repository = repository
+
+    async def get_buckets(self) -> List[S3Bucket]:
+        return await self.repository.list_buckets()
+
+    async def create_bucket(self, bucket_name: str) -> bool:
+        return await self.repository.create_bucket(bucket_name)
+
+    async def delete_bucket(self, bucket_name: str) -> bool:
+        return await self.repository.delete_bucket(bucket_name)
@@ -0,0 +1,288 @@
+import asyncio
+from domain.interfaces.async_s3_repository import AsyncS3Repository
+from domain.entities.s3_object import S3Object
+from domain.entities.s3_directory_listing import S3DirectoryListing
+from domain.entities.s3_object_stream import STREAM_CHUNK_SIZE, S3ObjectStream
+from domain.entities.presigned_upload import (
+    MAX_OBJECT_SIZE,
+    MAX_PART_SIZE,
+    MAX_PARTS,
+    PresignedUpload,
+    part_size_for,
+)
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional
+
+STREAM_PART_SIZE = 8 * 1024 * 1024
+# Parts a stream of unknown length sends before doubling its part size, so
+# MAX_PARTS parts hold more than the largest object S3 accepts.
+PARTS_PER_PART_SIZE = 1000
+
+
+class AsyncObjectUseCases:
+    def __init__(self, repository: AsyncS3Repository):
+        self.repository = repository
+
+    def get_objects(
+        self,
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        start_after: Optional[str] = None,
+        page_size: int = 1000,
+    ) -> AsyncIterator[S3Object]:
+        return self.repository.iter_objects(
+            bucket_name, prefix=prefix, start_after=start_after, page_size=page_size
+        )
+
+    async def get_directory(
+        self, bucket_name: str, prefix: str = "", delimiter: str = "/"
+    ) -> S3DirectoryListing:
+        return await self.repository.list_directory(bucket_name, prefix, delimiter)
+
+    async def put_object(
+        self,
+        bucket_name: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        object_key: Optional[str] = None,
+    ) -> bool:
+        return await self.repository.put_object(
+            bucket_name, file_path, progress_callback, object_key
+        )
+
+    async def put_object_stream(
+        self,
+        bucket_name: str,
+        object_key: str,
+        chunks: AsyncIterator[bytes],
+        part_size: int = STREAM_PART_SIZE,
+        max_in_flight: int = 4,
+        size: Optional[int] = None,
+    ) -> bool:
+        """
+        Upload an async byte stream without holding it in memory or on disk.
+
+        Chunks are packed into parts of part_size bytes and sent as a
+        multipart upload with at most max_in_flight parts outstanding, so
+        memory is bounded by roughly part_size * (max_in_flight + 1).
+        Bodies smaller than one part are sent with a single PUT.
+
+        S3 takes at most MAX_PARTS parts: with size, the expected length
+        (at least), part_size is raised to fit it; without, it doubles
+        every PARTS_PER_PART_SIZE parts. Raises ValueError for a body S3
+        cannot store, before uploading anything when size tells.
+        """
+        if size is not None:
+            if size > MAX_OBJECT_SIZE:
+                raise ValueError(f"{size} bytes is more than an object can hold")
+            part_size = part_size_for(size, part_size)
+        first_part_size = part_size
+        buffer = bytearray()
+        upload_id = None
+        uploads = []
+        in_flight = asyncio.Semaphore(max_in_flight)
+
+        async def send(part_number: int, data: bytes):
+            try:
+                return await self.repository.upload_part(
+                    bucket_name,
+                    object_key,
+                    upload_id,
+                    part_number,
+                    data,
+                )
+            finally:
+                in_flight.release()
+
+        async def dispatch(data: bytes):
+            if len(uploads) == MAX_PARTS:
+                raise ValueError(f"The body needs more than {MAX_PARTS} parts")
+            await in_flight.acquire()
+            uploads.append(asyncio.create_task(send(len(uploads) + 1, data)))
+
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                while len(buffer) >= part_size:
+                    if upload_id is None:
+                        upload_id = await self.repository.create_multipart_upload(
+                            bucket_name, object_key
+                        )
+                        if upload_id is None:
+                            return False
+                    data = bytes(buffer[:part_size])
+                    del buffer[:part_size]
+                    await dispatch(data)
+                    if size is None:
+                        doublings = len(uploads) // PARTS_PER_PART_SIZE
+                        part_size = min(
+                            first_part_size * 2**doublings, MAX_PART_SIZE
+                        )
+
+            if upload_id is None:
+                return await self.repository.put_object_bytes(
+                    bucket_name, object_key, bytes(buffer)
+                )
+            if buffer:
+                await dispatch(bytes(buffer))
+                buffer.clear()
+
+            etags = await asyncio.gather(*uploads)
+            if all(etags):
+                parts = [
+                    {"PartNumber": number, "ETag": etag}
+                    for number, etag in enumerate(etags, start=1)
+                ]
+                if await self.repository.complete_multipart_upload(
+                    bucket_name, object_key, upload_id, parts
+                ):
+                    return True
+        except BaseException:
+            for upload in uploads:
+                upload.cancel()
+            if upload_id is not None:
+                await self.repository.abort_multipart_upload(
+                    bucket_name, object_key, upload_id
+                )
+            raise
+
+        await self.repository.abort_multipart_upload(
+            bucket_name, object_key, upload_id
+        )
+        return False
+
+    async def head_object(
+        self, bucket_name: str, object_key: str
+    ) -> Optional[S3Object]:
+        return await self.repository.head_object(bucket_name, object_key)
+
+    async def open_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        byte_range: Optional[str] = None,
+        if_none_match: Optional[str] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Optional[S3ObjectStream]:
+        return await self.repository.open_object(
+            bucket_name, object_key, byte_range, if_none_match, chunk_size
+        )
+
+    async def generate_presigned_url(
+        self,
+        bucket_name: str,
+        file_name: str,
+        expiration=3600,
+        client_method: str = "put_object",
+    ) -> str:
+        return await self.repository.generate_presigned_url(
+            bucket_name, file_name, expiration, client_method
+        )
+
+    async def generate_presigned_urls(
+        self,
+        bucket_name: str,
+        object_keys: Iterable[str],
+        expiration=3600,
+        client_method: str = "put_object",
+    ) -> Dict[str, str]:
+        return await self.repository.generate_presigned_urls(
+            bucket_name, object_keys, expiration, client_method
+        )
+
+    async def create_presigned_upload(
+        self,
+        bucket_name: str,
+        object_key: str,
+        size: Optional[int] = None,
+        part_size: int = STREAM_PART_SIZE,
+        expiration=3600,
+        presigned_parts: int = 100,
+    ) -> Optional[PresignedUpload]:
+        """
+        Start a multipart upload for a client that PUTs the parts itself.
+
+        With a known size the part size is raised until the object fits
+        in S3's part limit, and URLs for up to presigned_parts parts are
+        signed right away; the rest come from presign_upload_parts.
+        """
+        part_size = part_size_for(size, part_size)
+        part_count = None if size is None else max(-(-size // part_size), 1)
+        upload_id = await self.repository.create_multipart_upload(
+            bucket_name, object_key
+        )
+        if upload_id is None:
+            return None
+        if part_count is not None:
+            presigned_parts = min(presigned_parts, part_count)
+        urls = await self.repository.generate_presigned_part_urls(
+            bucket_name,
+            object_key,
+            upload_id,
+            range(1, presigned_parts + 1),
+            expiration,
+        )
+        return PresignedUpload(
+            bucket_name,
+            object_key,
+            upload_id,
+            part_size,
+            part_count,
+            urls,
+            expiration,
+        )
+
+    async def presign_upload_parts(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        part_numbers: Iterable[int],
+        expiration=3600,
+    ) -> Dict[int, str]:
+        return await self.repository.generate_presigned_part_urls(
+            bucket_name, object_key, upload_id, part_numbers, expiration
+        )
+
+    async def list_uploaded_parts(
+        self, bucket_name: str, object_key: str, upload_id: str
+    ) -> Optional[List[Dict]]:
+        return await self.repository.list_parts(bucket_name, object_key, upload_id)
+
+    async def complete_presigned_upload(
+        self,
+        bucket_name: str,
+        object_key: str,
+        upload_id: str,
+        parts: Optional[List[Dict]] = None,
+    ) -> bool:
+        """
+        Complete an upload from its parts' PartNumber and ETag.
+
+        Without parts they are listed from S3, so browser clients do not
+        need CORS access to the ETag header of their part uploads.
+        """
+        if parts is None:
+            parts = await self.repository.list_parts(
+                bucket_name, object_key, upload_id
+            )
+        if not parts:
+            return False
+        return await self.repository.complete_multipart_upload(
+            bucket_name,
+            object_key,
+            upload_id,
+            [
+                {"PartNumber": part["PartNumber"], "ETag": part["ETag"]}
+                for part in sorted(parts, key=lambda part: part["PartNumber"])
+            ],
+        )
+
+    async def abort_multipart_upload(
+        self, bucket_name: str, object_key: str, upload_id: str
+    ) -> bool:
+        return await self.repository.abort_multipart_upload(
+            bucket_name, object_key, upload_id
+        )
+
+    async def delete_object(self, bucket_name: str, object_key: str) -> bool:
+        return await self.repository.delete_object(bucket_name, object_key)
@@ -0,0 +1,60 @@
+import asyncio
+from typing import Optional
+from domain.interfaces.async_s3_repository import AsyncS3Repository
+from domain.entities.bucket_usage import BucketUsage
+from domain.entities.s3_object import S3Object
+
+
+class AsyncUsageUseCases:
+    def __init__(self, repository: AsyncS3Repository, max_in_flight: int = 8):
+        self.repository = repository
+        self.max_in_flight = max_in_flight
+
+    async def get_usage(
+        self,
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        depth: int = 1,
+        top: int = 10,
+        parallel: bool = False,
+    ) -> BucketUsage:
+        prefix = prefix or ""
+        if not parallel:
+            return await self._aggregate(bucket_name, prefix, depth, top)
+
+        usage = BucketUsage(bucket_name, prefix, depth, top)
+        marker = await self._marker(bucket_name, prefix)
+        if marker is not None:
+            usage.add(marker)
+        limit = asyncio.Semaphore(self.max_in_flight)
+
+        async def aggregate(sub_prefix: str) -> BucketUsage:
+            async with limit:
+                return await self._aggregate(bucket_name, sub_prefix, depth - 1, top)
+
+        async for page in self.repository.iter_directory(bucket_name, prefix):
+            for obj in page.objects:
+                usage.add(obj)
+            for part in await asyncio.gather(*map(aggregate, page.prefixes)):
+                usage.merge(part)
+        return usage
+
+    async def _marker(self, bucket_name: str, prefix: str) -> Optional[S3Object]:
+        # The folder marker equal to prefix is not part of its level.
+        if not prefix:
+            return None
+        async for obj in self.repository.iter_objects(
+            bucket_name, prefix=prefix, page_size=1
+        ):
+            return obj if obj.key == prefix else None
+        return None
+
+    async def _aggregate(
+        self, bucket_name: str, prefix: str, depth: int, top: int
+    ) -> BucketUsage:
+        usage = BucketUsage(bucket_name, prefix, depth, top)
+        async for obj in self.repository.iter_objects(
+            bucket_name, prefix=prefix or None
+        ):
+            usage.add(obj)
+        return usage
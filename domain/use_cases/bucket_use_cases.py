@@ -1,6 +1,6 @@
 from domain.interfaces.s3_repository import S3Repository
 from domain.entities.s3_bucket import S3Bucket
-from typing import List
+from typing import List, Optional, Tuple
 
 
 class BucketUseCases:
@@ -13,5 +13,38 @@ class BucketUseCases:
     def create_bucket(self, bucket_name: str) -> bool:
         return self.repository.create_bucket(bucket_name)
 
-    def delete_bucket(self, bucket_name: str) -> bool:
+    def delete_bucket(self, bucket_name: str, force: bool = False) -> bool:
+        if force:
+            self.repository.delete_objects(
+                bucket_name,
+                (obj.key for obj in self.repository.iter_objects(bucket_name)),
+            )
         return self.repository.delete_bucket(bucket_name)
+
+    def rename_bucket(
+        self, bucket_name: str, new_name: str
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Objects moved to new_name and objects left in bucket_name, or None
+        when new_name could not be created.
+
+        S3 cannot rename buckets: the new one is created, every object is
+        moved server-side and the old bucket is dropped only once it is
+        empty, so objects whose copy failed are kept where they were.
+        Raises ValueError when new_name is bucket_name or already exists
+        (on us-east-1, creating a bucket one owns succeeds and would merge
+        both).
+        """
+        if new_name == bucket_name:
+            raise ValueError("The new name is the bucket's current name")
+        if any(bucket.name == new_name for bucket in self.repository.list_buckets()):
+            raise ValueError(f"Bucket {new_name} already exists")
+        if not self.repository.create_bucket(new_name):
+            return None
+        moved = self.repository.move_prefix(
+            bucket_name, "", "", destination_bucket=new_name
+        )
+        remaining = sum(1 for _ in self.repository.iter_objects(bucket_name))
+        if not remaining:
+            self.repository.delete_bucket(bucket_name)
+        return moved, remaining
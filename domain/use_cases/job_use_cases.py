@@ -0,0 +1,441 @@
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Deque, Dict, List, Optional, Set
+from domain.entities.job import (
+    CANCELLED,
+    COPY,
+    DELETE,
+    FAILED,
+    FINISHED,
+    KINDS,
+    PREPARING,
+    QUEUED,
+    RUNNING,
+    SUCCEEDED,
+    SYNC,
+    UPLOAD,
+    Job,
+)
+from domain.entities.s3_object import S3Object
+from domain.interfaces.job_store import JobStore
+from domain.interfaces.s3_repository import S3Repository
+from domain.use_cases.sync_use_cases import SyncUseCases
+
+DELETE_BATCH_SIZE = 1000
+# Seconds between checkpoints of a running job; status changes are saved
+# at once.
+CHECKPOINT_INTERVAL = 2.0
+
+
+class _Stopped(Exception):
+    """Ends a job's run when it is cancelled or the process shuts down."""
+
+
+class JobUseCases:
+    def __init__(
+        self,
+        repository: S3Repository,
+        store: JobStore,
+        max_jobs: int = 2,
+        concurrency: int = 8,
+        sync_root: Optional[str] = None,
+    ):
+        """
+        Bulk operations running in the background as jobs.
+
+        At most max_jobs run at a time, each with up to concurrency S3
+        requests in flight; the others wait in a queue. Jobs are
+        checkpointed to store while they run, and resume() continues the
+        queued and interrupted ones after a restart: an upload with the
+        files not sent yet, a copy after the last key copied without gaps,
+        a delete or sync by listing what is left to do.
+
+        Sync jobs only reach local directories inside sync_root, given
+        relative to it; without a sync_root they are refused.
+
+        :param repository: Repository the jobs run against
+        :param store: Where jobs are checkpointed
+        :param max_jobs: Jobs running at the same time
+        :param concurrency: Requests in flight per job
+        :param sync_root: Directory holding the local side of sync jobs
+        """
+        self.repository = repository
+        self.store = store
+        self.concurrency = concurrency
+        self.sync_root = sync_root
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_jobs, thread_name_prefix="s3-job"
+        )
+        self._jobs: Dict[str, Job] = {}
+        self._cancelled: Set[str] = set()
+        self._saved_at: Dict[str, float] = {}
+        self._stopping = False
+        self._lock = threading.Lock()
+        self._runners = {
+            UPLOAD: self._upload,
+            DELETE: self._delete,
+            COPY: self._copy,
+            SYNC: self._sync,
+        }
+
+    def resume(self) -> int:
+        """Load the checkpointed jobs and requeue the unfinished ones."""
+        resumed = 0
+        with self._lock:
+            for job in sorted(self.store.load_all(), key=lambda job: job.created_at):
+                self._jobs[job.job_id] = job
+                if job.status == PREPARING:
+                    job.status = FAILED
+                    job.error = "Interrupted while receiving its files"
+                    job.finished_at = time.time()
+                    self.store.save(job)
+                elif job.status in (QUEUED, RUNNING):
+                    job.status = QUEUED
+                    self._submit(job)
+                    resumed += 1
+        return resumed
+
+    def create(self, kind: str, params: Dict) -> Job:
+        """Queue a job; raises ValueError for invalid parameters."""
+        return self._add(kind, params, QUEUED)
+
+    def prepare(self, kind: str, params: Dict) -> Job:
+        """A job that waits for its files_directory to be filled; see start."""
+        return self._add(kind, params, PREPARING)
+
+    def start(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != PREPARING:
+                return None
+            job.status = QUEUED
+            self._submit(job)
+            return _snapshot(job)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return None if job is None else _snapshot(job)
+
+    def list_jobs(self) -> List[Job]:
+        with self._lock:
+            return [
+                _snapshot(job)
+                for job in sorted(self._jobs.values(), key=lambda job: job.created_at)
+            ]
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a job, or forget it if it is already finished. A running
+        job stops after the requests it has in flight.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status in FINISHED:
+                del self._jobs[job_id]
+                self.store.delete(job_id)
+                return _snapshot(job)
+            self._cancelled.add(job_id)
+            if job.status in (PREPARING, QUEUED):
+                self._finish(job, CANCELLED)
+            return _snapshot(job)
+
+    def files_directory(self, job_id: str) -> str:
+        return self.store.files_directory(job_id)
+
+    def shutdown(self) -> None:
+        """Stop running jobs where they are; resume() continues them."""
+        with self._lock:
+            self._stopping = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _add(self, kind: str, params: Dict, status: str) -> Job:
+        _validate(kind, params)
+        if kind == SYNC:
+            local_dir = self._sync_directory(params["local_dir"])
+            if params.get("direction", "upload") == "upload" and not os.path.isdir(
+                local_dir
+            ):
+                raise ValueError(f"{params['local_dir']} is not a directory")
+            params = {**params, "local_dir": local_dir}
+        job = Job(uuid.uuid4().hex, kind, params, status)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            if status == QUEUED:
+                self._submit(job)
+            else:
+                self.store.save(job)
+            return _snapshot(job)
+
+    def _submit(self, job: Job) -> None:
+        self.store.save(job)
+        self.executor.submit(self._run, job)
+
+    def _run(self, job: Job) -> None:
+        with self._lock:
+            if job.status != QUEUED or self._stopping:
+                return
+            job.status = RUNNING
+            job.resumed_at = time.monotonic()
+            self.store.save(job)
+        status, error = None, None
+        try:
+            self._runners[job.kind](job)
+            status = SUCCEEDED
+            if job.failed:
+                status, error = FAILED, f"{job.failed} objects failed"
+        except _Stopped:
+            if job.job_id in self._cancelled:
+                status = CANCELLED
+        except Exception as e:
+            logging.error(f"Error running job {job.job_id}: {e}")
+            status, error = FAILED, str(e)
+        with self._lock:
+            job.active_seconds = job.elapsed
+            job.resumed_at = None
+            if status is None:
+                # Shutting down: the job stays running in its checkpoint.
+                self.store.save(job)
+            else:
+                self._finish(job, status, error)
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None) -> None:
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        self.store.save(job)
+        self._saved_at.pop(job.job_id, None)
+        if job.kind == UPLOAD:
+            shutil.rmtree(self.store.files_directory(job.job_id), ignore_errors=True)
+
+    def _sync_directory(self, local_dir: str) -> str:
+        """local_dir resolved under sync_root; ValueError if it escapes."""
+        if self.sync_root is None:
+            raise ValueError("Sync jobs are disabled: no sync root is configured")
+        root = os.path.realpath(self.sync_root)
+        path = os.path.realpath(os.path.join(root, local_dir))
+        if path != root and not path.startswith(os.path.join(root, "")):
+            raise ValueError(f"{local_dir} is outside of the sync root")
+        return path
+
+    def _advance(
+        self,
+        job: Job,
+        objects: int = 0,
+        size: int = 0,
+        failed: int = 0,
+        checkpoint: Optional[Dict] = None,
+    ) -> None:
+        with self._lock:
+            job.objects_done += objects
+            job.bytes_done += size
+            job.failed += failed
+            if checkpoint is not None:
+                job.checkpoint = checkpoint
+            now = time.monotonic()
+            if now - self._saved_at.get(job.job_id, 0) >= CHECKPOINT_INTERVAL:
+                self._saved_at[job.job_id] = now
+                self.store.save(job)
+
+    def _stopped(self, job: Job) -> bool:
+        return self._stopping or job.job_id in self._cancelled
+
+    def _check(self, job: Job) -> None:
+        if self._stopped(job):
+            raise _Stopped()
+
+    def _upload(self, job: Job) -> None:
+        # Files are removed once uploaded, so what is left is what to do.
+        bucket_name, prefix = job.params["bucket"], job.params.get("prefix", "")
+        directory = self.store.files_directory(job.job_id)
+        files = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(directory)
+            for name in names
+        )
+        sizes = {path: os.path.getsize(path) for path in files}
+        with self._lock:
+            if job.objects_total is None:
+                job.objects_total = len(files)
+                job.bytes_total = sum(sizes.values())
+
+        def settle(done):
+            for future in done:
+                path = in_flight.pop(future)
+                if future.result():
+                    os.remove(path)
+                    self._advance(job, 1, sizes[path])
+                else:
+                    self._advance(job, failed=1)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            in_flight = {}
+            for path in files:
+                self._check(job)
+                if len(in_flight) >= self.concurrency:
+                    settle(wait(in_flight, return_when=FIRST_COMPLETED).done)
+                object_key = prefix + os.path.relpath(path, directory).replace(
+                    os.sep, "/"
+                )
+                future = executor.submit(
+                    self.repository.put_object, bucket_name, path, None, object_key
+                )
+                in_flight[future] = path
+            settle(wait(in_flight).done)
+
+    def _delete(self, job: Job) -> None:
+        # Deleted keys drop out of the listing, so a resumed job just lists
+        # again. Each round hands delete_objects enough keys for one
+        # DeleteObjects batch per request it runs in parallel.
+        bucket_name, prefix = job.params["bucket"], job.params["prefix"]
+        objects = self.repository.iter_objects(bucket_name, prefix=prefix or None)
+        while batch := list(islice(objects, DELETE_BATCH_SIZE * self.concurrency)):
+            self._check(job)
+            deleted = self.repository.delete_objects(
+                bucket_name, (obj.key for obj in batch)
+            )
+            size = sum(obj.size for obj in batch)
+            self._advance(
+                job, deleted, size * deleted // len(batch), len(batch) - deleted
+            )
+
+    def _copy(self, job: Job) -> None:
+        params = job.params
+        bucket_name, prefix = params["bucket"], params.get("prefix", "")
+        destination_bucket = params.get("destination_bucket") or bucket_name
+        destination_prefix = params["destination_prefix"]
+        move = params.get("move", False)
+        objects = self.repository.iter_objects(
+            bucket_name,
+            prefix=prefix or None,
+            start_after=job.checkpoint.get("after"),
+        )
+        # Copies finish out of order, while the checkpoint may only pass a
+        # key once all keys before it are done: [object, copied] in key
+        # order, and the done ones at the front moved to finished.
+        order: Deque[list] = deque()
+        finished = []
+
+        def settle(done, last: bool = False):
+            for future in done:
+                in_flight.pop(future)[1] = future.result()
+            while order and order[0][1] is not None:
+                finished.append(order.popleft())
+            # A move deletes the copied sources in DeleteObjects batches.
+            if finished and (last or not move or len(finished) >= DELETE_BATCH_SIZE):
+                self._finish_copies(job, bucket_name, finished, move)
+                finished.clear()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            in_flight = {}
+            for obj in objects:
+                self._check(job)
+                if len(in_flight) >= self.concurrency:
+                    settle(wait(in_flight, return_when=FIRST_COMPLETED).done)
+                entry = [obj, None]
+                order.append(entry)
+                future = executor.submit(
+                    self.repository.copy_object,
+                    bucket_name,
+                    obj.key,
+                    destination_prefix + obj.key[len(prefix) :],
+                    destination_bucket,
+                )
+                in_flight[future] = entry
+            settle(wait(in_flight).done, last=True)
+
+    def _finish_copies(
+        self, job: Job, bucket_name: str, finished: List[list], move: bool
+    ) -> None:
+        copied: List[S3Object] = [obj for obj, ok in finished if ok]
+        done = len(copied)
+        if move and copied:
+            done = self.repository.delete_objects(
+                bucket_name, [obj.key for obj in copied]
+            )
+        self._advance(
+            job,
+            done,
+            sum(obj.size for obj in copied),
+            len(finished) - done,
+            {"after": finished[-1][0].key},
+        )
+
+    def _sync(self, job: Job) -> None:
+        # Planning compares both sides, so a resumed sync only plans what
+        # is still different.
+        params = job.params
+        # Checked again, as a symlink may have changed since it was queued.
+        local_dir = self._sync_directory(params["local_dir"])
+        sync = SyncUseCases(self.repository)
+        if params.get("direction", "upload") == "upload":
+            plan = sync.plan_upload(
+                local_dir,
+                params["bucket"],
+                params.get("prefix", ""),
+                params.get("delete", False),
+                params.get("checksum", False),
+            )
+        else:
+            plan = sync.plan_download(
+                params["bucket"],
+                local_dir,
+                params.get("prefix", ""),
+                params.get("delete", False),
+                params.get("checksum", False),
+            )
+        with self._lock:
+            job.objects_total = job.objects_done + len(plan.actions)
+            job.bytes_total = job.bytes_done + plan.total_bytes
+        reported = 0
+
+        def progress(action):
+            nonlocal reported
+            reported += 1
+            self._advance(job, 1, action.size)
+
+        result = sync.execute(
+            plan, self.concurrency, progress, lambda: self._stopped(job)
+        )
+        # Remote deletes are only counted in the result.
+        self._advance(job, result.objects - reported, failed=result.failed)
+        self._check(job)
+
+
+def _validate(kind: str, params: Dict) -> None:
+    if kind not in KINDS:
+        raise ValueError(f"Unknown job kind {kind}, expected one of {KINDS}")
+    if not params.get("bucket"):
+        raise ValueError("A job needs a bucket")
+    if kind == DELETE and not params.get("prefix"):
+        raise ValueError("A delete job needs a prefix")
+    if kind == COPY:
+        prefix = params.get("prefix", "")
+        destination_prefix = params.get("destination_prefix")
+        if destination_prefix is None:
+            raise ValueError("A copy job needs a destination_prefix")
+        same_bucket = params.get("destination_bucket") in (None, params["bucket"])
+        if same_bucket and destination_prefix.startswith(prefix):
+            # The copies would show up in the listing being copied.
+            raise ValueError("The destination must not be inside the source prefix")
+    if kind == SYNC:
+        if params.get("direction", "upload") not in ("upload", "download"):
+            raise ValueError("direction is upload or download")
+        if not params.get("local_dir"):
+            raise ValueError("A sync job needs a local_dir")
+
+
+def _snapshot(job: Job) -> Job:
+    copy = Job.from_state(job.state())
+    copy.active_seconds = job.active_seconds
+    copy.resumed_at = job.resumed_at
+    return copy
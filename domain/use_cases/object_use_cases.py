@@ -1,24 +1,161 @@
 from domain.interfaces.s3_repository import S3Repository
 from domain.entities.s3_object import S3Object
-from typing import List
+from domain.entities.s3_directory_listing import S3DirectoryListing
+from domain.entities.object_listing import ObjectListing
+from typing import Callable, Dict, Iterable, Iterator, Optional
 
 
 class ObjectUseCases:
     def __init__(self, repository: S3Repository):
         self.repository = repository
 
-    def get_objects(self, bucket_name: str) -> List[S3Object]:
-        return self.repository.list_objects(bucket_name)
+    def get_objects(
+        self,
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        start_after: Optional[str] = None,
+        page_size: int = 1000,
+    ) -> Iterator[S3Object]:
+        return self.repository.iter_objects(
+            bucket_name, prefix=prefix, start_after=start_after, page_size=page_size
+        )
+
+    def get_object_listing(
+        self,
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        start_after: Optional[str] = None,
+        page_size: int = 1000,
+    ) -> ObjectListing:
+        return ObjectListing.from_objects(
+            self.get_objects(bucket_name, prefix, start_after, page_size)
+        )
+
+    def get_directory(
+        self, bucket_name: str, prefix: str = "", delimiter: str = "/"
+    ) -> S3DirectoryListing:
+        return self.repository.list_directory(bucket_name, prefix, delimiter)
+
+    def iter_directory(
+        self,
+        bucket_name: str,
+        prefix: str = "",
+        delimiter: str = "/",
+        page_size: int = 1000,
+    ) -> Iterator[S3DirectoryListing]:
+        return self.repository.iter_directory(
+            bucket_name, prefix, delimiter, page_size
+        )
 
-    def put_object(self, bucket_name: str, file_path: str) -> bool:
-        return self.repository.put_object(bucket_name, file_path)
+    def put_object(
+        self,
+        bucket_name: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+        object_key: Optional[str] = None,
+    ) -> bool:
+        return self.repository.put_object(
+            bucket_name, file_path, progress_callback, object_key
+        )
+
+    def get_object(self, bucket_name: str, object_key: str) -> Optional[bytes]:
+        return self.repository.get_object(bucket_name, object_key)
+
+    def download_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        file_path: str,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> bool:
+        return self.repository.download_object(
+            bucket_name, object_key, file_path, progress_callback
+        )
 
     def generate_presigned_url(
-        self, bucket_name: str, file_name: str, expiration=3600
+        self,
+        bucket_name: str,
+        file_name: str,
+        expiration=3600,
+        client_method: str = "put_object",
     ) -> str:
         return self.repository.generate_presigned_url(
-            bucket_name, file_name, expiration
+            bucket_name, file_name, expiration, client_method
+        )
+
+    def generate_presigned_urls(
+        self,
+        bucket_name: str,
+        object_keys: Iterable[str],
+        expiration=3600,
+        client_method: str = "put_object",
+    ) -> Dict[str, str]:
+        return self.repository.generate_presigned_urls(
+            bucket_name, object_keys, expiration, client_method
         )
 
     def delete_object(self, bucket_name: str, object_key: str) -> bool:
         return self.repository.delete_object(bucket_name, object_key)
+
+    def delete_objects(self, bucket_name: str, object_keys: Iterable[str]) -> int:
+        return self.repository.delete_objects(bucket_name, object_keys)
+
+    def delete_prefix(self, bucket_name: str, prefix: str) -> int:
+        return self.repository.delete_objects(
+            bucket_name,
+            (obj.key for obj in self.repository.iter_objects(bucket_name, prefix)),
+        )
+
+    def copy_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        destination_key: str,
+        destination_bucket: Optional[str] = None,
+    ) -> bool:
+        return self.repository.copy_object(
+            bucket_name, object_key, destination_key, destination_bucket
+        )
+
+    def move_object(
+        self,
+        bucket_name: str,
+        object_key: str,
+        destination_key: str,
+        destination_bucket: Optional[str] = None,
+    ) -> bool:
+        return self.repository.move_object(
+            bucket_name, object_key, destination_key, destination_bucket
+        )
+
+    def move_prefix(
+        self,
+        bucket_name: str,
+        prefix: str,
+        destination_prefix: str,
+        destination_bucket: Optional[str] = None,
+    ) -> int:
+        """Raises ValueError when the destination is inside the source."""
+        if destination_inside_source(
+            bucket_name, prefix, destination_prefix, destination_bucket
+        ):
+            raise ValueError("The destination must not be inside the source prefix")
+        return self.repository.move_prefix(
+            bucket_name, prefix, destination_prefix, destination_bucket
+        )
+
+
+def destination_inside_source(
+    bucket_name: str,
+    prefix: str,
+    destination_prefix: str,
+    destination_bucket: Optional[str] = None,
+) -> bool:
+    """
+    Whether copies of the objects under prefix would land under it again,
+    where a move would delete them as sources. Moving onto the same prefix
+    is a no-op rather than this.
+    """
+    if (destination_bucket or bucket_name) != bucket_name:
+        return False
+    return destination_prefix != prefix and destination_prefix.startswith(prefix)
@@ -0,0 +1,265 @@
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+from domain.interfaces.s3_repository import S3Repository
+from domain.entities.s3_object import S3Object
+
+UPLOAD = "upload"
+DOWNLOAD = "download"
+DELETE_REMOTE = "delete-remote"
+DELETE_LOCAL = "delete-local"
+
+
+class SyncAction:
+    def __init__(
+        self,
+        kind: str,
+        key: str,
+        local_path: str,
+        size: int = 0,
+        mtime: Optional[float] = None,
+    ):
+        self.kind = kind
+        self.key = key
+        self.local_path = local_path
+        self.size = size
+        self.mtime = mtime
+
+    def __repr__(self):
+        return f"SyncAction(kind={self.kind}, key={self.key}, size={self.size})"
+
+
+class SyncPlan:
+    def __init__(self, bucket_name: str, actions: List[SyncAction], unchanged: int):
+        self.bucket_name = bucket_name
+        self.actions = actions
+        self.unchanged = unchanged
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(action.size for action in self.actions)
+
+    def count(self, kind: str) -> int:
+        return sum(1 for action in self.actions if action.kind == kind)
+
+
+class SyncResult:
+    def __init__(self):
+        self.objects = 0
+        self.bytes = 0
+        self.failed = 0
+        self.elapsed = 0.0
+
+    @property
+    def objects_per_second(self) -> float:
+        return self.objects / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.elapsed if self.elapsed else 0.0
+
+
+class SyncUseCases:
+    def __init__(self, repository: S3Repository):
+        self.repository = repository
+
+    def plan_upload(
+        self,
+        local_dir: str,
+        bucket_name: str,
+        prefix: str = "",
+        delete: bool = False,
+        checksum: bool = False,
+    ) -> SyncPlan:
+        """
+        Diff local_dir against bucket/prefix for a local -> S3 sync.
+
+        The remote side is streamed once and never held in memory; each
+        remote object is matched against the local stat table.
+        """
+        prefix = _normalize_prefix(prefix)
+        local_files = _scan_local(local_dir)
+        actions = []
+        unchanged = 0
+        for obj in self.repository.iter_objects(bucket_name, prefix=prefix or None):
+            relative_key = obj.key[len(prefix) :]
+            local = local_files.pop(relative_key, None)
+            if local is None:
+                if delete:
+                    actions.append(SyncAction(DELETE_REMOTE, obj.key, None))
+            elif _differs(local, obj, checksum, newer=lambda l, r: l > r):
+                actions.append(SyncAction(UPLOAD, obj.key, local[0], local[1]))
+            else:
+                unchanged += 1
+        for relative_key, (path, size, _) in local_files.items():
+            actions.append(SyncAction(UPLOAD, prefix + relative_key, path, size))
+        return SyncPlan(bucket_name, actions, unchanged)
+
+    def plan_download(
+        self,
+        bucket_name: str,
+        local_dir: str,
+        prefix: str = "",
+        delete: bool = False,
+        checksum: bool = False,
+    ) -> SyncPlan:
+        """
+        Diff bucket/prefix against local_dir for an S3 -> local sync.
+
+        Keys that would resolve outside local_dir ("../x", or through a
+        symlink) are logged and skipped.
+        """
+        prefix = _normalize_prefix(prefix)
+        local_files = _scan_local(local_dir)
+        root = os.path.join(os.path.realpath(local_dir), "")
+        actions = []
+        unchanged = 0
+        for obj in self.repository.iter_objects(bucket_name, prefix=prefix or None):
+            relative_key = obj.key[len(prefix) :]
+            if not relative_key or relative_key.endswith("/"):
+                continue
+            local = local_files.pop(relative_key, None)
+            if local is None or _differs(
+                local, obj, checksum, newer=lambda l, r: r > l
+            ):
+                path = os.path.join(local_dir, *relative_key.split("/"))
+                if not os.path.realpath(path).startswith(root):
+                    logging.error(f"Skipping {obj.key}: outside of {local_dir}")
+                    continue
+                actions.append(
+                    SyncAction(
+                        DOWNLOAD,
+                        obj.key,
+                        path,
+                        obj.size,
+                        _timestamp(obj.last_modified),
+                    )
+                )
+            else:
+                unchanged += 1
+        if delete:
+            for relative_key, (path, _, _) in local_files.items():
+                actions.append(SyncAction(DELETE_LOCAL, prefix + relative_key, path))
+        return SyncPlan(bucket_name, actions, unchanged)
+
+    def execute(
+        self,
+        plan: SyncPlan,
+        max_workers: int = 8,
+        progress_callback: Optional[Callable[[SyncAction], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+    ) -> SyncResult:
+        """
+        Run a plan's transfers on a bounded pool and batch remote deletes.
+
+        should_stop is checked as transfers finish; once it returns True the
+        transfers not started yet are dropped.
+        """
+        result = SyncResult()
+        started = time.monotonic()
+
+        remote_deletes = [a for a in plan.actions if a.kind == DELETE_REMOTE]
+        if remote_deletes:
+            deleted = self.repository.delete_objects(
+                plan.bucket_name, (action.key for action in remote_deletes)
+            )
+            result.objects += deleted
+            result.failed += len(remote_deletes) - deleted
+
+        transfers = [a for a in plan.actions if a.kind != DELETE_REMOTE]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._apply, plan.bucket_name, action): action
+                for action in transfers
+            }
+            for future in as_completed(futures):
+                action = futures[future]
+                if future.result():
+                    result.objects += 1
+                    result.bytes += action.size
+                    if progress_callback:
+                        progress_callback(action)
+                else:
+                    result.failed += 1
+                if should_stop is not None and should_stop():
+                    for pending in futures:
+                        pending.cancel()
+                    break
+
+        result.elapsed = time.monotonic() - started
+        return result
+
+    def _apply(self, bucket_name: str, action: SyncAction) -> bool:
+        if action.kind == UPLOAD:
+            return self.repository.put_object(
+                bucket_name, action.local_path, object_key=action.key
+            )
+        if action.kind == DOWNLOAD:
+            os.makedirs(os.path.dirname(action.local_path) or ".", exist_ok=True)
+            if not self.repository.download_object(
+                bucket_name, action.key, action.local_path
+            ):
+                return False
+            # Match the remote timestamp so a later upload sync sees no change.
+            os.utime(action.local_path, (action.mtime, action.mtime))
+            return True
+        if action.kind == DELETE_LOCAL:
+            try:
+                os.remove(action.local_path)
+                return True
+            except OSError:
+                return False
+        return False
+
+
+def _normalize_prefix(prefix: str) -> str:
+    prefix = (prefix or "").strip("/")
+    return prefix + "/" if prefix else ""
+
+
+def _scan_local(local_dir: str) -> Dict[str, Tuple[str, int, float]]:
+    files = {}
+    for root, _, names in os.walk(local_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            relative_key = os.path.relpath(path, local_dir).replace(os.sep, "/")
+            files[relative_key] = (path, stat.st_size, stat.st_mtime)
+    return files
+
+
+def _differs(
+    local: Tuple[str, int, float],
+    obj: S3Object,
+    checksum: bool,
+    newer: Callable[[float, float], bool],
+) -> bool:
+    path, size, mtime = local
+    if size != obj.size:
+        return True
+    # Multipart ETags ("<md5>-<parts>") are not a content MD5, so those
+    # objects fall back to the timestamp comparison.
+    etag = (obj.etag or "").strip('"')
+    if checksum and etag and "-" not in etag:
+        return _md5(path) != etag
+    return newer(mtime, _timestamp(obj.last_modified))
+
+
+def _timestamp(last_modified) -> float:
+    if isinstance(last_modified, datetime):
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        return last_modified.timestamp()
+    return float(last_modified)
+
+
+def _md5(path: str) -> str:
+    digest = hashlib.md5()
+    with open(path, "rb") as file_data:
+        for chunk in iter(lambda: file_data.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
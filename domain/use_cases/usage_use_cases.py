@@ -0,0 +1,26 @@
+from typing import Optional
+from domain.interfaces.s3_repository import S3Repository
+from domain.entities.bucket_usage import BucketUsage
+
+
+class UsageUseCases:
+    def __init__(self, repository: S3Repository):
+        self.repository = repository
+
+    def get_usage(
+        self,
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        depth: int = 1,
+        top: int = 10,
+    ) -> BucketUsage:
+        """
+        Aggregate sizes, counts and top-N objects in one streaming pass.
+
+        Listing in parallel is up to the repository: the CLI's du --parallel
+        wraps it in a ShardedS3Repository.
+        """
+        usage = BucketUsage(bucket_name, prefix or "", depth, top)
+        for obj in self.repository.iter_objects(bucket_name, prefix=prefix or None):
+            usage.add(obj)
+        return usage
@@ -0,0 +1,272 @@
+import fnmatch
+import logging
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from domain.use_cases.object_use_cases import ObjectUseCases
+
+# (size, mtime in ns) of a file, to tell whether it changed.
+Signature = Tuple[int, int]
+# Uploads queued per worker; changes beyond that wait marked, so a flush
+# every debounce / 4 keeps the workers busy without queueing every path.
+QUEUED_PER_WORKER = 32
+
+
+class WatchResult:
+    def __init__(self):
+        self.uploaded = 0
+        self.bytes = 0
+        self.deleted = 0
+        self.failed = 0
+
+    def add(self, other: "WatchResult") -> None:
+        self.uploaded += other.uploaded
+        self.bytes += other.bytes
+        self.deleted += other.deleted
+        self.failed += other.failed
+
+    def __bool__(self):
+        return bool(self.uploaded or self.deleted or self.failed)
+
+
+class _Change:
+    __slots__ = ("changed_at", "is_directory", "signature")
+
+    def __init__(self, changed_at: float, is_directory: bool):
+        self.changed_at = changed_at
+        self.is_directory = is_directory
+        self.signature: Optional[Signature] = None
+
+
+class WatchUseCases:
+    def __init__(
+        self,
+        object_use_cases: ObjectUseCases,
+        bucket_name: str,
+        local_dir: str,
+        prefix: str = "",
+        debounce: float = 1.0,
+        max_workers: int = 8,
+        exclude: Iterable[str] = (),
+    ):
+        """
+        Mirror the changes under local_dir into bucket/prefix as they happen.
+
+        notify() only marks a path as changed. Once a path has had no event
+        for debounce seconds, flush() looks at the file system to decide:
+        a file is uploaded, a missing path is deleted from the bucket, and
+        a directory that appeared has its files marked. A burst of events
+        on one path therefore costs at most one request. A file modified
+        within the last window, or whose size or mtime changed since the
+        last look, is still being written and waits for another window.
+
+        Uploads run on a pool of max_workers with a bounded queue, the rest
+        staying marked; a path is never uploaded twice at once, nor again
+        while unchanged since its last upload.
+        Deletes of a flush go out together as multi-object deletes. Memory
+        is bounded by the number of files, not of events.
+
+        :param object_use_cases: Uploads and deletes the objects
+        :param bucket_name: Bucket mirrored into
+        :param local_dir: Directory watched
+        :param prefix: Key prefix of local_dir in the bucket
+        :param debounce: Seconds a path must be quiet before it is mirrored
+        :param max_workers: Files uploaded in parallel
+        :param exclude: Glob patterns of relative paths or names to ignore
+        """
+        self.object_use_cases = object_use_cases
+        self.bucket_name = bucket_name
+        self.local_dir = os.path.abspath(local_dir)
+        prefix = (prefix or "").strip("/")
+        self.prefix = prefix + "/" if prefix else ""
+        self.debounce = debounce
+        self.max_in_flight = max_workers * QUEUED_PER_WORKER
+        self.exclude = tuple(exclude)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="s3-watch"
+        )
+        # Changed paths, oldest change first.
+        self._pending: "OrderedDict[str, _Change]" = OrderedDict()
+        self._uploading: Set[str] = set()
+        self._uploaded: Dict[str, Signature] = {}
+        self._completed = WatchResult()
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending) + len(self._uploading)
+
+    def notify(self, path: str, is_directory: bool = False) -> None:
+        """Mark path (absolute, or relative to local_dir) as changed."""
+        path = os.path.join(self.local_dir, path)
+        if self._relative(path) is None:
+            return
+        with self._lock:
+            self._mark(path, is_directory, time.monotonic())
+
+    def flush(self) -> WatchResult:
+        """
+        Mirror the paths that have been quiet for a whole window.
+
+        Returns the uploads finished and the deletes made since the last
+        flush.
+        """
+        deletes: List[Tuple[str, bool]] = []
+        for path, change in self._take_quiet():
+            try:
+                status = os.stat(path)
+            except FileNotFoundError:
+                deletes.append((path, change.is_directory))
+                continue
+            except OSError as e:
+                logging.error(f"Error reading {path}: {e}")
+                continue
+            if stat.S_ISDIR(status.st_mode):
+                self._mark_directory(path)
+                continue
+            signature = (status.st_size, status.st_mtime_ns)
+            # Unchanged since the last look, or not written for a window.
+            stable = signature == change.signature or (
+                time.time() - status.st_mtime >= self.debounce
+            )
+            with self._lock:
+                if not stable:
+                    if path not in self._pending:
+                        change.signature = signature
+                        change.changed_at = time.monotonic()
+                        self._pending[path] = change
+                elif self._uploaded.get(path) != signature:
+                    self._uploading.add(path)
+                    self.executor.submit(self._upload, path, signature)
+        deleted = self._delete(deletes)
+        with self._lock:
+            completed, self._completed = self._completed, WatchResult()
+        completed.deleted += deleted
+        return completed
+
+    def close(self, wait: bool = True) -> WatchResult:
+        """
+        Stop uploading; with wait, after the uploads already started.
+
+        Returns the uploads finished since the last flush.
+        """
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+        with self._lock:
+            completed, self._completed = self._completed, WatchResult()
+        return completed
+
+    def _take_quiet(self) -> List[Tuple[str, _Change]]:
+        now = time.monotonic()
+        quiet = []
+        with self._lock:
+            room = self.max_in_flight - len(self._uploading)
+            while self._pending and len(quiet) < room:
+                path, change = next(iter(self._pending.items()))
+                if now - change.changed_at < self.debounce:
+                    break
+                del self._pending[path]
+                if path in self._uploading:
+                    # Changed while uploading; look again once it is done.
+                    change.changed_at = now
+                    self._pending[path] = change
+                    continue
+                quiet.append((path, change))
+        return quiet
+
+    def _mark(self, path: str, is_directory: bool, now: float) -> None:
+        change = self._pending.pop(path, None)
+        if change is None:
+            change = _Change(now, is_directory)
+        else:
+            change.changed_at = now
+            change.is_directory = change.is_directory or is_directory
+        self._pending[path] = change
+
+    def _mark_directory(self, directory: str) -> None:
+        # A directory moved or copied in may come without events for its
+        # files.
+        now = time.monotonic()
+        for root, _, names in os.walk(directory):
+            with self._lock:
+                for name in names:
+                    path = os.path.join(root, name)
+                    if self._relative(path) is not None:
+                        self._mark(path, False, now)
+
+    def _upload(self, path: str, signature: Signature) -> None:
+        key = self.prefix + self._relative(path)
+        try:
+            uploaded = self.object_use_cases.put_object(
+                self.bucket_name, path, object_key=key
+            )
+        except OSError:
+            uploaded = False
+        if not uploaded and _signature(path) != signature:
+            # Removed or replaced while uploading; its events mark it again.
+            uploaded = None
+        with self._lock:
+            self._uploading.discard(path)
+            if uploaded:
+                self._uploaded[path] = signature
+                self._completed.uploaded += 1
+                self._completed.bytes += signature[0]
+            elif uploaded is not None:
+                self._completed.failed += 1
+
+    def _delete(self, paths: List[Tuple[str, bool]]) -> int:
+        if not paths:
+            return 0
+        keys = []
+        directories = []
+        with self._lock:
+            for path, is_directory in paths:
+                if path in self._pending or path in self._uploading:
+                    continue  # Back since; looked at again later.
+                if is_directory:
+                    directories.append(path + os.sep)
+                else:
+                    self._uploaded.pop(path, None)
+                    keys.append(self.prefix + self._relative(path))
+            # The files of a directory moved out have no events of their own.
+            directories = _outermost(directories)
+            if directories:
+                for path in [p for p in self._uploaded if p.startswith(directories)]:
+                    del self._uploaded[path]
+        deleted = self.object_use_cases.delete_objects(self.bucket_name, keys)
+        for directory in directories:
+            prefix = self.prefix + self._relative(directory[:-1]) + "/"
+            deleted += self.object_use_cases.delete_prefix(self.bucket_name, prefix)
+        return deleted
+
+    def _relative(self, path: str) -> Optional[str]:
+        relative = os.path.relpath(path, self.local_dir)
+        if relative == "." or relative.split(os.sep, 1)[0] == "..":
+            return None
+        relative = relative.replace(os.sep, "/")
+        name = relative.rsplit("/", 1)[-1]
+        for pattern in self.exclude:
+            if fnmatch.fnmatch(relative, pattern) or fnmatch.fnmatch(name, pattern):
+                return None
+        return relative
+
+
+def _signature(path: str) -> Optional[Signature]:
+    try:
+        status = os.stat(path)
+    except OSError:
+        return None
+    return status.st_size, status.st_mtime_ns
+
+
+def _outermost(directories: List[str]) -> Tuple[str, ...]:
+    """The directories (ending with os.sep) not inside another of them."""
+    outermost: List[str] = []
+    for directory in sorted(set(directories)):
+        if not outermost or not directory.startswith(outermost[-1]):
+            outermost.append(directory)
+    return tuple(outermost)
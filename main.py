@@ -1,12 +1,15 @@
 import sys
-from presentation.flet_ui import S3FileExplorerApp
-from presentation.click_cli import cli
-import flet as ft
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:  # If there are arguments, assume CLI mode
+        # Imported here so CLI runs never load flet and the UI.
+        from presentation.click_cli import cli
+
         cli()  # Call the CLI entry point from cli.py
     else:
+        import flet as ft
+        from presentation.flet_ui import S3FileExplorerApp
+
         app = S3FileExplorerApp()
         # ft.app(target=app.main, view=ft.AppView.WEB_BROWSER)
         ft.app(target=app.main)
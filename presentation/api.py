@@ -1,39 +1,660 @@
-from domain.use_cases.bucket_use_cases import BucketUseCases
-from domain.use_cases.object_use_cases import ObjectUseCases
+from domain.use_cases.async_bucket_use_cases import AsyncBucketUseCases
+from domain.use_cases.async_object_use_cases import AsyncObjectUseCases
+from domain.use_cases.async_usage_use_cases import AsyncUsageUseCases
+from domain.use_cases.job_use_cases import JobUseCases
+from domain.entities.job import COPY, DELETE, FINISHED, SYNC, UPLOAD
 from adapters.boto3_s3_repository import Boto3S3Repository
+from adapters.executor_async_s3_repository import ExecutorAsyncS3Repository
+from adapters.instrumented_s3_repository import (
+    InstrumentedS3Repository,
+    instrument_s3_client,
+)
+from adapters.json_job_store import DEFAULT_JOBS_DIR, JsonJobStore
+from adapters.presign_caching_s3_repository import PresignCachingS3Repository
+from adapters.transfer_scheduler import BULK, is_throttling
+from adapters.metrics import REGISTRY
+from adapters.multipart_upload import MB
+from domain.entities.s3_object_stream import parse_byte_range
+from presentation.multipart_stream import MultipartFileStream
 
-import shutil
+import asyncio
+import json
 import os
+import posixpath
+import shutil
+from datetime import timezone
+from email.utils import format_datetime
+from typing import Dict, List, Optional
+
+from fastapi import (
+    FastAPI,
+    Path,
+    APIRouter,
+    File,
+    UploadFile,
+    Query,
+    Form,
+    Request,
+    Header,
+    HTTPException,
+    Body,
+)
+from fastapi.responses import (
+    PlainTextResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
+from starlette.concurrency import run_in_threadpool
+from botocore.exceptions import BotoCoreError, ClientError
+from python_multipart.exceptions import MultipartParseError
 
-from fastapi import FastAPI, Path, APIRouter, File, UploadFile
+s3_repository = Boto3S3Repository()
+instrument_s3_client(s3_repository.s3_client)
+repository = ExecutorAsyncS3Repository(
+    PresignCachingS3Repository(
+        InstrumentedS3Repository(
+            s3_repository, tracing=os.environ.get("S3_EXPLORER_TRACING") == "1"
+        )
+    )
+)
+bucket_use_cases = AsyncBucketUseCases(repository)
+object_use_cases = AsyncObjectUseCases(repository)
+usage_use_cases = AsyncUsageUseCases(repository)
+# Jobs run on their own threads and in the scheduler's bulk lane, so the
+# requests above go ahead of them.
+job_use_cases = JobUseCases(
+    InstrumentedS3Repository(Boto3S3Repository(lane=BULK)),
+    JsonJobStore(os.environ.get("S3_EXPLORER_JOBS_DIR", DEFAULT_JOBS_DIR)),
+    max_jobs=int(os.environ.get("S3_EXPLORER_MAX_JOBS", "2")),
+    # Sync jobs are refused unless a directory is set aside for them.
+    sync_root=os.environ.get("S3_EXPLORER_SYNC_ROOT"),
+)
 
-repository = Boto3S3Repository()
-bucket_use_cases = BucketUseCases(repository)
-object_use_cases = ObjectUseCases(repository)
+# With ?redirect=true, objects of at least this size are served by S3
+# through a presigned GET instead of being proxied by this process.
+REDIRECT_THRESHOLD = int(os.environ.get("S3_EXPLORER_REDIRECT_MB", "256")) * MB
+PRESIGNED_GET_EXPIRATION = 900
+PRESIGN_METHODS = ("put_object", "get_object")
+MAX_PRESIGN_BATCH = 1000
 
 
 router = APIRouter()
 
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Repository and S3 client metrics in the Prometheus text format."""
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4"
+    )
+
 @router.get("/buckets")
 async def get_buckets():
-    return {"buckets": bucket_use_cases.get_buckets()}
+    return {
+        "buckets": [
+            {"name": bucket.name, "creation_date": bucket.creation_date}
+            for bucket in await bucket_use_cases.get_buckets()
+        ]
+    }
 
 @router.get("/buckets/{bucket_name}")
-async def get_objects(bucket_name: str = Path(..., min_length=1)):
-    return { "bucket": f"bucket_name",
-        "objects": object_use_cases.get_objects(bucket_name)}
-
-@router.put("/buckets/{bucket_name}/upload")
-async def put_object(bucket_name: str = Path(..., min_length=1), file: UploadFile = File(...)):
-    contents = await file.read()
-    file.file.seek(0)
-    UPLOAD_DIR = "/tmp/uploads"
-    os.makedirs(UPLOAD_DIR, exist_ok=True)  # Create the folder if it doesn't exist
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+async def get_objects(
+    bucket_name: str = Path(..., min_length=1),
+    prefix: Optional[str] = None,
+    start_after: Optional[str] = None,
+    delimiter: Optional[str] = Query(None, min_length=1),
+    ndjson: bool = False,
+):
+    if delimiter:
+        try:
+            listing = await object_use_cases.get_directory(
+                bucket_name, prefix or "", delimiter
+            )
+        except ClientError as e:
+            raise listing_error(bucket_name, e)
+        return {
+            "bucket": bucket_name,
+            "prefix": listing.prefix,
+            "prefixes": listing.prefixes,
+            "objects": [json.loads(object_to_json(obj)) for obj in listing.objects],
+        }
+    # The first page is read before answering, so a missing bucket or a
+    # denied listing is an error status rather than a 200 with a cut body.
+    objects = object_use_cases.get_objects(
+        bucket_name, prefix=prefix, start_after=start_after
+    )
+    try:
+        first = await anext(objects, None)
+    except ClientError as e:
+        raise listing_error(bucket_name, e)
+    objects = prepend(first, objects)
+    if ndjson:
+        return StreamingResponse(
+            stream_objects_ndjson(objects), media_type="application/x-ndjson"
+        )
+    return StreamingResponse(
+        stream_objects_json(bucket_name, objects), media_type="application/json"
+    )
+
+
+@router.get("/buckets/{bucket_name}/stats")
+async def get_bucket_stats(
+    bucket_name: str = Path(..., min_length=1),
+    prefix: Optional[str] = None,
+    depth: int = Query(1, ge=0, le=16, description="Prefix levels with totals"),
+    top: int = Query(10, ge=0, le=1000, description="Largest/oldest objects"),
+    parallel: bool = False,
+):
+    """Sizes, counts, histogram and top-N objects in one streaming pass."""
+    try:
+        usage = await usage_use_cases.get_usage(
+            bucket_name, prefix, depth=depth, top=top, parallel=parallel
+        )
+    except ClientError as e:
+        raise listing_error(bucket_name, e)
+    return usage.to_dict()
+
+
+def listing_error(bucket_name: str, error: ClientError) -> HTTPException:
+    """A missing bucket is a 404 and a denied listing a 403; others are S3's."""
+    code = error.response.get("Error", {}).get("Code")
+    status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    if code == "NoSuchBucket" or status == 404:
+        return HTTPException(404, f"Bucket {bucket_name} not found")
+    if code == "AccessDenied" or status == 403:
+        return HTTPException(403, f"Access to {bucket_name} denied")
+    return HTTPException(502, f"Could not list {bucket_name}: {code or error}")
+
+
+async def prepend(first, objects):
+    if first is None:
+        return
+    yield first
+    async for obj in objects:
+        yield obj
+
+
+def object_to_json(obj) -> str:
+    return json.dumps(
+        {
+            "key": obj.key,
+            "size": obj.size,
+            "last_modified": obj.last_modified.isoformat(),
+        }
+    )
+
+
+async def stream_objects_ndjson(objects):
+    async for obj in objects:
+        yield object_to_json(obj) + "\n"
+
+
+async def stream_objects_json(bucket_name: str, objects):
+    yield f'{{"bucket": {json.dumps(bucket_name)}, "objects": ['
+    separator = ""
+    async for obj in objects:
+        yield separator + object_to_json(obj)
+        separator = ", "
+    yield "]}"
+
+
+@router.put(
+    "/buckets/{bucket_name}/upload",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                        "required": ["file"],
+                    }
+                }
+            },
+        }
+    },
+)
+async def put_object(request: Request, bucket_name: str = Path(..., min_length=1)):
+    """
+    Upload the file of a multipart form, parsed from the request body as it
+    arrives and sent on in multipart upload parts.
+    """
+    try:
+        upload = MultipartFileStream(request.headers, request.stream())
+        filename = await upload.open()
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if not filename:
+        raise HTTPException(422, "The form has no file field")
+    # The form is a little larger than the file; that only sizes parts.
+    return await upload_stream(
+        bucket_name, filename, upload.chunks(), body_size(request)
+    )
+
+
+@router.put("/buckets/{bucket_name}/objects/{object_key:path}")
+async def put_object_stream(
+    request: Request,
+    bucket_name: str = Path(..., min_length=1),
+    object_key: str = Path(..., min_length=1),
+    part_size: int = Query(8, ge=5, le=5 * 1024, description="Part size in MiB"),
+    max_in_flight: int = Query(4, ge=1, le=32),
+):
+    """Stream the raw request body into the object without buffering it."""
+    return await upload_stream(
+        bucket_name,
+        object_key,
+        request.stream(),
+        body_size(request),
+        part_size=part_size * MB,
+        max_in_flight=max_in_flight,
+    )
+
+
+async def upload_stream(
+    bucket_name: str, object_key: str, chunks, size: Optional[int], **options
+) -> dict:
+    try:
+        return {
+            "result": await object_use_cases.put_object_stream(
+                bucket_name, object_key, chunks, size=size, **options
+            )
+        }
+    except MultipartParseError as e:
+        raise HTTPException(400, str(e))
+    except ValueError as e:
+        # More than S3 stores in one object (or in MAX_PARTS parts).
+        raise HTTPException(413, str(e))
+
+
+def body_size(request: Request) -> Optional[int]:
+    length = request.headers.get("content-length", "")
+    return int(length) if length.isdigit() else None
+
+
+@router.get("/buckets/{bucket_name}/objects/{object_key:path}")
+async def get_object_stream(
+    bucket_name: str = Path(..., min_length=1),
+    object_key: str = Path(..., min_length=1),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None),
+    redirect: bool = Query(False, description="Redirect large objects to S3"),
+):
+    """
+    Stream the object body in small chunks without buffering it.
+
+    A single-range Range header becomes a ranged S3 GET (206), and
+    If-None-Match is checked by S3 so a cached copy costs no transfer (304).
+    With redirect, a HEAD decides first, so a large object is never opened.
+    """
+    byte_range = range_header if parse_byte_range(range_header) else None
+    if redirect:
+        try:
+            head = await object_use_cases.head_object(bucket_name, object_key)
+        except (ClientError, BotoCoreError) as e:
+            raise object_error(bucket_name, object_key, e)
+        if head is None:
+            raise HTTPException(404, f"Object {object_key} not found in {bucket_name}")
+        if if_none_match and if_none_match in (head.etag, "*"):
+            return Response(status_code=304, headers=object_headers(head))
+        if head.size >= REDIRECT_THRESHOLD:
+            url = await object_use_cases.generate_presigned_url(
+                bucket_name, object_key, PRESIGNED_GET_EXPIRATION, "get_object"
+            )
+            if url:
+                return RedirectResponse(url, status_code=307)
+
+    stream = await open_stream(bucket_name, object_key, byte_range, if_none_match)
+    if stream is None:
+        raise HTTPException(404, f"Object {object_key} not found in {bucket_name}")
+
+    headers = object_headers(stream)
+    if stream.status == 304:
+        return Response(status_code=304, headers=headers)
+    if stream.status == 416:
+        if stream.size is not None:
+            headers["Content-Range"] = f"bytes */{stream.size}"
+        return Response(status_code=416, headers=headers)
+
+    headers["Content-Length"] = str(stream.content_length)
+    if stream.content_range:
+        headers["Content-Range"] = stream.content_range
+    return StreamingResponse(
+        stream.chunks,
+        status_code=stream.status,
+        headers=headers,
+        media_type=stream.content_type or "application/octet-stream",
+    )
+
+
+async def open_stream(
+    bucket_name: str,
+    object_key: str,
+    byte_range: Optional[str],
+    if_none_match: Optional[str],
+):
+    try:
+        return await object_use_cases.open_object(
+            bucket_name, object_key, byte_range, if_none_match
+        )
+    except (ClientError, BotoCoreError) as e:
+        raise object_error(bucket_name, object_key, e)
+
+
+def object_error(bucket_name: str, object_key: str, error: Exception) -> HTTPException:
+    """A denied read is a 403 and a throttled one a 503; others are S3's."""
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code")
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        if code == "AccessDenied" or status == 403:
+            return HTTPException(403, f"Access to {object_key} denied")
+        if is_throttling(error):
+            return HTTPException(
+                503, f"S3 is throttling {bucket_name}", headers={"Retry-After": "1"}
+            )
+        error = code or error
+    return HTTPException(502, f"Could not read {object_key}: {error}")
+
+
+def object_headers(stream) -> dict:
+    headers = {"Accept-Ranges": "bytes"}
+    if stream.etag:
+        headers["ETag"] = stream.etag
+    if stream.last_modified:
+        headers["Last-Modified"] = format_datetime(
+            stream.last_modified.astimezone(timezone.utc), usegmt=True
+        )
+    return headers
+
+
+@router.post("/buckets/{bucket_name}/presign")
+async def presign_objects(
+    bucket_name: str = Path(..., min_length=1),
+    keys: List[str] = Body(..., embed=True),
+    method: str = Body("put_object", embed=True),
+    expiration: int = Body(3600, embed=True, ge=1, le=7 * 24 * 3600),
+):
+    """Presigned PUT or GET URLs for many keys in one call."""
+    if method not in PRESIGN_METHODS:
+        raise HTTPException(422, f"method must be one of {PRESIGN_METHODS}")
+    if len(keys) > MAX_PRESIGN_BATCH:
+        raise HTTPException(422, f"At most {MAX_PRESIGN_BATCH} keys per call")
+    urls = await object_use_cases.generate_presigned_urls(
+        bucket_name, keys, expiration, method
+    )
+    return {"bucket": bucket_name, "expiration": expiration, "urls": urls}
+
+
+@router.post("/buckets/{bucket_name}/multipart")
+async def create_presigned_upload(
+    bucket_name: str = Path(..., min_length=1),
+    key: str = Body(..., embed=True, min_length=1),
+    size: Optional[int] = Body(None, embed=True, ge=0),
+    part_size: int = Body(8, embed=True, ge=5, le=5 * 1024),
+    expiration: int = Body(3600, embed=True, ge=1, le=7 * 24 * 3600),
+    presigned_parts: int = Body(100, embed=True, ge=0, le=MAX_PRESIGN_BATCH),
+):
+    """
+    Start a multipart upload whose parts the client PUTs directly to S3,
+    in parallel, using presigned part URLs (part_size is in MiB).
+
+    Keep the upload_id to resume: list the uploaded parts, presign the
+    missing ones and complete.
+    """
+    upload = await object_use_cases.create_presigned_upload(
+        bucket_name,
+        key,
+        size=size,
+        part_size=part_size * MB,
+        expiration=expiration,
+        presigned_parts=presigned_parts,
+    )
+    if upload is None:
+        raise HTTPException(502, f"Could not start an upload of {key}")
+    return upload.to_dict()
+
+
+@router.post("/buckets/{bucket_name}/multipart/{upload_id}/parts")
+async def presign_upload_parts(
+    bucket_name: str = Path(..., min_length=1),
+    upload_id: str = Path(..., min_length=1),
+    key: str = Body(..., embed=True, min_length=1),
+    part_numbers: List[int] = Body(..., embed=True),
+    expiration: int = Body(3600, embed=True, ge=1, le=7 * 24 * 3600),
+):
+    if len(part_numbers) > MAX_PRESIGN_BATCH:
+        raise HTTPException(422, f"At most {MAX_PRESIGN_BATCH} parts per call")
+    if any(not 1 <= number <= 10000 for number in part_numbers):
+        raise HTTPException(422, "Part numbers range from 1 to 10000")
+    urls = await object_use_cases.presign_upload_parts(
+        bucket_name, key, upload_id, part_numbers, expiration
+    )
+    return {
+        "upload_id": upload_id,
+        "parts": [
+            {"part_number": number, "url": url} for number, url in sorted(urls.items())
+        ],
+    }
+
+
+@router.get("/buckets/{bucket_name}/multipart/{upload_id}")
+async def list_uploaded_parts(
+    bucket_name: str = Path(..., min_length=1),
+    upload_id: str = Path(..., min_length=1),
+    key: str = Query(..., min_length=1),
+):
+    """Parts already uploaded, to resume an interrupted upload."""
+    parts = await object_use_cases.list_uploaded_parts(bucket_name, key, upload_id)
+    if parts is None:
+        raise HTTPException(404, f"Upload {upload_id} of {key} not found")
+    return {
+        "upload_id": upload_id,
+        "parts": [
+            {
+                "part_number": part["PartNumber"],
+                "etag": part["ETag"],
+                "size": part["Size"],
+            }
+            for part in parts
+        ],
+    }
+
+
+@router.post("/buckets/{bucket_name}/multipart/{upload_id}/complete")
+async def complete_presigned_upload(
+    bucket_name: str = Path(..., min_length=1),
+    upload_id: str = Path(..., min_length=1),
+    key: str = Body(..., embed=True, min_length=1),
+    parts: Optional[List[Dict]] = Body(None, embed=True),
+):
+    """
+    Complete the upload. parts ([{"part_number", "etag"}]) is optional;
+    without it the uploaded parts are listed from S3.
+    """
+    if parts is not None:
+        try:
+            parts = [
+                {"PartNumber": int(part["part_number"]), "ETag": part["etag"]}
+                for part in parts
+            ]
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(422, "Parts need a part_number and an etag")
     return {
-        "result": object_use_cases.put_object(bucket_name, file_path)}
+        "result": await object_use_cases.complete_presigned_upload(
+            bucket_name, key, upload_id, parts
+        )
+    }
+
+
+@router.delete("/buckets/{bucket_name}/multipart/{upload_id}")
+async def abort_presigned_upload(
+    bucket_name: str = Path(..., min_length=1),
+    upload_id: str = Path(..., min_length=1),
+    key: str = Query(..., min_length=1),
+):
+    return {
+        "result": await object_use_cases.abort_multipart_upload(
+            bucket_name, key, upload_id
+        )
+    }
+
+
+@router.post("/jobs/upload", status_code=202)
+async def create_upload_job(
+    bucket: str = Form(..., min_length=1),
+    prefix: str = Form(""),
+    files: List[UploadFile] = File(...),
+):
+    """
+    Upload files in the background. The request only lasts until the files
+    are stored locally; the job then sends them to bucket under prefix.
+    """
+    paths = [upload_path(file.filename) for file in files]
+    job = job_use_cases.prepare(UPLOAD, {"bucket": bucket, "prefix": prefix})
+    directory = job_use_cases.files_directory(job.job_id)
+    try:
+        await run_in_threadpool(spool_files, directory, files, paths)
+    except BaseException:
+        job_use_cases.cancel(job.job_id)
+        raise
+    job = job_use_cases.start(job.job_id)
+    if job is None:
+        raise HTTPException(409, "The job was cancelled while receiving files")
+    return job.to_dict()
+
+
+@router.post("/jobs/delete", status_code=202)
+async def create_delete_job(
+    bucket: str = Body(..., embed=True, min_length=1),
+    prefix: str = Body(..., embed=True, min_length=1),
+):
+    """Delete every object under prefix in the background."""
+    return create_job(DELETE, {"bucket": bucket, "prefix": prefix})
+
+
+@router.post("/jobs/copy", status_code=202)
+async def create_copy_job(
+    bucket: str = Body(..., embed=True, min_length=1),
+    prefix: str = Body("", embed=True),
+    destination_prefix: str = Body(..., embed=True),
+    destination_bucket: Optional[str] = Body(None, embed=True, min_length=1),
+    move: bool = Body(False, embed=True),
+):
+    """Copy, or with move move, every object under prefix server-side."""
+    return create_job(
+        COPY,
+        {
+            "bucket": bucket,
+            "prefix": prefix,
+            "destination_prefix": destination_prefix,
+            "destination_bucket": destination_bucket,
+            "move": move,
+        },
+    )
+
+
+@router.post("/jobs/sync", status_code=202)
+async def create_sync_job(
+    bucket: str = Body(..., embed=True, min_length=1),
+    local_dir: str = Body(..., embed=True, min_length=1),
+    prefix: str = Body("", embed=True),
+    direction: str = Body("upload", embed=True),
+    delete: bool = Body(False, embed=True),
+    checksum: bool = Body(False, embed=True),
+):
+    """
+    Sync a directory of this server with bucket/prefix, like s3cli sync.
+    local_dir is relative to S3_EXPLORER_SYNC_ROOT and may not leave it.
+    """
+    return create_job(
+        SYNC,
+        {
+            "bucket": bucket,
+            "local_dir": local_dir,
+            "prefix": prefix,
+            "direction": direction,
+            "delete": delete,
+            "checksum": checksum,
+        },
+    )
+
+
+@router.get("/jobs")
+async def get_jobs():
+    return {"jobs": [job.to_dict() for job in job_use_cases.list_jobs()]}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str = Path(..., min_length=1)):
+    """Status and progress: objects and bytes done, rates and ETA."""
+    job = job_use_cases.get(job_id)
+    if job is None:
+        raise HTTPException(404, f"Job {job_id} not found")
+    return job.to_dict()
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    request: Request,
+    job_id: str = Path(..., min_length=1),
+    interval: float = Query(1.0, ge=0.1, le=60, description="Seconds per event"),
+):
+    """The job's progress as server-sent events, until it finishes."""
+    if job_use_cases.get(job_id) is None:
+        raise HTTPException(404, f"Job {job_id} not found")
+    return StreamingResponse(
+        job_events(request, job_id, interval),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str = Path(..., min_length=1)):
+    """Cancel a job; a finished job is removed instead."""
+    job = job_use_cases.cancel(job_id)
+    if job is None:
+        raise HTTPException(404, f"Job {job_id} not found")
+    return job.to_dict()
+
+
+def create_job(kind: str, params: dict) -> dict:
+    try:
+        return job_use_cases.create(kind, params).to_dict()
+    except ValueError as e:
+        raise HTTPException(422, str(e))
+
+
+async def job_events(request: Request, job_id: str, interval: float):
+    while True:
+        job = job_use_cases.get(job_id)
+        if job is None:
+            return
+        yield f"event: {job.status}\ndata: {json.dumps(job.to_dict())}\n\n"
+        if job.status in FINISHED or await request.is_disconnected():
+            return
+        await asyncio.sleep(interval)
+
+
+def upload_path(filename: Optional[str]) -> str:
+    """The relative key of an uploaded file, which may not leave its job."""
+    path = posixpath.normpath((filename or "").replace("\\", "/")).lstrip("/")
+    if path in ("", ".") or path == ".." or path.startswith("../"):
+        raise HTTPException(422, f"Invalid file name {filename!r}")
+    return path
+
+
+def spool_files(directory: str, files: List[UploadFile], paths: List[str]) -> None:
+    for file, path in zip(files, paths):
+        target = os.path.join(directory, *path.split("/"))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as spooled:
+            shutil.copyfileobj(file.file, spooled, MB)
+
 
 app = FastAPI()
 app.include_router(router)
+# Interrupted jobs continue from their checkpoints.
+app.add_event_handler("startup", job_use_cases.resume)
+app.add_event_handler("shutdown", job_use_cases.shutdown)
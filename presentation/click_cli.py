@@ -1,23 +1,132 @@
+import os
+import time
+from contextlib import contextmanager
+from functools import cached_property
+
 import click
-from domain.use_cases.bucket_use_cases import BucketUseCases
-from domain.use_cases.object_use_cases import ObjectUseCases
-from adapters.boto3_s3_repository import Boto3S3Repository
 
-repository = Boto3S3Repository()
-bucket_use_cases = BucketUseCases(repository)
-object_use_cases = ObjectUseCases(repository)
+
+class CliServices:
+    def __init__(self, s3_repository=None):
+        """
+        Repository and use cases of the CLI, built on first use.
+
+        Loading boto3 and creating the client is most of the CLI's start-up
+        time, so --help, --version and usage errors never pay for it.
+
+        :param s3_repository: Repository to use instead of Boto3S3Repository
+        """
+        if s3_repository is not None:
+            self.s3_repository = s3_repository
+
+    @cached_property
+    def s3_repository(self):
+        from adapters.boto3_s3_repository import Boto3S3Repository
+        from adapters.instrumented_s3_repository import instrument_s3_client
+
+        from adapters.transfer_scheduler import BULK
+
+        # Nothing interactive shares the process, so all of it is bulk work.
+        repository = Boto3S3Repository(lane=BULK)
+        instrument_s3_client(repository.s3_client)
+        return repository
+
+    @cached_property
+    def instrumented_repository(self):
+        from adapters.instrumented_s3_repository import InstrumentedS3Repository
+
+        return InstrumentedS3Repository(self.s3_repository)
+
+    @cached_property
+    def repository(self):
+        # Options like --parallel wrap this one further; the metrics stay on
+        # instrumented_repository.
+        return self.instrumented_repository
+
+    @cached_property
+    def bucket_use_cases(self):
+        from domain.use_cases.bucket_use_cases import BucketUseCases
+
+        return BucketUseCases(self.repository)
+
+    @cached_property
+    def object_use_cases(self):
+        from domain.use_cases.object_use_cases import ObjectUseCases
+
+        return ObjectUseCases(self.repository)
+
+    @cached_property
+    def sync_use_cases(self):
+        from domain.use_cases.sync_use_cases import SyncUseCases
+
+        return SyncUseCases(self.repository)
+
+    @cached_property
+    def usage_use_cases(self):
+        from domain.use_cases.usage_use_cases import UsageUseCases
+
+        return UsageUseCases(self.repository)
+
+    def configure_transfers(
+        self,
+        multipart_threshold: int = 64,
+        part_size: int = 16,
+        max_concurrency: int = 10,
+    ) -> None:
+        """Set the transfer tuning, with sizes given in MiB."""
+        from adapters.multipart_upload import MB, TransferConfig
+
+        self.s3_repository.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold * MB,
+            part_size=part_size * MB,
+            max_concurrency=max_concurrency,
+        )
+
+    def limit_bandwidth(self, mib_per_second: float) -> None:
+        """Cap the bytes all transfers move per second, given in MiB."""
+        from adapters.multipart_upload import MB
+        from adapters.s3_client_factory import get_transfer_scheduler
+
+        get_transfer_scheduler().max_bytes_per_second = mib_per_second * MB
+
+    def shard_listings(self, max_workers: int = 16, ordered: bool = True) -> None:
+        """
+        List objects as concurrent keyspace shards from now on.
+
+        Use cases capture the repository when built, so call this first.
+        """
+        from adapters.sharded_s3_repository import ShardedS3Repository
+
+        self.repository = ShardedS3Repository(
+            self.repository, max_workers=max_workers, ordered=ordered
+        )
+
+
+services = CliServices()
 
 
 @click.version_option("0.1.0", prog_name="s3cli")
 @click.group()
-def cli():
-    pass
+@click.option(
+    "--stats", is_flag=True, help="Print per-operation S3 metrics when done"
+)
+@click.option(
+    "--max-bandwidth",
+    type=click.FloatRange(0, min_open=True),
+    help="Cap uploads and downloads together at this many MiB/s",
+)
+@click.pass_context
+def cli(ctx, stats, max_bandwidth):
+    if max_bandwidth:
+        services.limit_bandwidth(max_bandwidth)
+    if stats:
+        ctx.call_on_close(print_stats)
 
 
 @cli.command()
 def list_buckets():
     """Lists all buckets"""
-    for bucket in bucket_use_cases.get_buckets():
+    for bucket in services.bucket_use_cases.get_buckets():
         click_print(bucket.name, bucket.creation_date)
 
 
@@ -25,15 +134,23 @@ def list_buckets():
 @click.option("--bucket", help="Name of the bucket to create", required=True)
 def create_bucket(bucket):
     """Create a bucket"""
-    bucket_use_cases.create_bucket(bucket_name=bucket)
+    services.bucket_use_cases.create_bucket(bucket_name=bucket)
 
 
 @cli.command()
 @click.option("--bucket", help="Name of the bucket to delete", required=True)
-def delete_bucket(bucket):
+@click.option(
+    "--force", is_flag=True, help="Delete all objects in the bucket first"
+)
+def delete_bucket(bucket, force):
     """Delete a bucket"""
-    if click.confirm(f"Delete bucket '{bucket}'?"):
-        if bucket_use_cases.delete_bucket(bucket_name=bucket):
+    prompt = f"Delete bucket '{bucket}'"
+    if force:
+        prompt += " and ALL of its objects"
+    if click.confirm(f"{prompt}?"):
+        if services.bucket_use_cases.delete_bucket(
+            bucket_name=bucket, force=force
+        ):
             click.echo(f"Bucket '{bucket}' deleted")
         else:
             click.echo(f"Could NOT delete bucket '{bucket}'")
@@ -43,10 +160,81 @@ def delete_bucket(bucket):
 
 @cli.command()
 @click.option("--bucket", help="Name of the bucket to list objects", required=True)
-def list_objects(bucket):
+@click.option("--prefix", help="Only list keys starting with this prefix")
+@click.option("--start-after", help="Only list keys after this key")
+@click.option(
+    "--page-size",
+    type=click.IntRange(1, 1000),
+    default=1000,
+    show_default=True,
+    help="Number of keys fetched per request",
+)
+@click.option(
+    "--delimiter",
+    help="List one level only, grouping deeper keys by this separator (e.g. /)",
+)
+@click.option(
+    "--parallel", is_flag=True, help="List keyspace shards concurrently"
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(1, 128),
+    default=16,
+    show_default=True,
+    help="Number of shards listed in parallel",
+)
+@click.option(
+    "--unordered",
+    is_flag=True,
+    help="With --parallel, print keys as shards return them, not in key order",
+)
+@click.option(
+    "--sort-by",
+    type=click.Choice(["size", "last_modified"]),
+    help="Print keys ordered by this field instead of by key",
+)
+@click.option("--reverse", is_flag=True, help="With --sort-by, largest or newest first")
+def list_objects(
+    bucket,
+    prefix,
+    start_after,
+    page_size,
+    delimiter,
+    parallel,
+    concurrency,
+    unordered,
+    sort_by,
+    reverse,
+):
     """Lists all objects in a bucket"""
-    for obj in object_use_cases.get_objects(bucket):
-        click_print(obj.key, obj.last_modified)
+    if parallel:
+        services.shard_listings(concurrency, ordered=not unordered)
+    if sort_by and delimiter:
+        raise click.BadParameter(
+            "cannot be combined with --delimiter", param_hint="'--sort-by'"
+        )
+    with reporting_s3_errors(f"list objects in '{bucket}'"):
+        if sort_by:
+            # The whole listing is held to sort it, in columns rather than objects.
+            listing = services.object_use_cases.get_object_listing(
+                bucket, prefix=prefix, start_after=start_after, page_size=page_size
+            )
+            for obj in listing.sort(sort_by, reverse=reverse):
+                click_print(obj.key, obj.last_modified)
+            return
+        if delimiter:
+            listing = services.object_use_cases.get_directory(
+                bucket, prefix or "", delimiter
+            )
+            for sub_prefix in listing.prefixes:
+                click.echo(f"{'PRE'.rjust(4)} {sub_prefix}")
+            for obj in listing.objects:
+                click_print(obj.key, obj.last_modified)
+            return
+        for obj in services.object_use_cases.get_objects(
+            bucket, prefix=prefix, start_after=start_after, page_size=page_size
+        ):
+            click_print(obj.key, obj.last_modified)
 
 
 @cli.command()
@@ -61,14 +249,91 @@ def list_objects(bucket):
     help="Path to file that should be uploaded to bucket",
     required=True,
 )
-def put_object(bucket, key):
+@click.option(
+    "--part-size",
+    type=click.IntRange(5, 5 * 1024),
+    default=16,
+    show_default=True,
+    help="Multipart part size in MiB",
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(1, 64),
+    default=10,
+    show_default=True,
+    help="Number of parts uploaded in parallel",
+)
+@click.option(
+    "--multipart-threshold",
+    type=click.IntRange(5, None),
+    default=64,
+    show_default=True,
+    help="Files at or above this size (MiB) are uploaded in parts",
+)
+def put_object(bucket, key, part_size, concurrency, multipart_threshold):
     """Put an object into bucket"""
-    if object_use_cases.put_object(bucket, key):
+    services.configure_transfers(multipart_threshold, part_size, concurrency)
+    with click.progressbar(
+        length=os.path.getsize(key), label="Uploading", show_pos=True
+    ) as bar:
+        uploaded = services.object_use_cases.put_object(bucket, key, bar.update)
+    if uploaded:
         click.echo(f"Object '{key}' uploaded to '{bucket}'.")
     else:
         click.echo("Upload failed!")
 
 
+@cli.command()
+@click.option("--bucket", help="Name of the bucket to download from", required=True)
+@click.option("--key", help="Key of the object to download", required=True)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    help="File to write to  [default: basename of the key]",
+)
+@click.option(
+    "--range-size",
+    type=click.IntRange(5, 5 * 1024),
+    default=16,
+    show_default=True,
+    help="Size of each ranged GET in MiB",
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(1, 64),
+    default=10,
+    show_default=True,
+    help="Number of ranges downloaded in parallel",
+)
+@click.option(
+    "--multipart-threshold",
+    type=click.IntRange(5, None),
+    default=64,
+    show_default=True,
+    help="Objects at or above this size (MiB) are downloaded in ranges",
+)
+def get_object(bucket, key, output, range_size, concurrency, multipart_threshold):
+    """Download an object from bucket, resuming an interrupted download"""
+    output = output or key.split("/")[-1]
+    services.configure_transfers(multipart_threshold, range_size, concurrency)
+    obj = next(
+        services.object_use_cases.get_objects(bucket, prefix=key, page_size=1), None
+    )
+    if obj is None or obj.key != key:
+        click.echo(f"Object '{key}' not found in '{bucket}'.")
+        return
+    with click.progressbar(
+        length=obj.size, label="Downloading", show_pos=True
+    ) as bar:
+        downloaded = services.object_use_cases.download_object(
+            bucket, key, output, bar.update
+        )
+    if downloaded:
+        click.echo(f"Object '{key}' downloaded to '{output}'.")
+    else:
+        click.echo("Download failed!")
+
+
 @cli.command()
 @click.option(
     "--bucket", help="Name of the bucket to delete object from", required=True
@@ -77,7 +342,7 @@ def put_object(bucket, key):
 def delete_object(bucket, key):
     """Delete an object from bucket"""
     if click.confirm(f"Delete object '{key}'?"):
-        if object_use_cases.delete_object(bucket, key):
+        if services.object_use_cases.delete_object(bucket, key):
             click.echo(f"object '{key}' deleted")
         else:
             click.echo(f"Could NOT delete object '{bucket,key}'")
@@ -85,6 +350,467 @@ def delete_object(bucket, key):
         click.echo("Delete Aborted!")
 
 
+@cli.command()
+@click.option(
+    "--bucket", help="Name of the bucket to delete objects from", required=True
+)
+@click.option(
+    "--prefix", help="Delete every object whose key starts with this", required=True
+)
+def delete_prefix(bucket, prefix):
+    """Recursively delete all objects under a prefix"""
+    if click.confirm(f"Delete all objects under '{prefix}' in '{bucket}'?"):
+        with reporting_s3_errors(f"delete all objects under '{prefix}'"):
+            deleted = services.object_use_cases.delete_prefix(bucket, prefix)
+        click.echo(f"{deleted} objects deleted")
+    else:
+        click.echo("Delete Aborted!")
+
+
+@cli.command()
+@click.option("--bucket", help="Name of the source bucket", required=True)
+@click.option("--key", help="Key of the object to copy", required=True)
+@click.option("--destination-key", help="Key of the copy", required=True)
+@click.option("--destination-bucket", help="Bucket of the copy  [default: --bucket]")
+def copy_object(bucket, key, destination_key, destination_bucket):
+    """Copy an object server-side"""
+    if services.object_use_cases.copy_object(
+        bucket, key, destination_key, destination_bucket
+    ):
+        click.echo(f"Object '{key}' copied to '{destination_key}'.")
+    else:
+        click.echo("Copy failed!")
+
+
+@cli.command()
+@click.option("--bucket", help="Name of the source bucket", required=True)
+@click.option("--key", help="Key of the object to move", required=True)
+@click.option("--destination-key", help="New key of the object", required=True)
+@click.option("--destination-bucket", help="New bucket of the object")
+def move_object(bucket, key, destination_key, destination_bucket):
+    """Move or rename an object server-side"""
+    if services.object_use_cases.move_object(
+        bucket, key, destination_key, destination_bucket
+    ):
+        click.echo(f"Object '{key}' moved to '{destination_key}'.")
+    else:
+        click.echo("Move failed!")
+
+
+@cli.command()
+@click.option("--bucket", help="Name of the source bucket", required=True)
+@click.option("--prefix", help="Prefix (folder) to move", required=True)
+@click.option("--destination-prefix", help="New prefix of the objects", required=True)
+@click.option("--destination-bucket", help="New bucket of the objects")
+@click.option(
+    "--concurrency",
+    type=click.IntRange(1, 128),
+    default=32,
+    show_default=True,
+    help="Number of objects copied in parallel",
+)
+def move_prefix(bucket, prefix, destination_prefix, destination_bucket, concurrency):
+    """Move or rename every object under a prefix server-side"""
+    services.configure_transfers(max_concurrency=concurrency)
+    try:
+        moved = services.object_use_cases.move_prefix(
+            bucket, prefix, destination_prefix, destination_bucket
+        )
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="'--destination-prefix'")
+    click.echo(f"{moved} objects moved")
+
+
+@cli.command()
+@click.option("--bucket", help="Name of the bucket to rename", required=True)
+@click.option("--new-name", help="New name of the bucket", required=True)
+def rename_bucket(bucket, new_name):
+    """Rename a bucket by moving all of its objects to a new bucket"""
+    services.configure_transfers(max_concurrency=32)
+    try:
+        with reporting_s3_errors(f"rename bucket '{bucket}'"):
+            result = services.bucket_use_cases.rename_bucket(bucket, new_name)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="'--new-name'")
+    if result is None:
+        click.echo(f"Could NOT create bucket '{new_name}'")
+        return
+    moved, remaining = result
+    if not remaining:
+        click.echo(f"Bucket '{bucket}' renamed to '{new_name}' ({moved} objects)")
+        return
+    click.echo(
+        f"Could NOT rename bucket '{bucket}': {moved} objects moved to "
+        f"'{new_name}', {remaining} left in '{bucket}', which was kept.\n"
+        f"Move the rest with: s3cli move-prefix --bucket {bucket} --prefix '' "
+        f"--destination-prefix '' --destination-bucket {new_name}\n"
+        f"then: s3cli delete-bucket --bucket {bucket}"
+    )
+    click.get_current_context().exit(1)
+
+
+@cli.command()
+@click.option("--bucket", help="Name of the bucket to summarise", required=True)
+@click.option("--prefix", help="Only count keys under this prefix")
+@click.option(
+    "--depth",
+    type=click.IntRange(0, 16),
+    default=1,
+    show_default=True,
+    help="Prefix levels that get their own totals",
+)
+@click.option(
+    "--top",
+    type=click.IntRange(0, 1000),
+    default=10,
+    show_default=True,
+    help="Number of largest and oldest objects to show",
+)
+@click.option(
+    "--parallel", is_flag=True, help="List keyspace shards concurrently"
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(1, 128),
+    default=16,
+    show_default=True,
+    help="Number of shards listed in parallel",
+)
+@click.option("--json", "as_json", is_flag=True, help="Print the report as JSON")
+def du(bucket, prefix, depth, top, parallel, concurrency, as_json):
+    """Disk usage of a bucket: per-prefix totals, size histogram, top objects"""
+    if parallel:
+        # Totals do not depend on key order, so take pages as they come.
+        services.shard_listings(concurrency, ordered=False)
+    with reporting_s3_errors(f"summarise '{bucket}'"):
+        usage = services.usage_use_cases.get_usage(
+            bucket, prefix, depth=depth, top=top
+        )
+    if as_json:
+        import json
+
+        click.echo(json.dumps(usage.to_dict(), indent=2))
+        return
+    click.echo(f"{'PREFIX':<50} {'OBJECTS':>10} {'SIZE':>10}")
+    for sub_prefix, (count, size) in sorted(usage.prefixes.items()):
+        name = usage.prefix + sub_prefix
+        click.echo(f"{name:<50} {count:>10} {format_size(size):>10}")
+    click.echo(
+        f"{'TOTAL':<50} {usage.objects:>10} {format_size(usage.total_size):>10}"
+    )
+    click.echo("\nSize histogram")
+    lower = 0
+    for bound, count in usage.histogram_buckets():
+        label = f"< {format_size(bound)}" if bound else f">= {format_size(lower)}"
+        click.echo(f"  {label:<12} {count:>10}")
+        lower = bound
+    if top:
+        click.echo("\nLargest objects")
+        for key, size in usage.largest():
+            click.echo(f"  {format_size(size):>10} {key}")
+        click.echo("\nOldest objects")
+        for key, last_modified in usage.oldest():
+            click.echo(f"  {last_modified:%Y-%m-%d %H:%M:%S} {key}")
+
+
+@cli.command()
+@click.option("--bucket", help="Name of the bucket to sync with", required=True)
+@click.option("--prefix", default="", help="Key prefix mirrored in the bucket")
+@click.option(
+    "--local-dir",
+    type=click.Path(file_okay=False),
+    help="Local directory to mirror",
+    required=True,
+)
+@click.option(
+    "--direction",
+    type=click.Choice(["upload", "download"]),
+    default="upload",
+    show_default=True,
+    help="upload mirrors the directory to S3, download the reverse",
+)
+@click.option("--delete", is_flag=True, help="Delete files missing from the source")
+@click.option(
+    "--checksum", is_flag=True, help="Compare MD5 with the ETag instead of mtime"
+)
+@click.option("--dry-run", is_flag=True, help="Only print what would be done")
+@click.option(
+    "--concurrency",
+    type=click.IntRange(1, 128),
+    default=8,
+    show_default=True,
+    help="Number of files transferred in parallel",
+)
+def sync(bucket, prefix, local_dir, direction, delete, checksum, dry_run, concurrency):
+    """Mirror a local directory and a bucket prefix, transferring only changes"""
+    if direction == "upload" and not os.path.isdir(local_dir):
+        raise click.BadParameter(f"'{local_dir}' is not a directory")
+    with reporting_s3_errors(f"plan the sync of '{bucket}'"):
+        if direction == "upload":
+            plan = services.sync_use_cases.plan_upload(
+                local_dir, bucket, prefix, delete, checksum
+            )
+        else:
+            plan = services.sync_use_cases.plan_download(
+                bucket, local_dir, prefix, delete, checksum
+            )
+
+    if dry_run:
+        for action in plan.actions:
+            click.echo(f"{action.kind.ljust(14)} {action.key}")
+        click.echo(
+            f"{len(plan.actions)} changes ({plan.total_bytes} bytes), "
+            f"{plan.unchanged} unchanged"
+        )
+        return
+
+    from adapters.multipart_upload import MB
+
+    with reporting_s3_errors(f"sync '{bucket}'"):
+        result = services.sync_use_cases.execute(plan, max_workers=concurrency)
+    click.echo(
+        f"{result.objects} objects, {result.bytes} bytes in {result.elapsed:.1f}s "
+        f"({result.objects_per_second:.1f} objects/s, "
+        f"{result.bytes_per_second / MB:.2f} MiB/s), "
+        f"{plan.unchanged} unchanged, {result.failed} failed"
+    )
+
+
+@cli.command()
+@click.option("--bucket", help="Name of the bucket to mirror into", required=True)
+@click.option("--prefix", default="", help="Key prefix mirrored in the bucket")
+@click.option(
+    "--local-dir",
+    type=click.Path(exists=True, file_okay=False),
+    help="Local directory to watch",
+    required=True,
+)
+@click.option(
+    "--debounce",
+    type=click.FloatRange(0.05, 60),
+    default=1.0,
+    show_default=True,
+    help="Seconds a file must be left alone before it is uploaded",
+)
+@click.option(
+    "--exclude",
+    multiple=True,
+    help="Glob of relative paths or file names to ignore (repeatable)",
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(1, 128),
+    default=8,
+    show_default=True,
+    help="Number of files uploaded in parallel",
+)
+def watch(bucket, prefix, local_dir, debounce, exclude, concurrency):
+    """Upload changes of a local directory to a bucket prefix until stopped
+
+    Only changes made while watching are mirrored; run sync first for the
+    files already there.
+    """
+    from adapters.watchdog_file_watcher import WatchdogFileWatcher
+    from domain.use_cases.watch_use_cases import WatchResult, WatchUseCases
+
+    watch_use_cases = WatchUseCases(
+        services.object_use_cases,
+        bucket,
+        local_dir,
+        prefix,
+        debounce=debounce,
+        max_workers=concurrency,
+        exclude=exclude,
+    )
+    watcher = WatchdogFileWatcher()
+    watcher.start(local_dir, watch_use_cases.notify)
+    click.echo(f"Watching '{local_dir}', press Ctrl+C to stop.", err=True)
+    totals = WatchResult()
+    try:
+        while True:
+            time.sleep(max(debounce / 4, 0.05))
+            result = watch_use_cases.flush()
+            if result:
+                totals.add(result)
+                click.echo(
+                    f"{time.strftime('%H:%M:%S')} uploaded {result.uploaded} "
+                    f"({format_size(result.bytes)}), deleted {result.deleted}, "
+                    f"failed {result.failed}"
+                )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+        totals.add(watch_use_cases.close())
+    click.echo(
+        f"{totals.uploaded} objects ({format_size(totals.bytes)}) uploaded, "
+        f"{totals.deleted} deleted, {totals.failed} failed, "
+        f"{watch_use_cases.pending} changes left unmirrored"
+    )
+
+
+def default_index_path() -> str:
+    from adapters.sqlite_object_index import DEFAULT_INDEX_PATH
+
+    return DEFAULT_INDEX_PATH
+
+
+index_db_option = click.option(
+    "--index-db",
+    type=click.Path(dir_okay=False),
+    default=lambda: os.environ.get("S3_EXPLORER_INDEX") or default_index_path(),
+    show_default="$S3_EXPLORER_INDEX or ~/.s3explorer/index.sqlite3",
+    help="SQLite file holding the local object index",
+)
+
+
+@cli.command()
+@click.option("--bucket", help="Name of the bucket to index", required=True)
+@click.option("--prefix", help="Only (re)index keys under this prefix")
+@click.option(
+    "--resume", is_flag=True, help="Continue an interrupted indexing run"
+)
+@click.option(
+    "--parallel", is_flag=True, help="List keyspace shards concurrently"
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(1, 128),
+    default=16,
+    show_default=True,
+    help="Number of shards listed in parallel",
+)
+@index_db_option
+def index_bucket(bucket, prefix, resume, parallel, concurrency, index_db):
+    """Build or refresh the local metadata index of a bucket"""
+    from adapters.indexed_s3_repository import IndexedS3Repository
+    from adapters.sqlite_object_index import SqliteObjectIndex
+
+    if parallel:
+        # Ordered, so the last committed key is still a valid resume point.
+        services.shard_listings(concurrency)
+    indexed = IndexedS3Repository(services.repository, SqliteObjectIndex(index_db))
+    with reporting_s3_errors(f"index '{bucket}'"):
+        count = indexed.refresh(bucket, prefix, resume=resume)
+    click.echo(f"{count} objects indexed")
+
+
+@cli.command()
+@click.option("--bucket", help="Name of the indexed bucket", required=True)
+@click.option("--prefix", help="Only match keys starting with this prefix")
+@click.option("--min-size", type=int, help="Minimum object size in bytes")
+@click.option("--max-size", type=int, help="Maximum object size in bytes")
+@click.option(
+    "--modified-after", type=click.DateTime(), help="Modified at or after (UTC)"
+)
+@click.option("--modified-before", type=click.DateTime(), help="Modified before (UTC)")
+@click.option(
+    "--sort",
+    type=click.Choice(["key", "size", "last_modified"]),
+    default="key",
+    show_default=True,
+)
+@click.option("--desc", is_flag=True, help="Sort in descending order")
+@click.option("--limit", type=int, help="Maximum number of rows")
+@click.option("--count", is_flag=True, help="Only print the count and total size")
+@index_db_option
+def search_objects(
+    bucket,
+    prefix,
+    min_size,
+    max_size,
+    modified_after,
+    modified_before,
+    sort,
+    desc,
+    limit,
+    count,
+    index_db,
+):
+    """Query the local object index without listing S3"""
+    from adapters.sqlite_object_index import SqliteObjectIndex
+
+    index = SqliteObjectIndex(index_db)
+    if not index.has_listing(bucket, prefix):
+        click.echo(f"Bucket '{bucket}' is not indexed, run index-bucket first.")
+        return
+    filters = dict(
+        prefix=prefix,
+        min_size=min_size,
+        max_size=max_size,
+        modified_after=modified_after,
+        modified_before=modified_before,
+    )
+    if count:
+        objects, total = index.count(bucket, **filters)
+        click.echo(f"{objects} objects, {total} bytes")
+        return
+    for obj in index.query(
+        bucket, order_by=sort, descending=desc, limit=limit, **filters
+    ):
+        click_print(obj.key, obj.last_modified)
+
+
+@contextmanager
+def reporting_s3_errors(action: str):
+    """Report an S3 error ending a command as a message, not a traceback."""
+    from botocore.exceptions import ClientError
+
+    try:
+        yield
+    except ClientError as e:
+        click.echo(f"Could NOT {action}: {e}", err=True)
+        click.get_current_context().exit(1)
+
+
+def print_stats():
+    if "instrumented_repository" not in vars(services):
+        return  # The command made no S3 calls.
+    from adapters.instrumented_s3_repository import S3_ERRORS
+
+    repository = services.instrumented_repository
+    rows = repository.summary()
+    if not rows:
+        return
+    click.echo(
+        f"{'METHOD':<26} {'CALLS':>7} {'FAILED':>7} {'P50 ms':>9} "
+        f"{'P95 ms':>9} {'P99 ms':>9} {'BYTES':>12}",
+        err=True,
+    )
+    for row in rows:
+        latencies = " ".join(
+            f"{row[q] * 1000:>9.1f}" if row[q] is not None else f"{'-':>9}"
+            for q in ("p50", "p95", "p99")
+        )
+        click.echo(
+            f"{row['method']:<26} {row['calls']:>7} {row['failures']:>7} "
+            f"{latencies} {row['bytes']:>12}",
+            err=True,
+        )
+    for labels, count in sorted(repository.registry.counters(S3_ERRORS).items()):
+        operation, code = (value for _, value in labels)
+        click.echo(f"S3 error {code} on {operation}: {int(count)}", err=True)
+    scheduler = getattr(services.s3_repository.s3_client, "scheduler", None)
+    stats = scheduler.stats() if scheduler else {}
+    if stats.get("throttles") or stats.get("retries"):
+        limits = ", ".join(
+            f"{name} {bucket['limit']}"
+            for name, bucket in sorted(stats["buckets"].items())
+        )
+        click.echo(
+            f"Throttled {stats['throttles']} times, retried {stats['retries']} "
+            f"requests; concurrency limits: {limits}",
+            err=True,
+        )
+
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if size < 1024 or unit == "TiB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
 def click_print(item, datetime):
     click.echo(f"{item.ljust(50)} Creation time: {datetime}")
 
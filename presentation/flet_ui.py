@@ -1,12 +1,28 @@
 import flet as ft
 import os
+import threading
+from bisect import bisect_left
+from heapq import merge
+from itertools import islice
 from domain.use_cases.bucket_use_cases import BucketUseCases
 from domain.use_cases.object_use_cases import ObjectUseCases
 from adapters.boto3_s3_repository import Boto3S3Repository
+from adapters.caching_s3_repository import CachingS3Repository
+from adapters.indexed_s3_repository import IndexedS3Repository
+from adapters.presign_caching_s3_repository import PresignCachingS3Repository
+from adapters.sqlite_object_index import SqliteObjectIndex
 
 
 class ITEM(ft.Row):
-    def __init__(self, text: str, datetime, on_delete, on_rename, object_bucket=None):
+    def __init__(
+        self,
+        text: str,
+        datetime,
+        on_delete,
+        on_rename,
+        object_bucket=None,
+        on_select=None,
+    ):
         """
         UI Component for displaying an S3 Bucket or Object.
 
@@ -14,34 +30,41 @@ class ITEM(ft.Row):
         :param datetime: Timestamp of creation/modification
         :param on_delete: Callback function for delete action
         :param on_rename: Callback function for rename action
+        :param on_select: Optional callback(name, selected) for multi-select
         """
         super().__init__()
         self.text_value = text
         self.object_bucket = object_bucket
         self.text_view = ft.Text(text)
         self.date_view = ft.Text(datetime.strftime("%Y-%m-%d %H:%M:%S"))
-        self.text_edit = ft.TextField(value=text, visible=False)
+        # Edit controls are only built when a row enters edit mode, keeping
+        # rows of large listings cheap.
+        self.text_edit = None
 
         self.edit_button = ft.IconButton(icon=ft.icons.EDIT, on_click=self.edit)
-        self.save_button = ft.IconButton(
-            icon=ft.icons.SAVE, on_click=self.save, visible=False
-        )
+        self.save_button = None
         self.delete_button = ft.IconButton(icon=ft.icons.DELETE, on_click=self.delete)
 
         self.on_delete = on_delete
         self.on_rename = on_rename
+        self.on_select = on_select
+        self.select_box = ft.Checkbox(on_change=self.select, visible=bool(on_select))
 
         self.controls = [
+            self.select_box,
             self.text_view,
             self.date_view,
-            self.text_edit,
-            # self.edit_button,
-            # self.save_button,
+            self.edit_button,
             self.delete_button,
         ]
 
     def edit(self, e):
         """Switch to edit mode."""
+        if self.text_edit is None:
+            self.text_edit = ft.TextField(value=self.text_value)
+            self.save_button = ft.IconButton(icon=ft.icons.SAVE, on_click=self.save)
+            position = self.controls.index(self.text_view) + 1
+            self.controls[position:position] = [self.text_edit, self.save_button]
         self.edit_button.visible = False
         self.save_button.visible = True
         self.text_view.visible = False
@@ -50,9 +73,9 @@ class ITEM(ft.Row):
 
     def save(self, e):
         """Save new name and update view."""
+        old_name = self.text_value
         new_name = self.text_edit.value.strip()
-        if new_name and new_name != self.text_value:
-            self.on_rename(self.text_value, new_name)  # Call rename handler
+        if new_name and new_name != old_name:
             self.text_value = new_name
 
         self.edit_button.visible = True
@@ -61,6 +84,13 @@ class ITEM(ft.Row):
         self.text_view.value = self.text_value
         self.text_edit.visible = False
         self.update()
+        # Last, since the handler may replace this row.
+        if self.text_value != old_name:
+            self.on_rename(old_name, new_name)  # Call rename handler
+
+    def select(self, e):
+        """Report selection changes to the select handler."""
+        self.on_select(self.text_value, self.select_box.value)
 
     def delete(self, e):
         """Call delete handler."""
@@ -70,11 +100,138 @@ class ITEM(ft.Row):
             self.on_delete(bucket_name=self.text_value)
 
 
+class FolderEntry:
+    def __init__(self, key: str):
+        """Sub-prefix shown as a folder row; key is the full prefix."""
+        self.key = key
+
+
+class IncrementalListView(ft.ListView):
+    def __init__(self, row_factory, page_size: int = 100, **kwargs):
+        """
+        ListView that renders a streamed listing page by page.
+
+        Rows are fetched and built on a background thread, one page at a
+        time, and the next page is loaded when the user scrolls near the
+        end. Rows are keyed so single objects can be inserted or removed
+        without rebuilding the list.
+
+        :param row_factory: Callback building a row control from an object
+        :param page_size: Number of rows rendered per page
+        """
+        super().__init__(
+            on_scroll=self.handle_scroll, on_scroll_interval=50, **kwargs
+        )
+        self.row_factory = row_factory
+        self.page_size = page_size
+        self.objects = None
+        self.keys = []
+        self.rows = {}
+        self.exhausted = True
+        self.generation = 0
+        self.fetch_lock = threading.Lock()
+        self.rows_lock = threading.Lock()
+
+    def did_mount(self):
+        self.load_more()
+
+    def reset(self, objects):
+        """Start rendering a new listing from an (unconsumed) iterator."""
+        with self.rows_lock:
+            self.generation += 1
+            self.objects = iter(objects)
+            self.keys = []
+            self.rows = {}
+            self.controls.clear()
+            self.exhausted = False
+        if self.page:
+            self.update()
+            self.load_more()
+
+    def load_more(self):
+        if not self.exhausted and self.page:
+            self.page.run_thread(self._load_page)
+
+    def handle_scroll(self, e: ft.OnScrollEvent):
+        if e.pixels >= e.max_scroll_extent - 200:
+            self.load_more()
+
+    def insert(self, obj):
+        """Insert or replace a single row in key order."""
+        with self.rows_lock:
+            self._remove(obj.key)
+            position = bisect_left(self.keys, obj.key)
+            if position == len(self.keys) and not self.exhausted:
+                return  # Not loaded yet; it will arrive with its page.
+            row = self.row_factory(obj)
+            self.keys.insert(position, obj.key)
+            self.rows[obj.key] = row
+            self.controls.insert(position, row)
+        self.update()
+
+    def remove(self, keys):
+        """Remove the rows of deleted keys."""
+        with self.rows_lock:
+            for key in keys:
+                self._remove(key)
+        self.update()
+
+    def _remove(self, key):
+        row = self.rows.pop(key, None)
+        if row is not None:
+            position = bisect_left(self.keys, key)
+            del self.keys[position]
+            del self.controls[position]
+
+    def _load_page(self):
+        if not self.fetch_lock.acquire(blocking=False):
+            return
+        # Read together, so a reset in between cannot pair this generation
+        # with the new listing.
+        with self.rows_lock:
+            generation, objects = self.generation, self.objects
+        try:
+            # The S3 round trip happens outside rows_lock so row inserts and
+            # removals stay responsive while a page is loading.
+            page = list(islice(objects, self.page_size))
+            with self.rows_lock:
+                if generation == self.generation:
+                    self.exhausted = len(page) < self.page_size
+                    for obj in page:
+                        if obj.key not in self.rows:
+                            row = self.row_factory(obj)
+                            self.keys.append(obj.key)
+                            self.rows[obj.key] = row
+                            self.controls.append(row)
+        except Exception as e:
+            with self.rows_lock:
+                # A failed old listing must not end the one that replaced it.
+                if generation == self.generation:
+                    self.exhausted = True
+            print(f"Error loading objects: {e}")
+        finally:
+            self.fetch_lock.release()
+        if generation != self.generation:
+            self.load_more()  # The listing was reset while this page loaded.
+        else:
+            self.update()
+
+
 class S3FileExplorerApp:
     def __init__(self):
         self.current_bucket = None
+        self.current_prefix = ""
         self.page = None
-        self.repository = Boto3S3Repository()
+        repository = Boto3S3Repository()
+        if os.environ.get("S3_EXPLORER_INDEX"):
+            # Open from the local index at once and reconcile in the background.
+            repository = IndexedS3Repository(
+                repository,
+                SqliteObjectIndex(os.environ["S3_EXPLORER_INDEX"]),
+                serve_stale=True,
+            )
+        self.listing_cache = CachingS3Repository(repository)
+        self.repository = PresignCachingS3Repository(self.listing_cache)
         self.bucket_use_cases = BucketUseCases(self.repository)
         self.object_use_cases = ObjectUseCases(self.repository)
 
@@ -127,7 +284,12 @@ class S3FileExplorerApp:
 
         def rename_bucket(old_name, new_name):
             """Rename bucket using use case."""
-            self.bucket_use_case.rename_bucket(old_name, new_name)
+            try:
+                result = self.bucket_use_cases.rename_bucket(old_name, new_name)
+                if result is not None and result[1]:
+                    print(f"{result[1]} objects could not be moved from {old_name}")
+            except ValueError as ex:
+                print(f"Error renaming bucket: {ex}")
             load_buckets()
 
         def add_bucket_dialog(e):
@@ -170,41 +332,103 @@ class S3FileExplorerApp:
         )
 
     def objects_view(self):
-        object_list_view = ft.ListView(expand=True, spacing=10, padding=10)
+        selected_keys = set()
+
+        def object_row(obj):
+            if isinstance(obj, FolderEntry):
+                return ft.ListTile(
+                    leading=ft.Icon(ft.icons.FOLDER),
+                    title=ft.Text(obj.key[len(self.current_prefix) :]),
+                    on_click=lambda e, p=obj.key: self.open_prefix(p),
+                )
+            return ft.ListTile(
+                title=ITEM(
+                    text=obj.key,
+                    datetime=obj.last_modified,
+                    on_delete=delete_object,
+                    on_rename=rename_object,
+                    object_bucket=self.current_bucket,
+                    on_select=select_object,
+                ),
+                on_click=lambda e, o=obj.key: self.on_object_click(o),
+            )
+
+        object_list_view = IncrementalListView(
+            object_row, expand=True, spacing=10, padding=10
+        )
 
         def load_objects():
             if not self.current_bucket:
                 print("No bucket selected.")
                 return
-            try:
-                object_list_view.controls.clear()
-                objects = self.object_use_cases.get_objects(self.current_bucket)
-                for obj in objects:
-                    object_control = ft.ListTile(
-                        title=ITEM(
-                            text=obj.key,
-                            datetime=obj.last_modified,
-                            on_delete=delete_object,
-                            on_rename=rename_object,
-                            object_bucket=self.current_bucket,
-                        ),
-                        on_click=lambda e, o=obj.key: self.on_object_click(o),
-                    )
-
-                    object_list_view.controls.append(object_control)
-                object_list_view.update()
-            except Exception as e:
-                print(f"Error loading objects: {e}")
+            selected_keys.clear()
+            object_list_view.reset(level_entries())
+
+        def level_entries():
+            """Folders and objects of the current level, a page at a time."""
+            # Each page is in key order and follows the previous one, so
+            # merging its folders and objects keeps the whole level sorted.
+            for page in self.object_use_cases.iter_directory(
+                self.current_bucket, self.current_prefix
+            ):
+                yield from merge(
+                    (FolderEntry(prefix) for prefix in page.prefixes),
+                    page.objects,
+                    key=lambda entry: entry.key,
+                )
+
+        def show_object(object_key):
+            """Insert or refresh the row of a single (new) object."""
+            relative_key = object_key[len(self.current_prefix) :]
+            if not object_key.startswith(self.current_prefix) or "/" in relative_key:
+                return
+            obj = next(
+                self.object_use_cases.get_objects(
+                    self.current_bucket, prefix=object_key, page_size=1
+                ),
+                None,
+            )
+            if obj is not None and obj.key == object_key:
+                object_list_view.insert(obj)
 
         def delete_object(bucket_name, object_key):
-            """Delete object from use case and refresh list."""
-            self.object_use_cases.delete_object(bucket_name, object_key)
-            load_objects()
+            """Delete object from use case and drop its row."""
+            if self.object_use_cases.delete_object(bucket_name, object_key):
+                selected_keys.discard(object_key)
+                object_list_view.remove([object_key])
+
+        def select_object(object_key, selected):
+            if selected:
+                selected_keys.add(object_key)
+            else:
+                selected_keys.discard(object_key)
+
+        def delete_selected(e):
+            """Delete all selected objects in batches and drop their rows."""
+            if selected_keys:
+                keys = list(selected_keys)
+                deleted = self.object_use_cases.delete_objects(
+                    self.current_bucket, keys
+                )
+                if deleted < len(keys):
+                    # The count does not say which keys failed: relist the
+                    # level so the objects still there keep their rows.
+                    print(f"Could not delete {len(keys) - deleted} objects")
+                    load_objects()
+                    return
+                selected_keys.clear()
+                object_list_view.remove(keys)
 
         def rename_object(old_name, new_name):
-            """Rename object using use case."""
-            self.object_use_cases.rename_object(old_name, new_name)
-            load_objects()
+            """Move the object server-side and swap its row."""
+            if self.object_use_cases.move_object(
+                self.current_bucket, old_name, new_name
+            ):
+                selected_keys.discard(old_name)
+                object_list_view.remove([old_name])
+                show_object(new_name)
+            else:
+                show_object(old_name)  # Rebuild the row with the old name.
 
         def add_object_dialog(e):
             file_picker = ""
@@ -213,10 +437,19 @@ class S3FileExplorerApp:
                 if self.page.web:
                     upload_list = []
                     if file_picker.result != None and file_picker.result.files != None:
+                        # One batch call signs every picked file.
+                        urls = self.object_use_cases.generate_presigned_urls(
+                            self.current_bucket,
+                            [
+                                self.current_prefix + f.name
+                                for f in file_picker.result.files
+                            ],
+                        )
                         for f in file_picker.result.files:
-                            url = self.object_use_cases.generate_presigned_url(
-                                self.current_bucket, f.name
-                            )
+                            url = urls.get(self.current_prefix + f.name)
+                            if url is None:
+                                print(f"Error presigning upload of {f.name}")
+                                continue
                             upload_list.append(
                                 ft.FilePickerUploadFile(
                                     f.name,
@@ -225,21 +458,34 @@ class S3FileExplorerApp:
                             )
                     try:
                         file_picker.upload(upload_list)
-                        load_objects()
                     except Exception as ex:
                         print(f"Error uploading object: {ex}")
                 else:
                     if file_picker.result != None and file_picker.result.files != None:
                         for f in file_picker.result.files:
                             try:
+                                object_key = self.current_prefix + os.path.basename(
+                                    f.path
+                                )
                                 self.object_use_cases.put_object(
-                                    bucket_name=self.current_bucket, file_path=f.path
+                                    bucket_name=self.current_bucket,
+                                    file_path=f.path,
+                                    object_key=object_key,
                                 )
-                                load_objects()
+                                show_object(object_key)
                             except Exception as ex:
                                 print(f"Error uploading object: {ex}")
 
-            file_picker = ft.FilePicker(on_result=file_picker_result)
+            def file_picker_upload(e: ft.FilePickerUploadEvent):
+                if e.progress == 1:
+                    # The browser PUT to S3 directly, past the listing cache.
+                    object_key = self.current_prefix + e.file_name
+                    self.listing_cache.invalidate(self.current_bucket, object_key)
+                    show_object(object_key)
+
+            file_picker = ft.FilePicker(
+                on_result=file_picker_result, on_upload=file_picker_upload
+            )
 
             self.page.overlay.append(file_picker)
             self.page.update()
@@ -253,10 +499,12 @@ class S3FileExplorerApp:
                 ft.Text(
                     f"Current Bucket: '{self.current_bucket}'", size=24, weight="bold"
                 ),
+                self.breadcrumb(),
                 object_list_view,
                 ft.Row(
                     [
                         ft.ElevatedButton("Add Object", on_click=add_object_dialog),
+                        ft.ElevatedButton("Delete Selected", on_click=delete_selected),
                         ft.ElevatedButton(
                             "Back to Buckets",
                             on_click=lambda _: self.page.go("/buckets"),
@@ -266,10 +514,30 @@ class S3FileExplorerApp:
             ],
         )
 
+    def breadcrumb(self):
+        """Clickable path from the bucket root to the current prefix."""
+        crumbs = [
+            ft.TextButton(self.current_bucket, on_click=lambda e: self.open_prefix(""))
+        ]
+        prefix = ""
+        for part in self.current_prefix.split("/")[:-1]:
+            prefix += part + "/"
+            crumbs.append(ft.Text("/"))
+            crumbs.append(
+                ft.TextButton(part, on_click=lambda e, p=prefix: self.open_prefix(p))
+            )
+        return ft.Row(crumbs, wrap=True)
+
     def open_objects_view(self, bucket_name):
         self.current_bucket = bucket_name
+        self.current_prefix = ""
         self.page.go("/objects")
 
+    def open_prefix(self, prefix):
+        """Drill into (or back up to) a prefix, fetching only that level."""
+        self.current_prefix = prefix
+        self.route_change(None)
+
     def on_object_click(self, object_key):
         print(f"Object selected: {object_key}")
 
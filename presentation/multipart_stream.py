@@ -0,0 +1,110 @@
+from collections import deque
+from typing import AsyncIterator, Deque, Mapping, Optional
+
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+
+class MultipartFileStream:
+    def __init__(
+        self,
+        headers: Mapping[str, str],
+        body: AsyncIterator[bytes],
+        field: str = "file",
+    ):
+        """
+        The file in a multipart/form-data body, read as the body arrives.
+
+        Starlette's form parsing spools uploaded files to temporary files
+        past 1 MB; here the body is parsed chunk by chunk and the data of
+        the first file part named field is handed on as it is parsed, so
+        no more than one received chunk is held. Other parts are skipped.
+
+        Raises MultipartParseError (a ValueError) on a malformed body.
+
+        :param headers: Request headers, for the Content-Type boundary
+        :param body: The raw request body, e.g. Request.stream()
+        :param field: Form field name of the file
+        """
+        content_type, params = parse_options_header(headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise MultipartParseError("Expected a multipart/form-data body")
+        self.field = field
+        self.filename: Optional[str] = None
+        self._body = body
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._in_file = False
+        self._file_ended = False
+        self._data: Deque[bytes] = deque()
+        self._parser = MultipartParser(
+            params[b"boundary"],
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+            },
+        )
+
+    async def open(self) -> Optional[str]:
+        """Read up to the file's data; its file name, or None without one."""
+        while self.filename is None:
+            if not await self._feed():
+                return None
+        return self.filename
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """The file's data, after open found it."""
+        while True:
+            while self._data:
+                yield self._data.popleft()
+            if self._file_ended:
+                return
+            if not await self._feed():
+                raise MultipartParseError("The body ended inside the file")
+
+    async def _feed(self) -> bool:
+        chunk = await anext(self._body, None)
+        if chunk is None:
+            self._parser.finalize()
+            return False
+        self._parser.write(chunk)
+        return True
+
+    def _on_part_begin(self) -> None:
+        self._disposition = b""
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._data.append(data[start:end])
+
+    def _on_part_end(self) -> None:
+        if self._in_file:
+            self._in_file = False
+            self._file_ended = True
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        if self.filename is not None:
+            return
+        _, options = parse_options_header(self._disposition)
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        if name == self.field and b"filename" in options:
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+            self._in_file = True